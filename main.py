@@ -1,57 +1,352 @@
-from flask import Flask, jsonify, render_template
+import os
+import numpy as np
+from flask import Blueprint, Flask, Response, jsonify, request, send_from_directory
 from flask_cors import CORS
 from modules.network_monitor import NetworkMonitor
+from modules.latency_prober import LatencyProber
+from modules.fleet_monitor import FleetMonitor
 from modules.predictive_maintenance import PredictiveMaintenance
 from modules.cost_optimizer import CostOptimizer
 from modules.energy_efficiency import EnergyEfficiency
 from modules.procurement_analyzer import ProcurementAnalyzer
-from modules.network_designer import NetworkDesigner
+from modules.vendor_index import VENDOR_METRICS
+from modules.network_designer import NetworkDesigner, COVERAGE_OPTIONS
 from modules.resource_optimizer import ResourceOptimizer
+from modules.metrics_stream import MetricsBroadcaster
 
-app = Flask(__name__)
-CORS(app)
+api = Blueprint('api', __name__)
 
-# Initialize modules
-network_monitor = NetworkMonitor()
-predictive_maintenance = PredictiveMaintenance()
-cost_optimizer = CostOptimizer()
-energy_efficiency = EnergyEfficiency()
-procurement_analyzer = ProcurementAnalyzer()
-network_designer = NetworkDesigner()
-resource_optimizer = ResourceOptimizer()
+# Services are created by create_app, so process pool workers that re-import this
+# module as __mp_main__ do not repeat the setup
+network_monitor = None
+fleet_monitor = None
+predictive_maintenance = None
+cost_optimizer = None
+energy_efficiency = None
+procurement_analyzer = None
+network_designer = None
+resource_optimizer = None
+metrics_broadcaster = None
 
-@app.route('/')
+def create_app():
+    global network_monitor, fleet_monitor, predictive_maintenance, cost_optimizer, energy_efficiency, \
+        procurement_analyzer, network_designer, resource_optimizer, metrics_broadcaster
+    app = Flask(__name__)
+    CORS(app)
+
+    # Initialize modules
+    network_monitor = NetworkMonitor(
+        probe_targets=LatencyProber.parse_targets(os.environ.get('NETWORK_PROBE_TARGETS', '')))
+    fleet_monitor = FleetMonitor()
+    predictive_maintenance = PredictiveMaintenance()
+    cost_optimizer = CostOptimizer(ledger_path=os.environ.get('COST_LEDGER_PATH'))
+    energy_efficiency = EnergyEfficiency()
+    procurement_analyzer = ProcurementAnalyzer(vendor_database_path=os.environ.get('VENDOR_DATABASE_PATH'),
+                                               regulation_corpus_path=os.environ.get('REGULATION_CORPUS_DIR'),
+                                               batch_workers=int(os.environ.get('PROCUREMENT_BATCH_WORKERS', 0)) or None)
+    network_designer = NetworkDesigner(population_data_path=os.environ.get('POPULATION_DATA_PATH'))
+    resource_optimizer = ResourceOptimizer()
+
+    metrics_broadcaster = MetricsBroadcaster({
+        'network': network_monitor.get_status,
+        'energy': energy_efficiency.get_metrics,
+        'maintenance': predictive_maintenance.get_predictions
+    })
+
+    # Sample network counters on a fixed cadence instead of per request
+    network_monitor.start()
+
+    app.register_blueprint(api)
+    return app
+
+@api.route('/')
 def index():
-    return render_template('index.html')
+    # The dashboard is a static page next to this module; there is no templates folder
+    return send_from_directory(os.path.dirname(os.path.abspath(__file__)), 'index.html')
+
+@api.route('/api/stream')
+def stream_metrics():
+    return Response(metrics_broadcaster.stream(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
-@app.route('/api/network/status', methods=['GET'])
+@api.route('/api/network/status', methods=['GET'])
 def get_network_status():
     return jsonify(network_monitor.get_status())
 
-@app.route('/api/maintenance/predictions', methods=['GET'])
+@api.route('/api/network/ingest', methods=['POST'])
+def ingest_network_metrics():
+    payload = request.get_json(silent=True)
+    batch = payload.get('metrics') if isinstance(payload, dict) else payload
+    if not isinstance(batch, list):
+        return jsonify({'error': 'Expected a list of metrics or {"metrics": [...]}'}), 400
+    try:
+        return jsonify(fleet_monitor.ingest(batch))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/api/network/fleet', methods=['GET'])
+def get_fleet_status():
+    return jsonify(fleet_monitor.evaluate_alerts())
+
+@api.route('/api/maintenance/predictions', methods=['GET'])
 def get_maintenance_predictions():
     return jsonify(predictive_maintenance.get_predictions())
 
-@app.route('/api/cost/analysis', methods=['GET'])
+@api.route('/api/maintenance/equipment', methods=['POST'])
+def update_equipment():
+    payload = request.get_json(silent=True)
+    records = payload.get('equipment') if isinstance(payload, dict) else payload
+    if not isinstance(records, list):
+        return jsonify({'error': 'Expected a list of equipment records or {"equipment": [...]}'}), 400
+    try:
+        return jsonify({'updated': predictive_maintenance.update_equipment(records)})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/api/maintenance/ranking', methods=['GET'])
+def get_equipment_ranking():
+    limit = request.args.get('limit', default=100, type=int)
+    return jsonify(predictive_maintenance.rank_equipment(limit=limit))
+
+@api.route('/api/maintenance/retrain', methods=['POST'])
+def retrain_maintenance_model():
+    started = predictive_maintenance.retrain_async()
+    return jsonify({'retraining': started, 'model_info': predictive_maintenance.model_info}), 202 if started else 409
+
+@api.route('/api/cost/analysis', methods=['GET'])
 def get_cost_analysis():
     return jsonify(cost_optimizer.get_analysis())
 
-@app.route('/api/energy/metrics', methods=['GET'])
+@api.route('/api/cost/sites', methods=['POST'])
+def analyze_site_costs():
+    payload = request.get_json(silent=True)
+    sites = payload.get('sites') if isinstance(payload, dict) else payload
+    if not isinstance(sites, list):
+        return jsonify({'error': 'Expected a list of sites or {"sites": [...]}'}), 400
+    try:
+        return jsonify(cost_optimizer.analyze_sites(sites))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/api/cost/ledger', methods=['POST'])
+def append_cost_ledger():
+    payload = request.get_json(silent=True)
+    records = payload.get('lines') if isinstance(payload, dict) else payload
+    if not isinstance(records, list):
+        return jsonify({'error': 'Expected a list of ledger lines or {"lines": [...]}'}), 400
+    try:
+        return jsonify({'added': cost_optimizer.cost_ledger.append(records),
+                        'rows_rejected': cost_optimizer.cost_ledger.rows_rejected})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/api/cost/attribution', methods=['GET'])
+def get_cost_attribution():
+    by = request.args.get('by', default='site').split(',')
+    limit = request.args.get('limit', type=int)
+    try:
+        return jsonify(cost_optimizer.cost_ledger.attribute(
+            by=by, month=request.args.get('month'), limit=None if limit is None else max(limit, 1)))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/api/cost/simulation', methods=['GET'])
+def get_cost_simulation():
+    # Scenarios times months is capped at what one million scenarios over three months take
+    months = min(max(request.args.get('months', default=3, type=int), 1), 60)
+    scenarios = min(max(request.args.get('scenarios', default=100000, type=int), 1), 3000000 // months)
+    try:
+        return jsonify(cost_optimizer.simulate_costs(
+            n_scenarios=scenarios,
+            months=months,
+            budget=request.args.get('budget', type=float),
+            seed=request.args.get('seed', type=int)))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/api/energy/metrics', methods=['GET'])
 def get_energy_metrics():
     return jsonify(energy_efficiency.get_metrics())
 
-@app.route('/api/procurement/analysis', methods=['GET'])
+@api.route('/api/energy/forecast', methods=['GET'])
+def get_energy_forecast():
+    try:
+        return jsonify(energy_efficiency.predict_energy_trends(
+            days=request.args.get('days', default=7, type=int),
+            include_hourly=request.args.get('hourly', default=0, type=int) == 1))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/api/energy/history', methods=['GET'])
+def get_energy_history():
+    metrics = request.args.get('metrics')
+    try:
+        return jsonify(energy_efficiency.get_power_history(
+            start=request.args.get('start', type=float),
+            end=request.args.get('end', type=float),
+            points=min(request.args.get('points', default=1000, type=int), 10000),
+            method=request.args.get('method', default='minmax'),
+            metrics=metrics.split(',') if metrics else None))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/api/energy/scenarios', methods=['POST'])
+def simulate_energy_scenarios():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'Expected an object with optional peak_thresholds, cooling_efficiencies and tariffs'}), 400
+    grids = {name: payload.get(name) for name in ('peak_thresholds', 'cooling_efficiencies', 'tariffs')}
+    if any(grid is not None and not isinstance(grid, list) for grid in grids.values()):
+        return jsonify({'error': 'Parameter grids must be lists of numbers'}), 400
+    if np.prod([len(grid) for grid in grids.values() if grid is not None]) > 1000000:
+        return jsonify({'error': 'At most 1,000,000 scenarios per request'}), 400
+    try:
+        return jsonify(energy_efficiency.simulate_scenarios(start=payload.get('start'), end=payload.get('end'), **grids))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/api/energy/readings', methods=['POST'])
+def ingest_energy_readings():
+    payload = request.get_json(silent=True)
+    readings = payload.get('readings') if isinstance(payload, dict) else payload
+    if not isinstance(readings, list):
+        return jsonify({'error': 'Expected a list of meter readings or {"readings": [...]}'}), 400
+    try:
+        return jsonify(energy_efficiency.detect_meter_anomalies(readings))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/api/procurement/analysis', methods=['GET'])
 def get_procurement_analysis():
     return jsonify(procurement_analyzer.get_analysis())
 
-@app.route('/api/network/design', methods=['GET'])
+@api.route('/api/procurement/batch', methods=['POST'])
+def analyze_procurement_batch():
+    payload = request.get_json(silent=True)
+    items = payload.get('items') if isinstance(payload, dict) else payload
+    if not isinstance(items, list) or not all(isinstance(item, dict) for item in items):
+        return jsonify({'error': 'Expected a list of analysis requests or {"items": [...]}'}), 400
+    if len(items) > 10000:
+        return jsonify({'error': 'At most 10000 items per batch'}), 400
+    # Newline-delimited JSON, one line per item as it completes
+    lines = procurement_analyzer.analyze_batch(items)
+    return Response((line + '\n' for line in lines), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@api.route('/api/procurement/vendors', methods=['POST'])
+def add_vendors():
+    payload = request.get_json(silent=True)
+    records = payload.get('vendors') if isinstance(payload, dict) else payload
+    if not isinstance(records, list):
+        return jsonify({'error': 'Expected a list of vendors or {"vendors": [...]}'}), 400
+    try:
+        return jsonify({'updated': procurement_analyzer.vendor_database.add(records),
+                        'vendors': len(procurement_analyzer.vendor_database)})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/api/procurement/vendors/ranking', methods=['GET'])
+def rank_vendors():
+    weights = {metric: request.args[metric] for metric in VENDOR_METRICS if metric in request.args}
+    try:
+        return jsonify(procurement_analyzer.rank_vendors(
+            weights=weights or None,
+            k=min(max(request.args.get('k', default=10, type=int), 1), 100),
+            region=request.args.getlist('region') or None,
+            category=request.args.getlist('category') or None,
+            certifications=request.args.getlist('certification') or None))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/api/procurement/regulations', methods=['GET'])
+def get_regulation_analysis():
+    region = request.args.get('region')
+    if not region:
+        return jsonify({'error': 'region is required'}), 400
+    return jsonify(procurement_analyzer.analyze_local_regulations(
+        {'region': region, 'categories': request.args.getlist('category') or None}))
+
+@api.route('/api/procurement/regulations', methods=['POST'])
+def add_regulations():
+    payload = request.get_json(silent=True)
+    documents = payload.get('documents') if isinstance(payload, dict) else payload
+    if not isinstance(documents, list):
+        return jsonify({'error': 'Expected a list of documents or {"documents": [...]}'}), 400
+    try:
+        return jsonify(procurement_analyzer.add_regulations(documents))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/api/procurement/regulations/search', methods=['GET'])
+def search_regulations():
+    query = request.args.get('q', '')
+    if not query.strip():
+        return jsonify({'error': 'q is required'}), 400
+    return jsonify(procurement_analyzer.search_regulations(
+        query,
+        region=request.args.getlist('region') or None,
+        category=request.args.getlist('category') or None,
+        k=min(max(request.args.get('k', default=10, type=int), 1), 100)))
+
+@api.route('/api/procurement/rollout', methods=['POST'])
+def simulate_rollout():
+    payload = request.get_json(silent=True)
+    options = payload if isinstance(payload, dict) else {}
+    tasks = options.get('tasks') if isinstance(payload, dict) else payload
+    if not isinstance(tasks, list) or not tasks:
+        return jsonify({'error': 'Expected a list of tasks or {"tasks": [...]}'}), 400
+    simulations = options.get('simulations', 10000)
+    try:
+        return jsonify(procurement_analyzer.forecast_rollout_impact(
+            {'tasks': tasks, 'simulations': simulations, 'seed': options.get('seed')}))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/api/network/design', methods=['GET'])
 def get_network_design():
     return jsonify(network_designer.get_design_plan())
 
-@app.route('/api/resource/optimization', methods=['GET'])
+@api.route('/api/network/coverage', methods=['POST'])
+def compute_network_coverage():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('towers'), list) or not payload['towers'] \
+            or not payload.get('dem'):
+        return jsonify({'error': 'Expected {"dem": "<file in DEM_DIR>", "towers": [...]}'}), 400
+    dem_dir = os.environ.get('DEM_DIR')
+    if not dem_dir:
+        return jsonify({'error': 'DEM_DIR is not configured'}), 400
+    # Only rasters inside DEM_DIR can be read
+    dem_dir = os.path.realpath(dem_dir)
+    dem_path = os.path.realpath(os.path.join(dem_dir, str(payload['dem'])))
+    if not dem_path.startswith(dem_dir + os.sep) or not os.path.isfile(dem_path):
+        return jsonify({'error': 'Unknown DEM'}), 400
+    options = {key: value for key, value in payload.items() if key in COVERAGE_OPTIONS}
+    try:
+        return jsonify(network_designer.analyze_terrain({**options, 'dem_path': dem_path, 'towers': payload['towers'],
+                                                         'max_workers': int(os.environ.get('COVERAGE_WORKERS', 0)) or None}))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+@api.route('/api/network/placement', methods=['POST'])
+def place_network_nodes():
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict) or not isinstance(payload.get('lat'), list) or not isinstance(payload.get('lon'), list):
+        return jsonify({'error': 'Expected {"lat": [...], "lon": [...], "households": [...]}'}), 400
+    try:
+        placement = network_designer.place_nodes(payload['lat'], payload['lon'], payload.get('households'),
+                                                 payload.get('tiers'))
+    except (TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    result = {key: value for key, value in placement.items() if key != 'sites'}
+    if payload.get('include_sites'):
+        result['sites'] = {tier: {field: values.tolist() for field, values in sites.items()}
+                           for tier, sites in placement['sites'].items()}
+    return jsonify(result)
+
+@api.route('/api/resource/optimization', methods=['GET'])
 def get_resource_optimization():
     infrastructure_data = {}
     return jsonify(resource_optimizer.analyze_asset_utilization(infrastructure_data))
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    create_app().run(debug=True, port=5000)
\ No newline at end of file
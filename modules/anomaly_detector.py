@@ -0,0 +1,149 @@
+import threading
+import numpy as np
+
+HOURS_PER_WEEK = 168
+
+class StreamingAnomalyDetector:
+    """
+    Streaming mean/variance per (meter, metric) with z-score anomaly scoring.
+
+    Two baselines are kept in NumPy arrays: an overall one and a seasonal one
+    per hour of the week. Both are updated for a whole batch of meters in one
+    vectorized step, with Welford's algorithm (cumulative) or an exponentially
+    weighted mean and variance when ``alpha`` is given, so no history is stored.
+    """
+    def __init__(self, metrics, alpha=None, min_samples=5, seasonal_min_samples=3, initial_capacity=256):
+        """
+        Initialize the detector.
+
+        Args:
+            metrics (sequence): Names of the values tracked per meter
+            alpha (float): EWMA smoothing factor; None for cumulative Welford statistics
+            min_samples (int): Samples needed before the overall baseline is used for scoring
+            seasonal_min_samples (int): Samples needed in an hour-of-week slot before it is preferred
+            initial_capacity (int): Meters preallocated before the arrays grow
+        """
+        self.metrics = tuple(metrics)
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.seasonal_min_samples = seasonal_min_samples
+        self.meter_ids = []
+        self._index = {}
+        self._lock = threading.Lock()
+        self._allocate(initial_capacity)
+
+    def _allocate(self, capacity):
+        n_metrics = len(self.metrics)
+        arrays = {
+            'count': np.zeros(capacity, dtype=np.int64),
+            'mean': np.zeros((capacity, n_metrics)),
+            # Sum of squared deviations for Welford, variance for EWMA
+            'spread': np.zeros((capacity, n_metrics)),
+            'seasonal_count': np.zeros((capacity, HOURS_PER_WEEK), dtype=np.int64),
+            'seasonal_mean': np.zeros((capacity, HOURS_PER_WEEK, n_metrics)),
+            'seasonal_spread': np.zeros((capacity, HOURS_PER_WEEK, n_metrics))
+        }
+        count = len(self.meter_ids)
+        for name, array in arrays.items():
+            if count:
+                array[:count] = getattr(self, name)[:count]
+            setattr(self, name, array)
+
+    def _indices(self, meter_ids):
+        for meter_id in meter_ids:
+            if meter_id not in self._index:
+                if len(self.meter_ids) == self.count.shape[0]:
+                    self._allocate(2 * len(self.meter_ids))
+                self._index[meter_id] = len(self.meter_ids)
+                self.meter_ids.append(meter_id)
+        return np.fromiter((self._index[m] for m in meter_ids), dtype=np.intp, count=len(meter_ids))
+
+    def _variance(self, count, spread):
+        if self.alpha is not None:
+            return spread
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(count > 0, spread / count, 0.0)
+
+    def _step(self, count, mean, spread, x):
+        """Fold x into the running statistics; returns the new (mean, spread)."""
+        delta = x - mean
+        if self.alpha is None:
+            new_mean = mean + delta / count
+            return new_mean, spread + delta * (x - new_mean)
+        first = count == 1
+        new_mean = np.where(first, x, mean + self.alpha * delta)
+        new_spread = np.where(first, 0.0, (1 - self.alpha) * (spread + self.alpha * delta * delta))
+        return new_mean, new_spread
+
+    def _score(self, devices, x, hours):
+        count = self.count[devices][:, None]
+        seasonal_count = self.seasonal_count[devices, hours][:, None]
+        use_seasonal = seasonal_count >= self.seasonal_min_samples
+        mean = np.where(use_seasonal, self.seasonal_mean[devices, hours], self.mean[devices])
+        variance = np.where(use_seasonal,
+                            self._variance(seasonal_count, self.seasonal_spread[devices, hours]),
+                            self._variance(count, self.spread[devices]))
+        std = np.sqrt(variance)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z = np.where(std > 0, (x - mean) / std, 0.0)
+        # Too little history for either baseline: nothing is anomalous yet
+        z = np.where(use_seasonal | (count >= self.min_samples), z, 0.0)
+        return {'z_score': z, 'mean': mean, 'seasonal': use_seasonal[:, 0]}
+
+    def score(self, meter_ids, values, hours_of_week):
+        """
+        Z-scores of new readings against the current baselines, without updating them.
+
+        Args:
+            meter_ids (sequence): Distinct meter identifiers; unknown meters score 0
+            values (array-like): Readings, shape (n, len(metrics))
+            hours_of_week (array-like): Hour of the week (0 = Monday 00:00) of each reading
+
+        Returns:
+            dict: 'z_score' and baseline 'mean', shape (n, len(metrics)), and 'seasonal',
+                whether the hour-of-week baseline was used
+        """
+        x = np.asarray(values, dtype=np.float64).reshape(len(meter_ids), len(self.metrics))
+        hours = np.asarray(hours_of_week, dtype=np.intp) % HOURS_PER_WEEK
+        with self._lock:
+            devices = np.fromiter((self._index.get(m, -1) for m in meter_ids), dtype=np.intp, count=len(meter_ids))
+            known = devices >= 0
+            if not known.any():
+                return {'z_score': np.zeros_like(x), 'mean': np.full_like(x, np.nan),
+                        'seasonal': np.zeros(len(meter_ids), dtype=bool)}
+            result = self._score(np.where(known, devices, 0), x, hours)
+        result['z_score'][~known] = 0.0
+        result['mean'][~known] = np.nan
+        result['seasonal'] &= known
+        return result
+
+    def update(self, meter_ids, values, hours_of_week):
+        """
+        Score readings against the baselines, then fold them in, in one vectorized step.
+
+        Args:
+            meter_ids (sequence): Distinct meter identifiers
+            values (array-like): Readings, shape (n, len(metrics))
+            hours_of_week (array-like): Hour of the week (0 = Monday 00:00) of each reading
+
+        Returns:
+            dict: Same as score(), computed before the update
+        """
+        if len(set(meter_ids)) != len(meter_ids):
+            raise ValueError("update() takes at most one reading per meter; call it once per tick")
+        x = np.asarray(values, dtype=np.float64).reshape(len(meter_ids), len(self.metrics))
+        hours = np.asarray(hours_of_week, dtype=np.intp) % HOURS_PER_WEEK
+
+        with self._lock:
+            devices = self._indices(meter_ids)
+            result = self._score(devices, x, hours)
+
+            self.count[devices] += 1
+            self.mean[devices], self.spread[devices] = self._step(
+                self.count[devices][:, None], self.mean[devices], self.spread[devices], x)
+
+            self.seasonal_count[devices, hours] += 1
+            self.seasonal_mean[devices, hours], self.seasonal_spread[devices, hours] = self._step(
+                self.seasonal_count[devices, hours][:, None], self.seasonal_mean[devices, hours],
+                self.seasonal_spread[devices, hours], x)
+        return result
@@ -0,0 +1,113 @@
+import logging
+import threading
+import warnings
+import numpy as np
+
+class CostForecaster:
+    """
+    Holt (damped additive trend) exponential smoothing over the completed daily
+    periods of a RollupStore.
+
+    The fitted model is cached under the last completed period, which only
+    changes once a day has closed, so repeated requests reuse it. When the key
+    changes the refit runs in a background thread while callers keep getting
+    the previous forecast.
+    """
+    def __init__(self, store, granularity='daily', min_periods=14, z_score=1.96):
+        """
+        Initialize the forecaster.
+
+        Args:
+            store (RollupStore): Source of the aggregated history
+            granularity (str): Rollup granularity the model is fitted on
+            min_periods (int): Completed periods needed before fitting; fewer give a flat forecast
+            z_score (float): Multiplier of the residual standard deviation for confidence bounds
+        """
+        self.store = store
+        self.granularity = granularity
+        self.min_periods = min_periods
+        self.z_score = z_score
+        self.logger = logging.getLogger("CostOptimizer")
+        self._fitted = None
+        self._forecasts = {}
+        self._lock = threading.Lock()
+        self._refit_thread = None
+
+    def _history(self):
+        series = self.store.series(self.granularity, include_current=False)
+        if series['period'].shape[0] == 0:
+            return None, series
+        key = (int(series['period'][-1]), int(series['count'][-1]))
+        return key, series
+
+    def _fit(self, key, series):
+        from statsmodels.tsa.holtwinters import ExponentialSmoothing
+
+        # Missing days (process down) are filled by linear interpolation to keep the spacing regular
+        periods = np.arange(series['period'][0], series['period'][-1] + 1)
+        values = np.interp(periods, series['period'], series['mean'])
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                results = ExponentialSmoothing(values, trend='add', damped_trend=True,
+                                               initialization_method='estimated').fit()
+            residual_std = float(np.std(values - results.fittedvalues, ddof=1))
+        except Exception as e:
+            self.logger.error(f"Cost forecast fit failed: {str(e)}")
+            return
+        with self._lock:
+            self._fitted = {'key': key, 'results': results, 'residual_std': residual_std,
+                            'periods': int(periods.shape[0])}
+            self._forecasts.clear()
+        self.logger.info(f"Refit cost forecaster on {periods.shape[0]} periods")
+
+    def _ensure_fresh(self, key, series):
+        with self._lock:
+            if self._fitted is not None and self._fitted['key'] == key:
+                return
+            if self._refit_thread is not None and self._refit_thread.is_alive():
+                return
+            self._refit_thread = threading.Thread(target=self._fit, args=(key, series),
+                                                  name='CostForecastRefit', daemon=True)
+            self._refit_thread.start()
+
+    def forecast(self, steps, fallback=None):
+        """
+        Forecast the next periods.
+
+        Args:
+            steps (int): Number of periods ahead
+            fallback (float): Level used when there is no history at all
+
+        Returns:
+            dict: 'mean' and 'std' arrays of shape (steps,) and the 'method' used
+        """
+        key, series = self._history()
+        if key is not None and series['period'].shape[0] >= self.min_periods:
+            self._ensure_fresh(key, series)
+
+        with self._lock:
+            fitted = self._fitted
+            cached = self._forecasts.get(steps) if fitted is not None else None
+        if cached is not None:
+            return cached
+        if fitted is not None:
+            horizon = np.arange(1, steps + 1)
+            result = {
+                'mean': np.asarray(fitted['results'].forecast(steps)),
+                # Uncertainty grows with the square root of the horizon
+                'std': fitted['residual_std'] * np.sqrt(horizon),
+                'method': 'holt_damped',
+                'fitted_periods': fitted['periods']
+            }
+            with self._lock:
+                if self._fitted is fitted:
+                    self._forecasts[steps] = result
+            return result
+
+        # Not enough completed periods yet: flat forecast at the overall mean
+        summary = self.store.summary().get(self.granularity)
+        level = summary['mean'] if summary else fallback
+        spread = summary['std'] if summary and summary['count'] > 1 else 0.1 * abs(level or 0)
+        return {'mean': np.full(steps, level, dtype=np.float64), 'std': np.full(steps, spread),
+                'method': 'flat', 'fitted_periods': 0}
@@ -0,0 +1,185 @@
+import logging
+import os
+import threading
+import pandas as pd
+
+DIMENSIONS = ('site', 'asset', 'category')
+UNALLOCATED = 'unallocated'
+
+class CostLedger:
+    """
+    Cost attribution over invoice/billing ledgers.
+
+    Ledgers are read in chunks and each chunk is reduced to sums and line
+    counts per (site, asset, category, month) before being merged into the
+    running aggregates, so memory scales with the number of distinct keys
+    rather than ledger rows, and appending a new month never rescans old data.
+    """
+    def __init__(self, columns=None, chunk_rows=500000):
+        """
+        Initialize an empty ledger.
+
+        Args:
+            columns (dict): Ledger field ('date', 'amount', 'site', 'asset', 'category') -> column
+                name in the source files, for sources that use different headers
+            chunk_rows (int): Rows read per chunk when loading files
+        """
+        self.columns = {name: name for name in ('date', 'amount') + DIMENSIONS}
+        self.columns.update(columns or {})
+        self.chunk_rows = chunk_rows
+        self.rows_loaded = 0
+        self.rows_rejected = 0
+        self.logger = logging.getLogger("CostOptimizer")
+        self._totals = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.rows_loaded
+
+    def load(self, path):
+        """
+        Load a CSV or Parquet ledger, chosen by file extension.
+
+        Returns:
+            int: Rows added
+        """
+        extension = os.path.splitext(path)[1].lower()
+        if extension in ('.parquet', '.pq'):
+            return self.load_parquet(path)
+        return self.load_csv(path)
+
+    def load_csv(self, path):
+        available = pd.read_csv(path, nrows=0).columns
+        usecols = [source for source in self.columns.values() if source in available]
+        added = 0
+        for chunk in pd.read_csv(path, usecols=usecols, chunksize=self.chunk_rows):
+            added += self.append(chunk)
+        self.logger.info(f"Loaded {added} ledger rows from {path}")
+        return added
+
+    def load_parquet(self, path):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Loading Parquet ledgers requires pyarrow: pip install pyarrow")
+
+        parquet_file = pq.ParquetFile(path)
+        available = set(parquet_file.schema_arrow.names)
+        columns = [source for source in self.columns.values() if source in available]
+        added = 0
+        for batch in parquet_file.iter_batches(batch_size=self.chunk_rows, columns=columns):
+            added += self.append(batch.to_pandas())
+        self.logger.info(f"Loaded {added} ledger rows from {path}")
+        return added
+
+    def append(self, records):
+        """
+        Merge ledger lines into the aggregates.
+
+        Args:
+            records: DataFrame or list of dicts with a date and amount and optionally site,
+                asset and category (missing ones are attributed to 'unallocated')
+
+        Returns:
+            int: Rows added; rows with an unparseable date or amount are counted in rows_rejected
+        """
+        frame = records if isinstance(records, pd.DataFrame) else pd.DataFrame.from_records(records)
+        frame = frame.rename(columns={source: name for name, source in self.columns.items()})
+        missing = [name for name in ('date', 'amount') if name not in frame.columns]
+        if missing:
+            raise ValueError(f"Ledger rows need {', '.join(self.columns[name] for name in missing)}")
+
+        dates = pd.to_datetime(frame['date'], errors='coerce', format='mixed')
+        amounts = pd.to_numeric(frame['amount'], errors='coerce')
+        valid = dates.notna() & amounts.notna()
+        keys = {
+            dimension: (frame.loc[valid, dimension].fillna(UNALLOCATED).astype(str)
+                        if dimension in frame.columns else UNALLOCATED)
+            for dimension in DIMENSIONS
+        }
+        # Months as YYYYMM integers; cheaper to group than strings or periods
+        keys['month'] = dates[valid].dt.year * 100 + dates[valid].dt.month
+        chunk = pd.DataFrame({**keys, 'amount': amounts[valid]})
+        grouped = chunk.groupby(list(DIMENSIONS) + ['month'], sort=False)['amount'].agg(['sum', 'count'])
+
+        with self._lock:
+            self._totals = grouped if self._totals is None else self._totals.add(grouped, fill_value=0)
+            added = int(valid.sum())
+            self.rows_loaded += added
+            self.rows_rejected += int((~valid).sum())
+        return added
+
+    def months(self):
+        """Months present in the ledger as 'YYYY-MM', oldest first."""
+        totals = self._totals
+        if totals is None:
+            return []
+        return [f"{m // 100}-{m % 100:02d}" for m in sorted(totals.index.unique(level='month'))]
+
+    def attribute(self, by=('site',), month=None, limit=None):
+        """
+        Attribute cost along one or more dimensions.
+
+        Args:
+            by (sequence): Any of 'site', 'asset', 'category' and 'month'
+            month (str): Restrict to one month ('YYYY-MM')
+            limit (int): Keep only the largest entries
+
+        Returns:
+            list: Dicts with the dimension values, 'amount' and 'line_items', largest first
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        unknown = [name for name in by if name not in DIMENSIONS + ('month',)]
+        if not by or unknown:
+            raise ValueError(f"Cannot attribute by {', '.join(unknown) or 'nothing'}")
+        totals = self._totals
+        if totals is None:
+            return []
+        if month is not None:
+            totals = totals[totals.index.get_level_values('month') == self._month_key(month)]
+        grouped = totals.groupby(level=by, sort=False).sum().sort_values('sum', ascending=False)
+        if limit is not None:
+            grouped = grouped.head(limit)
+
+        result = []
+        for key, row in zip(grouped.index, grouped.itertuples(index=False)):
+            key = key if isinstance(key, tuple) else (key,)
+            entry = {name: (f"{value // 100}-{value % 100:02d}" if name == 'month' else value)
+                     for name, value in zip(by, key)}
+            entry['amount'] = float(row.sum)
+            entry['line_items'] = int(row.count)
+            result.append(entry)
+        return result
+
+    def month_total(self, month=None, exclude_categories=()):
+        """
+        Total cost of one month.
+
+        Args:
+            month (str): 'YYYY-MM', defaults to the latest month in the ledger
+            exclude_categories (sequence): Categories left out (case-insensitive)
+
+        Returns:
+            float: Total, or None when the ledger has no data for the month once the
+                excluded categories are left out
+        """
+        totals = self._totals
+        if totals is None:
+            return None
+        months = totals.index.get_level_values('month')
+        key = months.max() if month is None else self._month_key(month)
+        selected = months == key
+        if exclude_categories:
+            excluded = {category.lower() for category in exclude_categories}
+            selected &= ~totals.index.get_level_values('category').str.lower().isin(excluded)
+        if not selected.any():
+            return None
+        return float(totals.loc[selected, 'sum'].sum())
+
+    @staticmethod
+    def _month_key(month):
+        try:
+            year, number = str(month).split('-')
+            return int(year) * 100 + int(number)
+        except ValueError:
+            raise ValueError(f"Month must be formatted as YYYY-MM, got {month!r}")
@@ -1,24 +1,121 @@
 import numpy as np
+import pandas as pd
 from datetime import datetime, timedelta
 import logging
+from modules.rollup_store import RollupStore
+from modules.cost_forecaster import CostForecaster
+from modules.cost_ledger import CostLedger
+
+SITE_COST_COLUMNS = ('energy_costs', 'maintenance_costs', 'emergency_maintenance_costs',
+                     'bandwidth_costs', 'infrastructure_costs')
+REQUIRED_SITE_COLUMNS = ('energy_costs', 'maintenance_costs', 'bandwidth_costs')
+
+# Ledger categories that CostOptimizer models itself rather than taking from the ledger
+MODELED_CATEGORIES = ('energy', 'maintenance', 'bandwidth')
+
+# Disjoint parts of the monthly cost that recommendations can reduce; infrastructure has no rule
+SAVINGS_COMPONENTS = ('energy_costs', 'routine_maintenance_costs', 'emergency_maintenance_costs', 'bandwidth_costs')
+
+# A rule fires when every (column, threshold) condition is exceeded. Its recommendations save
+# ``savings_rate`` (the midpoint of the estimate) of the components in ``applies_to``
+RECOMMENDATION_RULES = [
+    {
+        'conditions': (('energy_costs', 1000),),
+        'applies_to': ('energy_costs',),
+        'recommendations': (
+            {
+                'category': 'Energy',
+                'action': 'Implement power management schedules',
+                'estimated_savings': '15-20%',
+                'savings_rate': 0.175,
+                'implementation_difficulty': 'Medium',
+                'priority': 'High'
+            },
+            {
+                'category': 'Energy',
+                'action': 'Investigate renewable energy options',
+                'estimated_savings': '10-30%',
+                'savings_rate': 0.2,
+                'implementation_difficulty': 'High',
+                'priority': 'Medium'
+            }
+        )
+    },
+    {
+        'conditions': (('maintenance_costs', 800),),
+        'applies_to': ('routine_maintenance_costs', 'emergency_maintenance_costs'),
+        'recommendations': (
+            {
+                'category': 'Maintenance',
+                'action': 'Optimize maintenance schedules based on predictive analytics',
+                'estimated_savings': '20-25%',
+                'savings_rate': 0.225,
+                'implementation_difficulty': 'Medium',
+                'priority': 'High'
+            },
+        )
+    },
+    {
+        'conditions': (('maintenance_costs', 800), ('emergency_maintenance_costs', 300)),
+        'applies_to': ('emergency_maintenance_costs',),
+        'recommendations': (
+            {
+                'category': 'Maintenance',
+                'action': 'Implement proactive monitoring to reduce emergency maintenance',
+                'estimated_savings': '30-40% of emergency costs',
+                'savings_rate': 0.35,
+                'implementation_difficulty': 'Medium',
+                'priority': 'Critical'
+            },
+        )
+    },
+    {
+        'conditions': (('bandwidth_costs', 2200),),
+        'applies_to': ('bandwidth_costs',),
+        'recommendations': (
+            {
+                'category': 'Bandwidth',
+                'action': 'Implement traffic optimization and caching',
+                'estimated_savings': '10-15%',
+                'savings_rate': 0.125,
+                'implementation_difficulty': 'Medium',
+                'priority': 'High'
+            },
+            {
+                'category': 'Bandwidth',
+                'action': 'Negotiate volume discounts with providers',
+                'estimated_savings': '5-10%',
+                'savings_rate': 0.075,
+                'implementation_difficulty': 'Low',
+                'priority': 'Medium'
+            }
+        )
+    }
+]
 
 class CostOptimizer:
     """
     Analyzes and optimizes infrastructure costs with improved predictive capabilities
     and more robust recommendations.
     """
-    def __init__(self, base_infrastructure_cost=10000, energy_cost_per_kwh=0.12):
+    def __init__(self, base_infrastructure_cost=10000, energy_cost_per_kwh=0.12, ledger_path=None):
         """
         Initialize the CostOptimizer with configurable base costs.
         
         Args:
-            base_infrastructure_cost (float): Base monthly infrastructure cost
+            base_infrastructure_cost (float): Base monthly infrastructure cost, used until a ledger is loaded
             energy_cost_per_kwh (float): Cost per kilowatt-hour
+            ledger_path (str): Optional CSV or Parquet billing ledger to load at startup
         """
         self.base_infrastructure_cost = base_infrastructure_cost
         self.energy_cost_per_kwh = energy_cost_per_kwh
-        self.maintenance_cost_history = []
+        self.maintenance_cost_history = RollupStore()
+        self.total_cost_history = RollupStore()
+        self.cost_forecaster = CostForecaster(self.total_cost_history)
+        self.cost_ledger = CostLedger()
         self.logger = self._setup_logger()
+        if ledger_path:
+            self.cost_ledger.load(ledger_path)
         
     def _setup_logger(self):
         """Set up logging for the CostOptimizer."""
@@ -30,6 +127,14 @@ class CostOptimizer:
             handler.setFormatter(formatter)
             logger.addHandler(handler)
         return logger
+
+    def infrastructure_cost(self):
+        """
+        Monthly infrastructure cost: the latest ledger month without the energy, maintenance
+        and bandwidth lines (those are modeled separately), or the configured base cost.
+        """
+        ledger_total = self.cost_ledger.month_total(exclude_categories=MODELED_CATEGORIES)
+        return self.base_infrastructure_cost if ledger_total is None else ledger_total
         
     def calculate_energy_costs(self, daily_usage_mean=240, daily_usage_std=20):
         """
@@ -67,10 +172,7 @@ class CostOptimizer:
             'total': routine_maintenance + emergency_maintenance
         }
         
-        self.maintenance_cost_history.append({
-            'date': datetime.now().strftime('%Y-%m-%d'),
-            'costs': maintenance_costs
-        })
+        self.maintenance_cost_history.append(maintenance_costs['total'])
         
         return maintenance_costs
 
@@ -97,7 +199,8 @@ class CostOptimizer:
 
     def predict_future_costs(self, months=3, include_confidence_interval=True):
         """
-        Predict costs for future months with confidence intervals.
+        Predict costs for future months with confidence intervals, from an exponential
+        smoothing model of the recorded monthly totals (see CostForecaster).
         
         Args:
             months (int): Number of months to predict
@@ -106,25 +209,150 @@ class CostOptimizer:
         Returns:
             list: Predicted costs for specified months
         """
+        # Expected total at the default usage parameters, used before any analysis has been recorded
+        fallback = (self.infrastructure_cost() + 240 * 30 * self.energy_cost_per_kwh + 700 + 2000 * 1.1)
+        # Daily forecast of the monthly total, averaged over 30-day blocks
+        forecast = self.cost_forecaster.forecast(30 * months, fallback=fallback)
+        monthly_mean = forecast['mean'].reshape(months, 30).mean(axis=1)
+        monthly_std = forecast['std'].reshape(months, 30).mean(axis=1)
+
         future_costs = []
         for month in range(1, months + 1):
-            predicted_mean = np.random.normal(15000, 1000)
+            predicted_mean = float(monthly_mean[month - 1])
             
             predicted_cost = {
                 'month': (datetime.now() + timedelta(days=30*month)).strftime('%Y-%m'),
-                'predicted_total': predicted_mean
+                'predicted_total': predicted_mean,
+                'method': forecast['method']
             }
             
             if include_confidence_interval:
+                margin = self.cost_forecaster.z_score * float(monthly_std[month - 1])
                 predicted_cost['confidence_interval'] = {
-                    'lower_bound': predicted_mean * 0.9,
-                    'upper_bound': predicted_mean * 1.1
+                    'lower_bound': predicted_mean - margin,
+                    'upper_bound': predicted_mean + margin
                 }
                 
             future_costs.append(predicted_cost)
             
         return future_costs
 
+    def simulate_costs(self, n_scenarios=100000, months=3, budget=None, seed=None,
+                       daily_usage_mean=240, daily_usage_std=20, bandwidth_base_cost=2000,
+                       bandwidth_usage_mean=1.1, bandwidth_usage_std=0.1, include_emergency=True):
+        """
+        Monte Carlo simulation of monthly costs, drawing every scenario of every
+        component and month as NumPy arrays in one pass.
+
+        Args:
+            n_scenarios (int): Number of simulated scenarios per month
+            months (int): Number of future months to simulate
+            budget (float): Monthly budget for the exceedance probability, defaults to the
+                expected monthly total
+            seed (int): Seed for reproducible reports
+            daily_usage_mean (float): Average daily kWh usage
+            daily_usage_std (float): Standard deviation of daily usage
+            bandwidth_base_cost (float): Base bandwidth cost
+            bandwidth_usage_mean (float): Mean bandwidth usage multiplier
+            bandwidth_usage_std (float): Standard deviation of the usage multiplier
+            include_emergency (bool): Whether to include emergency maintenance costs
+
+        Returns:
+            dict: P5/P50/P95 per component and month, and the probability of exceeding budget
+        """
+        if n_scenarios < 1 or months < 1:
+            raise ValueError("n_scenarios and months must be positive")
+        rng = np.random.default_rng(seed)
+        shape = (months, n_scenarios)
+
+        # Same distributions as the single-draw calculators above
+        components = {
+            'energy': rng.normal(daily_usage_mean, daily_usage_std, shape) * 30 * self.energy_cost_per_kwh,
+            'maintenance': rng.normal(500, 50, shape),
+            'bandwidth': bandwidth_base_cost * rng.normal(bandwidth_usage_mean, bandwidth_usage_std, shape)
+        }
+        if include_emergency:
+            components['maintenance'] += rng.normal(200, 100, shape)
+        total = self.infrastructure_cost() + sum(components.values())
+        components['total'] = total
+
+        if budget is None:
+            budget = (self.infrastructure_cost() + daily_usage_mean * 30 * self.energy_cost_per_kwh +
+                      500 + (200 if include_emergency else 0) + bandwidth_base_cost * bandwidth_usage_mean)
+
+        # One partial sort for all components and months; nearest-rank percentiles are exact enough at this N
+        names = list(components)
+        stacked = np.stack([components[name] for name in names])
+        ranks = [max(int(np.ceil(q * n_scenarios)) - 1, 0) for q in (0.05, 0.5, 0.95)]
+        ranked = np.partition(stacked, ranks, axis=-1)[..., ranks]
+        means = stacked.mean(axis=-1)
+        percentiles = {name: ranked[i].T for i, name in enumerate(names)}
+        exceedance = (total > budget).mean(axis=1)
+
+        monthly = []
+        for month in range(months):
+            monthly.append({
+                'month': (datetime.now() + timedelta(days=30 * (month + 1))).strftime('%Y-%m'),
+                'components': {
+                    name: {
+                        'p5': float(values[0, month]),
+                        'p50': float(values[1, month]),
+                        'p95': float(values[2, month]),
+                        'mean': float(means[i, month])
+                    }
+                    for i, (name, values) in enumerate(percentiles.items())
+                },
+                'probability_exceeding_budget': float(exceedance[month])
+            })
+
+        return {
+            'n_scenarios': n_scenarios,
+            'seed': seed,
+            'budget': budget,
+            'monthly_simulations': monthly,
+            'probability_any_month_exceeding_budget': float((total > budget).any(axis=0).mean())
+        }
+
+    def _rule_masks(self, columns):
+        """Boolean mask over sites for every rule in RECOMMENDATION_RULES."""
+        masks = []
+        for rule in RECOMMENDATION_RULES:
+            mask = np.ones(len(next(iter(columns.values()))), dtype=bool)
+            for column, threshold in rule['conditions']:
+                mask &= columns[column] > threshold
+            masks.append(mask)
+        return masks
+
+    def _monthly_savings(self, columns, spend):
+        """
+        Monthly savings per component from the recommendations each site triggers.
+
+        Args:
+            columns (dict): Rule columns (arrays over sites) the thresholds are checked on
+            spend (dict): SAVINGS_COMPONENTS -> spend arrays the savings rates apply to
+
+        Returns:
+            dict: Component -> savings array
+        """
+        # Actions on the same component compound: each saves its share of what the others leave
+        retained = {component: np.ones_like(spend[component], dtype=np.float64) for component in SAVINGS_COMPONENTS}
+        for rule, mask in zip(RECOMMENDATION_RULES, self._rule_masks(columns)):
+            for recommendation in rule['recommendations']:
+                for component in rule['applies_to']:
+                    retained[component] = np.where(mask, retained[component] * (1 - recommendation['savings_rate']),
+                                                   retained[component])
+        return {component: spend[component] * (1 - retained[component]) for component in SAVINGS_COMPONENTS}
+
+    @staticmethod
+    def _cost_columns(current_costs):
+        # One-site rule columns for a current cost breakdown
+        return {
+            'energy_costs': np.array([current_costs['energy_costs']]),
+            'maintenance_costs': np.array([current_costs['maintenance_costs']['total']]),
+            'emergency_maintenance_costs': np.array([current_costs['maintenance_costs'].get('emergency', 0)]),
+            'bandwidth_costs': np.array([current_costs['bandwidth_costs']['total_cost']])
+        }
+
     def get_cost_reduction_recommendations(self, current_costs):
         """
         Generate cost reduction recommendations based on current costs.
@@ -136,61 +364,93 @@ class CostOptimizer:
             list: Recommended cost reduction actions
         """
         recommendations = []
-        
-        # Energy cost recommendations
-        if current_costs['energy_costs'] > 1000:
-            recommendations.append({
-                'category': 'Energy',
-                'action': 'Implement power management schedules',
-                'estimated_savings': '15-20%',
-                'implementation_difficulty': 'Medium',
-                'priority': 'High'
-            })
-            recommendations.append({
-                'category': 'Energy',
-                'action': 'Investigate renewable energy options',
-                'estimated_savings': '10-30%',
-                'implementation_difficulty': 'High',
-                'priority': 'Medium'
-            })
+        for rule, mask in zip(RECOMMENDATION_RULES, self._rule_masks(self._cost_columns(current_costs))):
+            if mask[0]:
+                recommendations.extend(dict(recommendation) for recommendation in rule['recommendations'])
+        return recommendations
 
-        # Maintenance cost recommendations
-        if current_costs['maintenance_costs']['total'] > 800:
-            recommendations.append({
-                'category': 'Maintenance',
-                'action': 'Optimize maintenance schedules based on predictive analytics',
-                'estimated_savings': '20-25%',
-                'implementation_difficulty': 'Medium',
-                'priority': 'High'
-            })
+    def analyze_sites(self, sites):
+        """
+        Analyze many sites at once: cost breakdown, recommendations and savings per site,
+        plus fleet totals. Rule thresholds are evaluated as masks over the whole table.
+        
+        Args:
+            sites (list): Dicts with ``site_id``, ``energy_costs``, ``maintenance_costs`` and
+                ``bandwidth_costs``, optionally ``emergency_maintenance_costs`` (part of the
+                maintenance total, default 0) and ``infrastructure_costs`` (default infrastructure_cost())
             
-            if current_costs['maintenance_costs'].get('emergency', 0) > 300:
-                recommendations.append({
-                    'category': 'Maintenance',
-                    'action': 'Implement proactive monitoring to reduce emergency maintenance',
-                    'estimated_savings': '30-40% of emergency costs',
-                    'implementation_difficulty': 'Medium',
-                    'priority': 'Critical'
-                })
-
-        # Bandwidth cost recommendations
-        if current_costs['bandwidth_costs']['total'] > 2200:
-            recommendations.append({
-                'category': 'Bandwidth',
-                'action': 'Implement traffic optimization and caching',
-                'estimated_savings': '10-15%',
-                'implementation_difficulty': 'Medium',
-                'priority': 'High'
-            })
-            recommendations.append({
-                'category': 'Bandwidth',
-                'action': 'Negotiate volume discounts with providers',
-                'estimated_savings': '5-10%',
-                'implementation_difficulty': 'Low',
-                'priority': 'Medium'
-            })
+        Returns:
+            dict: Per-site analysis and fleet totals
+        """
+        frame = pd.DataFrame.from_records(sites)
+        missing = [column for column in ('site_id',) + REQUIRED_SITE_COLUMNS if column not in frame.columns]
+        if missing:
+            raise ValueError(f"Missing site fields: {', '.join(missing)}")
+        if frame['site_id'].duplicated().any():
+            raise ValueError("Duplicate site_id values")
+        frame = frame.set_index('site_id').reindex(columns=SITE_COST_COLUMNS)
+        frame['emergency_maintenance_costs'] = frame['emergency_maintenance_costs'].fillna(0)
+        frame['infrastructure_costs'] = frame['infrastructure_costs'].fillna(self.infrastructure_cost())
+        try:
+            frame = frame.astype(np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("Site cost fields must be numeric")
+        if frame[list(REQUIRED_SITE_COLUMNS)].isna().any().any():
+            raise ValueError(f"Every site needs {', '.join(REQUIRED_SITE_COLUMNS)}")
 
-        return recommendations
+        columns = {column: frame[column].to_numpy() for column in SITE_COST_COLUMNS}
+        breakdown = {
+            'energy': columns['energy_costs'],
+            'maintenance': columns['maintenance_costs'],
+            'bandwidth': columns['bandwidth_costs'],
+            'infrastructure': columns['infrastructure_costs']
+        }
+        total = sum(breakdown.values())
+        spend = {
+            'energy_costs': columns['energy_costs'],
+            'routine_maintenance_costs': columns['maintenance_costs'] - columns['emergency_maintenance_costs'],
+            'emergency_maintenance_costs': columns['emergency_maintenance_costs'],
+            'bandwidth_costs': columns['bandwidth_costs']
+        }
+        annual_savings = sum(self._monthly_savings(columns, spend).values()) * 12
+        # Sites without any cost get 0% everywhere rather than NaN, which is not valid JSON
+        percentages = {name: np.divide(values * 100, total, out=np.zeros_like(total), where=total != 0).tolist()
+                       for name, values in breakdown.items()}
+
+        site_recommendations = [[] for _ in range(len(frame))]
+        actions = {}
+        for rule, mask in zip(RECOMMENDATION_RULES, self._rule_masks(columns)):
+            matched = np.flatnonzero(mask)
+            for recommendation in rule['recommendations']:
+                actions[recommendation['action']] = int(matched.shape[0])
+            for i in matched:
+                site_recommendations[i].extend(rule['recommendations'])
+
+        site_ids = frame.index.tolist()
+        totals = total.tolist()
+        savings = annual_savings.tolist()
+        results = [
+            {
+                'site_id': site_ids[i],
+                'total_monthly_cost': totals[i],
+                'cost_breakdown_percentage': {name: values[i] for name, values in percentages.items()},
+                'cost_reduction_recommendations': site_recommendations[i],
+                'estimated_annual_savings': savings[i]
+            }
+            for i in range(len(site_ids))
+        ]
+
+        return {
+            'sites': results,
+            'fleet_totals': {
+                'site_count': len(site_ids),
+                'total_monthly_cost': float(total.sum()),
+                'costs': {name: float(values.sum()) for name, values in breakdown.items()},
+                'sites_with_recommendations': sum(1 for r in site_recommendations if r),
+                'sites_per_action': actions,
+                'estimated_annual_savings': float(annual_savings.sum())
+            }
+        }
 
     def get_analysis(self):
         """
@@ -201,59 +461,105 @@ class CostOptimizer:
         """
         maintenance_costs = self.calculate_maintenance_costs()
         bandwidth_costs = self.calculate_bandwidth_costs()
+        infrastructure_costs = self.infrastructure_cost()
         
         current_costs = {
             'energy_costs': self.calculate_energy_costs(),
             'maintenance_costs': maintenance_costs,
             'bandwidth_costs': bandwidth_costs,
-            'infrastructure_costs': self.base_infrastructure_cost
+            'infrastructure_costs': infrastructure_costs
         }
 
         total_cost = (current_costs['energy_costs'] + 
                      maintenance_costs['total'] + 
-                     bandwidth_costs['total'] + 
-                     self.base_infrastructure_cost)
+                     bandwidth_costs['total_cost'] + 
+                     infrastructure_costs)
         
-        historical_trend = None
-        if len(self.maintenance_cost_history) > 1:
-            # Calculate trend if we have historical data
-            oldest = self.maintenance_cost_history[0]['costs']['total']
-            newest = self.maintenance_cost_history[-1]['costs']['total']
-            historical_trend = (newest - oldest) / oldest * 100  # Percentage change
+        self.total_cost_history.append(total_cost)
+        savings = self._calculate_potential_savings(current_costs)
+
+        # Percentage change between the oldest and newest retained daily means
+        historical_trend = self.maintenance_cost_history.trend('daily')
         
         return {
             'current_costs': current_costs,
             'total_monthly_cost': total_cost,
             'historical_trend': historical_trend,
+            'maintenance_cost_statistics': self.maintenance_cost_history.summary(),
             'cost_breakdown_percentage': {
                 'energy': (current_costs['energy_costs'] / total_cost) * 100,
                 'maintenance': (maintenance_costs['total'] / total_cost) * 100,
-                'bandwidth': (bandwidth_costs['total'] / total_cost) * 100,
-                'infrastructure': (self.base_infrastructure_cost / total_cost) * 100
+                'bandwidth': (bandwidth_costs['total_cost'] / total_cost) * 100,
+                'infrastructure': (infrastructure_costs / total_cost) * 100
             },
+            'cost_attribution': self.get_cost_attribution(),
             'future_cost_predictions': self.predict_future_costs(),
             'cost_reduction_recommendations': self.get_cost_reduction_recommendations(current_costs),
-            'estimated_annual_savings': self._calculate_potential_savings(current_costs)
+            'estimated_annual_savings': savings['total'],
+            'estimated_annual_savings_by_category': savings['by_category']
+        }
+
+    def get_cost_attribution(self, month=None, limit=10):
+        """
+        Largest cost contributors by site, asset and category from the billing ledger.
+        
+        Args:
+            month (str): Month to attribute ('YYYY-MM'), defaults to the latest in the ledger
+            limit (int): Entries kept per dimension
+            
+        Returns:
+            dict: Top entries per dimension, or None when no ledger is loaded
+        """
+        months = self.cost_ledger.months()
+        if not months:
+            return None
+        month = month or months[-1]
+        return {
+            'month': month,
+            'total': self.cost_ledger.month_total(month),
+            **{f'by_{dimension}': self.cost_ledger.attribute(by=dimension, month=month, limit=limit)
+               for dimension in ('site', 'asset', 'category')}
         }
     
     def _calculate_potential_savings(self, current_costs):
         """
-        Calculate potential annual savings based on implementing all recommendations.
+        Calculate potential annual savings per category from the recommendations that apply.
+        Category spend comes from the latest ledger month where the ledger bills that
+        category, and from the modeled costs otherwise.
         
         Args:
             current_costs (dict): Current cost breakdown
             
         Returns:
-            float: Estimated annual savings
+            dict: Annual savings per category and their total
         """
-        # Simplified calculation - in a real implementation, this would be more sophisticated
-        monthly_total = (current_costs['energy_costs'] + 
-                        current_costs['maintenance_costs']['total'] + 
-                        current_costs['bandwidth_costs']['total'] + 
-                        self.base_infrastructure_cost)
-        
-        # Estimate 15% savings from all optimizations
-        potential_monthly_savings = monthly_total * 0.15
-        annual_savings = potential_monthly_savings * 12
-        
-        return annual_savings
\ No newline at end of file
+        maintenance = current_costs['maintenance_costs']
+        spend = {
+            'energy_costs': current_costs['energy_costs'],
+            'routine_maintenance_costs': maintenance['routine'],
+            'emergency_maintenance_costs': maintenance['emergency'],
+            'bandwidth_costs': current_costs['bandwidth_costs']['total_cost']
+        }
+        months = self.cost_ledger.months()
+        if months:
+            billed = {}
+            for entry in self.cost_ledger.attribute(by='category', month=months[-1]):
+                category = str(entry['category']).lower()
+                billed[category] = billed.get(category, 0.0) + entry['amount']
+            if 'energy' in billed:
+                spend['energy_costs'] = billed['energy']
+            if 'bandwidth' in billed:
+                spend['bandwidth_costs'] = billed['bandwidth']
+            if 'maintenance' in billed:
+                # The ledger does not separate emergency work, so the modeled split is kept
+                share = maintenance['emergency'] / maintenance['total'] if maintenance['total'] else 0.0
+                spend['emergency_maintenance_costs'] = billed['maintenance'] * share
+                spend['routine_maintenance_costs'] = billed['maintenance'] * (1 - share)
+
+        savings = self._monthly_savings(self._cost_columns(current_costs), {name: np.array([value]) for name, value in spend.items()})
+        by_category = {
+            'energy': float(savings['energy_costs'][0]) * 12,
+            'maintenance': float(savings['routine_maintenance_costs'][0] + savings['emergency_maintenance_costs'][0]) * 12,
+            'bandwidth': float(savings['bandwidth_costs'][0]) * 12
+        }
+        return {'by_category': by_category, 'total': sum(by_category.values())}
@@ -0,0 +1,271 @@
+import math
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+SPEED_OF_LIGHT = 299792458.0
+EFFECTIVE_EARTH_RADIUS_M = 6371000.0 * 4 / 3  # standard atmosphere refraction
+OUTPUT_RASTERS = {'rx_power': np.float32, 'serving_tower': np.int32, 'line_of_sight': np.bool_}
+NO_SIGNAL_DBM = -200.0
+# Working memory per profile sample: row and column indices, terrain and the float32 geometry temporaries
+PROFILE_SAMPLE_BYTES = 48
+
+_worker_engine = None
+
+def _init_worker(config, towers, output_dir):
+    # Runs once per worker process: maps the DEM and output rasters instead of pickling them
+    global _worker_engine
+    _worker_engine = CoverageEngine(**config)
+    _worker_engine._prepare(towers, output_dir)
+
+def _run_tile(bounds):
+    return _worker_engine._tile(*bounds)
+
+def diffraction_loss(v):
+    """Single knife-edge diffraction loss in dB for Fresnel-Kirchhoff parameter v (ITU-R P.526)."""
+    v = np.asarray(v, dtype=np.float32)
+    loss = 6.9 + 20 * np.log10(np.sqrt((v - 0.1) ** 2 + 1) + v - 0.1)
+    return np.where(v > -0.78, loss, 0.0).astype(np.float32)
+
+class CoverageEngine:
+    """
+    Radio coverage of candidate towers over a digital elevation model.
+
+    The DEM is memory-mapped and processed in square tiles. For every pixel of
+    a tile and every tower in range, the terrain profile between them is
+    sampled every ``sample_spacing`` pixels; the highest obstruction above the
+    line of sight (with earth bulge) gives line of sight and a knife-edge
+    diffraction loss on top of free-space path loss. Towers are visited
+    nearest first and profiles are only traced where free-space loss alone
+    could still beat the current best server. Tiles are independent, so they
+    are spread over a process pool, and each worker only holds the tile it is
+    working on plus the DEM pages its profiles touch.
+    """
+    def __init__(self, dem_path, cell_size=30.0, shape=None, dtype='float32', tile_size=512, frequency_mhz=900.0,
+                 receiver_height=5.0, max_range_m=15000.0, sample_spacing=2.0, max_samples=512,
+                 sensitivity_dbm=-100.0, block_pixels=65536, block_bytes=64 * 2 ** 20):
+        """
+        Open a DEM.
+
+        Args:
+            dem_path (str): ``.npy`` file, or a raw row-major raster (then ``shape`` and ``dtype`` are required)
+            cell_size (float): Pixel size in meters
+            shape (tuple): (rows, cols) of a raw raster
+            dtype (str): Elevation dtype of a raw raster
+            tile_size (int): Tile side in pixels
+            frequency_mhz (float): Carrier frequency
+            receiver_height (float): Receiver antenna height above ground in meters
+            max_range_m (float): Towers are ignored beyond this distance
+            sample_spacing (float): Pixels between terrain samples along a profile
+            max_samples (int): Upper bound on samples per profile
+            sensitivity_dbm (float): Minimum received power counted as covered
+            block_pixels (int): Pixels evaluated at once, bounding per-tower working memory
+            block_bytes (int): Working memory budget for the profiles traced at once
+        """
+        # Constructor arguments, so worker processes can reopen the same DEM
+        self.config = dict(locals())
+        del self.config['self']
+        if dem_path.endswith('.npy'):
+            self.dem = np.load(dem_path, mmap_mode='r')
+        else:
+            if shape is None:
+                raise ValueError("shape is required for raw DEM files")
+            self.dem = np.memmap(dem_path, dtype=dtype, mode='r', shape=tuple(shape))
+        if self.dem.ndim != 2:
+            raise ValueError("DEM must be a 2-D raster")
+        self.cell_size = float(cell_size)
+        self.tile_size = int(tile_size)
+        self.frequency_mhz = float(frequency_mhz)
+        self.wavelength = SPEED_OF_LIGHT / (self.frequency_mhz * 1e6)
+        self.receiver_height = float(receiver_height)
+        self.max_range_m = float(max_range_m)
+        self.sample_spacing = float(sample_spacing)
+        self.max_samples = int(max_samples)
+        self.sensitivity_dbm = float(sensitivity_dbm)
+        self.block_pixels = int(block_pixels)
+        self.block_bytes = int(block_bytes)
+
+    def tiles(self):
+        """(row_start, row_end, col_start, col_end) of every tile."""
+        rows, cols = self.dem.shape
+        return [(r, min(r + self.tile_size, rows), c, min(c + self.tile_size, cols))
+                for r in range(0, rows, self.tile_size) for c in range(0, cols, self.tile_size)]
+
+    def _prepare(self, towers, output_dir):
+        rows, cols = self.dem.shape
+        try:
+            self.tower_row = np.array([float(tower['row']) for tower in towers], dtype=np.float32)
+            self.tower_col = np.array([float(tower['col']) for tower in towers], dtype=np.float32)
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Every tower needs a numeric row and col")
+        if np.any((self.tower_row < 0) | (self.tower_row > rows - 1) | (self.tower_col < 0) | (self.tower_col > cols - 1)):
+            raise ValueError("Towers must lie within the DEM")
+        height = np.array([float(tower.get('height', 30.0)) for tower in towers], dtype=np.float32)
+        ground = self.dem[np.rint(self.tower_row).astype(np.intp), np.rint(self.tower_col).astype(np.intp)]
+        self.tower_altitude = ground.astype(np.float32) + height
+        # EIRP in dBm
+        self.tower_eirp = np.array([float(tower.get('power_dbm', 43.0)) + float(tower.get('gain_dbi', 15.0))
+                                    for tower in towers], dtype=np.float32)
+        self.outputs = None
+        if output_dir:
+            self.outputs = {name: np.lib.format.open_memmap(os.path.join(output_dir, f"{name}.npy"), mode='r+')
+                            for name in OUTPUT_RASTERS}
+
+    def _tile(self, r0, r1, c0, c1):
+        """Best server, received power and line of sight for one tile, plus its summary sums."""
+        shape = (r1 - r0, c1 - c0)
+        rows, cols = np.meshgrid(np.arange(r0, r1, dtype=np.float32), np.arange(c0, c1, dtype=np.float32), indexing='ij')
+        rows, cols = rows.ravel(), cols.ravel()
+        ground = np.asarray(self.dem[r0:r1, c0:c1], dtype=np.float32).ravel()
+        rx_power = np.full(rows.shape[0], NO_SIGNAL_DBM, dtype=np.float32)
+        serving = np.full(rows.shape[0], -1, dtype=np.int32)
+        los = np.zeros(rows.shape[0], dtype=bool)
+        diffraction = np.zeros(rows.shape[0], dtype=np.float32)
+
+        # Towers whose range reaches the tile's bounding box
+        reach = self.max_range_m / self.cell_size
+        near_row = np.clip(self.tower_row, r0, r1 - 1) - self.tower_row
+        near_col = np.clip(self.tower_col, c0, c1 - 1) - self.tower_col
+        gap = np.hypot(near_row, near_col)
+        candidates = np.flatnonzero(gap <= reach)
+        # Nearest towers first: they tend to be the best servers and prune the rest
+        candidates = candidates[np.argsort(gap[candidates], kind='stable')]
+
+        for tower in candidates.tolist():
+            for start in range(0, rows.shape[0], self.block_pixels):
+                block = slice(start, start + self.block_pixels)
+                self._evaluate(tower, rows[block], cols[block], ground[block],
+                               rx_power[block], serving[block], los[block], diffraction[block])
+
+        if self.outputs is not None:
+            self.outputs['rx_power'][r0:r1, c0:c1] = rx_power.reshape(shape)
+            self.outputs['serving_tower'][r0:r1, c0:c1] = serving.reshape(shape)
+            self.outputs['line_of_sight'][r0:r1, c0:c1] = los.reshape(shape)
+
+        in_range = serving >= 0
+        # Pixels out of every tower's range keep NO_SIGNAL_DBM and no serving tower
+        covered = in_range & (rx_power >= self.sensitivity_dbm)
+        tile = ground.reshape(shape)
+        slope = np.degrees(np.arctan(np.hypot(*np.gradient(tile, self.cell_size)))) if min(shape) > 1 else np.zeros(shape)
+        eirp = self.tower_eirp[serving[in_range]]
+        return {
+            'pixels': rows.shape[0],
+            'in_range': int(in_range.sum()),
+            'covered': int(covered.sum()),
+            'line_of_sight': int(los[in_range].sum()),
+            'path_loss_sum': float((eirp - rx_power[in_range]).sum()),
+            'diffraction_loss_sum': float(diffraction[in_range].sum()),
+            'elevation_sum': float(ground.sum(dtype=np.float64)),
+            'slope_sum': float(slope.sum(dtype=np.float64)),
+            'tower_pixels': np.bincount(serving[covered], minlength=self.tower_row.shape[0])
+        }
+
+    def _evaluate(self, tower, rows, cols, ground, rx_power, serving, los, diffraction):
+        # Updates the output blocks in place where this tower is the strongest server
+        d_row, d_col = rows - self.tower_row[tower], cols - self.tower_col[tower]
+        pixels = np.hypot(d_row, d_col)
+        distance = np.maximum(pixels * self.cell_size, self.cell_size / 2)
+        free_space = 20 * np.log10(distance / 1000) + 20 * math.log10(self.frequency_mhz) + 32.44
+        unobstructed = self.tower_eirp[tower] - free_space
+        # Terrain can only add loss, so pixels this tower cannot win are skipped
+        pending = np.flatnonzero((distance <= self.max_range_m) & (unobstructed > rx_power))
+        if pending.shape[0] == 0:
+            return
+
+        # Profiles with the same (rounded up) sample count are traced together as (samples, pixels),
+        # as many pixels at a time as fit the memory budget
+        counts = np.clip(np.ceil(pixels[pending] / self.sample_spacing / 8) * 8, 8, self.max_samples).astype(np.intp)
+        for count in np.unique(counts).tolist():
+            group = pending[counts == count]
+            step = max(self.block_bytes // (count * PROFILE_SAMPLE_BYTES), 1)
+            for start in range(0, group.shape[0], step):
+                self._trace(tower, count, group[start:start + step], d_row, d_col, distance, unobstructed,
+                            ground, rx_power, serving, los, diffraction)
+
+    def _trace(self, tower, count, index, d_row, d_col, distance, unobstructed, ground, rx_power, serving, los,
+               diffraction):
+        # Traces one block of profiles that share a sample count
+        fractions = ((np.arange(count, dtype=np.float32) + 1) / (count + 1))[:, None]
+        sample_rows = np.rint(self.tower_row[tower] + fractions * d_row[index]).astype(np.intp)
+        sample_cols = np.rint(self.tower_col[tower] + fractions * d_col[index]).astype(np.intp)
+        terrain = np.asarray(self.dem[sample_rows, sample_cols], dtype=np.float32)
+        receiver = ground[index] + self.receiver_height
+        d1 = fractions * distance[index]
+        d2 = distance[index] - d1
+        sight_line = self.tower_altitude[tower] + fractions * (receiver - self.tower_altitude[tower])
+        clearance = terrain + d1 * d2 / (2 * EFFECTIVE_EARTH_RADIUS_M) - sight_line
+        v_max = (clearance * np.sqrt(2 * distance[index] / (self.wavelength * d1 * d2))).max(axis=0)
+
+        obstruction = diffraction_loss(v_max)
+        power = unobstructed[index] - obstruction
+        better = power > rx_power[index]
+        target = index[better]
+        rx_power[target] = power[better]
+        serving[target] = tower
+        los[target] = clearance.max(axis=0)[better] <= 0
+        diffraction[target] = obstruction[better]
+
+    def run(self, towers, output_dir=None, max_workers=None):
+        """
+        Compute coverage for all tiles.
+
+        Args:
+            towers (list): Dicts with ``row`` and ``col`` (grid position) and optionally ``height``
+                (m above ground, default 30), ``power_dbm`` (default 43) and ``gain_dbi`` (default 15)
+            output_dir (str): Where to write rx_power, serving_tower and line_of_sight rasters as
+                ``.npy``; None keeps only the summary
+            max_workers (int): Worker processes, defaults to the CPU count; 1 runs in this process
+
+        Returns:
+            dict: Coverage, line of sight and loss statistics, and covered pixels per tower
+        """
+        if not towers:
+            raise ValueError("At least one tower is required")
+        started = time.perf_counter()
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+            for name, dtype in OUTPUT_RASTERS.items():
+                np.lib.format.open_memmap(os.path.join(output_dir, f"{name}.npy"), mode='w+',
+                                          dtype=dtype, shape=self.dem.shape).flush()
+        self._prepare(towers, output_dir)
+
+        tiles = self.tiles()
+        max_workers = min(max_workers or multiprocessing.cpu_count(), len(tiles))
+        if max_workers == 1:
+            results = map(lambda bounds: self._tile(*bounds), tiles)
+            summary = self._summarize(results, tiles)
+        else:
+            # Spawned rather than forked: the server process has live threads
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_init_worker, initargs=(self.config, towers, output_dir)) as executor:
+                summary = self._summarize(executor.map(_run_tile, tiles), tiles)
+        if self.outputs is not None:
+            for raster in self.outputs.values():
+                raster.flush()
+            summary['output'] = {name: os.path.join(output_dir, f"{name}.npy") for name in OUTPUT_RASTERS}
+        summary['seconds'] = time.perf_counter() - started
+        return summary
+
+    def _summarize(self, results, tiles):
+        totals = {}
+        tower_pixels = np.zeros(self.tower_row.shape[0], dtype=np.int64)
+        for result in results:
+            tower_pixels += result.pop('tower_pixels')
+            for key, value in result.items():
+                totals[key] = totals.get(key, 0) + value
+        in_range = max(totals['in_range'], 1)
+        return {
+            'shape': list(self.dem.shape),
+            'tiles': len(tiles),
+            'towers': int(tower_pixels.shape[0]),
+            'covered_fraction': totals['covered'] / totals['pixels'],
+            'in_range_fraction': totals['in_range'] / totals['pixels'],
+            'line_of_sight_fraction': totals['line_of_sight'] / in_range,
+            'mean_path_loss_db': totals['path_loss_sum'] / in_range,
+            'mean_diffraction_loss_db': totals['diffraction_loss_sum'] / in_range,
+            'mean_elevation': totals['elevation_sum'] / totals['pixels'],
+            'mean_slope_degrees': totals['slope_sum'] / totals['pixels'],
+            'tower_covered_pixels': tower_pixels.tolist()
+        }
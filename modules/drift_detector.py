@@ -0,0 +1,83 @@
+import numpy as np
+
+class PSIDriftDetector:
+    """
+    Population Stability Index per feature over a sliding window, maintained
+    incrementally: each new sample increments one bin per feature and the
+    sample leaving the window decrements its bins, so an update is O(features).
+    """
+    def __init__(self, reference, window=1000, bins=10, epsilon=1e-4):
+        """
+        Initialize the detector from reference (training) data.
+
+        Args:
+            reference (np.ndarray): Reference samples, shape (n_samples, n_features)
+            window (int): Number of recent samples compared against the reference
+            bins (int): Quantile bins per feature
+            epsilon (float): Floor for bin proportions so empty bins don't produce infinities
+        """
+        self.window = window
+        self.bins = bins
+        self.epsilon = epsilon
+        self.set_reference(reference)
+
+    def set_reference(self, reference):
+        reference = np.asarray(reference, dtype=np.float64)
+        self.n_features = reference.shape[1]
+        quantiles = np.linspace(0, 1, self.bins + 1)[1:-1]
+        # Inner edges only; values outside the reference range land in the first/last bin
+        self.edges = np.quantile(reference, quantiles, axis=0).T
+        reference_bins = self._bin(reference)
+        counts = np.stack([np.bincount(reference_bins[:, f], minlength=self.bins) for f in range(self.n_features)])
+        self.reference_proportions = np.maximum(counts / reference.shape[0], self.epsilon)
+        self.reset()
+
+    def reset(self):
+        self.counts = np.zeros((self.n_features, self.bins), dtype=np.int64)
+        self._recent_bins = np.zeros((self.window, self.n_features), dtype=np.intp)
+        self._head = 0
+        self.size = 0
+
+    def _bin(self, samples):
+        return np.stack([np.searchsorted(self.edges[f], samples[:, f], side='right')
+                         for f in range(self.n_features)], axis=1)
+
+    def update(self, sample):
+        """Add one sample, evicting the oldest one once the window is full."""
+        sample_bins = self._bin(np.asarray(sample, dtype=np.float64).reshape(1, -1))[0]
+        features = np.arange(self.n_features)
+        if self.size == self.window:
+            self.counts[features, self._recent_bins[self._head]] -= 1
+        else:
+            self.size += 1
+        self.counts[features, sample_bins] += 1
+        self._recent_bins[self._head] = sample_bins
+        self._head = (self._head + 1) % self.window
+
+    def scores(self):
+        """
+        PSI per feature for the current window.
+
+        Returns:
+            np.ndarray: PSI values, shape (n_features,); zeros while the window is empty
+        """
+        if self.size == 0:
+            return np.zeros(self.n_features)
+        current = np.maximum(self.counts / self.size, self.epsilon)
+        reference = self.reference_proportions
+        return ((current - reference) * np.log(current / reference)).sum(axis=1)
+
+    def state(self):
+        """Reference edges and proportions, enough to restore the detector after a restart."""
+        return {'edges': self.edges.tolist(), 'reference_proportions': self.reference_proportions.tolist()}
+
+    @classmethod
+    def from_state(cls, state, window=1000, epsilon=1e-4):
+        detector = cls.__new__(cls)
+        detector.window = window
+        detector.epsilon = epsilon
+        detector.edges = np.asarray(state['edges'], dtype=np.float64)
+        detector.reference_proportions = np.asarray(state['reference_proportions'], dtype=np.float64)
+        detector.n_features, detector.bins = detector.reference_proportions.shape
+        detector.reset()
+        return detector
@@ -1,26 +1,52 @@
+import os
 import numpy as np
+import pandas as pd
 from datetime import datetime, timedelta
 import logging
 import json
+import re
+from dateutil.tz import tzlocal
+from modules.anomaly_detector import StreamingAnomalyDetector
+from modules.energy_forecaster import EnergyForecaster, MAX_HORIZON_DAYS
+from modules.meter_store import MeterStore
+from modules.energy_scenarios import (EfficiencyScenarioEngine, PEAK_MANAGEMENT_RATE,
+                                      AUXILIARY_OPTIMIZATION_RATE, AUXILIARY_SHARE_LIMIT)
+
+POWER_METRICS = ('total_power', 'cooling_power', 'network_power', 'auxiliary_power')
+# UTC designator or numeric offset at the end of an ISO time
+ISO_OFFSET_PATTERN = re.compile(r'\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?(?:[zZ]|[+-]\d{2}:?\d{2})$')
+DEFAULT_HISTORY_DIR = os.environ.get('ENERGY_HISTORY_DIR', os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'artifacts', 'energy_history'))
 
 class EnergyEfficiency:
     """
     Monitors and optimizes energy efficiency for infrastructure systems
     with enhanced analytics and reporting capabilities.
     """
-    def __init__(self, peak_power_threshold=1000, cooling_efficiency=0.75):
+    def __init__(self, peak_power_threshold=1000, cooling_efficiency=0.75, history_dir=DEFAULT_HISTORY_DIR,
+                 energy_cost_per_kwh=0.12):
         """
         Initialize the energy efficiency monitor with configurable thresholds.
         
         Args:
             peak_power_threshold (float): Peak power threshold in watts
             cooling_efficiency (float): Initial cooling system efficiency
+            history_dir (str): Directory of the long-term power history; None keeps no history on disk
+            energy_cost_per_kwh (float): Energy tariff used for savings estimates
         """
         self.peak_power_threshold = peak_power_threshold
         self.energy_history = []
         self.cooling_efficiency = cooling_efficiency
+        self.energy_cost_per_kwh = energy_cost_per_kwh
         self.logger = self._setup_logger()
         self.anomaly_threshold = 2.0  # Standard deviations for anomaly detection
+        # EWMA with the span of the former 24-sample window, plus hour-of-week baselines
+        self.anomaly_detector = StreamingAnomalyDetector(POWER_METRICS, alpha=2 / 25)
+        self.meter_id = 'local'
+        self.forecaster = EnergyForecaster()
+        self.meter_store = MeterStore(history_dir, POWER_METRICS) if history_dir else None
+        self._forecast_cache = None
+        self._scenario_engine = None
     
     def _setup_logger(self):
         """Set up logging for the EnergyEfficiency module."""
@@ -102,6 +128,60 @@ class EnergyEfficiency:
             return dcie
         return None
 
+    @staticmethod
+    def _hours_of_week(timestamps):
+        """
+        Hour of the week (Monday 00:00 = 0) in local time, like the sampled readings. Epoch
+        seconds and ISO strings with an offset are converted; ISO strings without one are
+        already local. Missing timestamps mean now.
+        """
+        series = pd.Series(list(timestamps), dtype=object).fillna(datetime.now().isoformat())
+        numeric = pd.to_numeric(series, errors='coerce')
+        strings = series.where(numeric.isna()).astype(str)
+        try:
+            # Normalised to UTC first: mixed offsets would otherwise leave an object Series
+            parsed = pd.to_datetime(series.where(numeric.isna()), errors='coerce', format='mixed', utc=True)
+        except (TypeError, ValueError):
+            raise ValueError("Timestamps must be ISO strings or epoch seconds")
+        parsed = parsed.fillna(pd.to_datetime(numeric, unit='s', utc=True))
+        if parsed.isna().any():
+            raise ValueError("Timestamps must be ISO strings or epoch seconds")
+        has_offset = (strings.str.contains(ISO_OFFSET_PATTERN) | numeric.notna()).to_numpy()
+        # Local offsets are whole quarter hours, so the slow local zone lookup runs once per distinct quarter
+        codes, quarters = pd.factorize(parsed.dt.floor('15min'))
+        quarters = pd.DatetimeIndex(quarters)
+        local_quarters = quarters.tz_convert(tzlocal()).tz_localize(None)
+        converted = (local_quarters.dayofweek * 24 + local_quarters.hour).to_numpy()[codes]
+        # Strings without an offset were labelled UTC unchanged, so their wall time is kept as is
+        wall = parsed.dt.tz_localize(None)
+        return np.where(has_offset, converted, (wall.dt.dayofweek * 24 + wall.dt.hour).to_numpy())
+
+    @staticmethod
+    def _sample_hour_of_week(power_data):
+        timestamp = datetime.fromisoformat(power_data['timestamp']) if 'timestamp' in power_data else datetime.now()
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone().replace(tzinfo=None)
+        return timestamp.weekday() * 24 + timestamp.hour
+
+    def _anomaly_entries(self, scores, values, meter_ids=None):
+        """Anomaly dicts for every (reading, metric) whose z-score exceeds the threshold."""
+        anomalies = []
+        rows, columns = np.nonzero(np.abs(scores['z_score']) > self.anomaly_threshold)
+        for row, column in zip(rows, columns):
+            z_score = float(scores['z_score'][row, column])
+            anomaly = {
+                'metric': POWER_METRICS[column],
+                'current_value': float(values[row, column]),
+                'historical_mean': float(scores['mean'][row, column]),
+                'z_score': z_score,
+                'severity': 'High' if abs(z_score) > 3 else 'Medium',
+                'baseline': 'hour_of_week' if scores['seasonal'][row] else 'overall'
+            }
+            if meter_ids is not None:
+                anomaly = {'meter_id': meter_ids[row], **anomaly}
+            anomalies.append(anomaly)
+        return anomalies
+
     def detect_anomalies(self, power_data):
         """
         Detect anomalies in power consumption.
@@ -112,29 +192,72 @@ class EnergyEfficiency:
         Returns:
             list: Detected anomalies
         """
-        if len(self.energy_history) < 5:
-            return []  # Need more history for anomaly detection
+        values = np.array([[power_data[metric] for metric in POWER_METRICS]], dtype=np.float64)
+        scores = self.anomaly_detector.score([self.meter_id], values, [self._sample_hour_of_week(power_data)])
+        return self._anomaly_entries(scores, values)
+
+    def record_power_data(self, power_data):
+        """Add a sample to the history and fold it into the anomaly baselines."""
+        self.energy_history.append(power_data)
+        
+        # Keep last 24 hours of data
+        if len(self.energy_history) > 24:
+            self.energy_history.pop(0)
+
+        self.anomaly_detector.update([self.meter_id], [[power_data[metric] for metric in POWER_METRICS]],
+                                     [self._sample_hour_of_week(power_data)])
+        if self.meter_store is not None:
+            timestamp = datetime.fromisoformat(power_data['timestamp']) if 'timestamp' in power_data else datetime.now()
+            try:
+                self.meter_store.append(timestamp.timestamp(), {metric: power_data[metric] for metric in POWER_METRICS})
+            except ValueError as e:
+                self.logger.warning(f"Skipped power sample for the history store: {str(e)}")
+
+    def get_power_history(self, start=None, end=None, points=1000, method='minmax', metrics=None):
+        """
+        Long-term power history downsampled for charting.
+        
+        Args:
+            start (float): Range start, epoch seconds (default: oldest sample)
+            end (float): Range end, epoch seconds (default: newest sample)
+            points (int): Maximum points per metric
+            method (str): 'minmax' or 'lttb'
+            metrics (sequence): Metrics to include, defaults to all
             
-        anomalies = []
+        Returns:
+            dict: Per metric, timestamps (epoch seconds) and values
+        """
+        if self.meter_store is None:
+            return {'stored_samples': 0, 'series': {}}
+        series = self.meter_store.downsample(start, end, points=points, method=method, columns=metrics)
+        return {
+            'stored_samples': len(self.meter_store),
+            'method': method,
+            'series': {metric: {'timestamps': data['timestamps'].tolist(),
+                                'values': [None if np.isnan(v) else v for v in data['values'].tolist()]}
+                       for metric, data in series.items()}
+        }
+
+    def detect_meter_anomalies(self, readings):
+        """
+        Score and record one reading for each of many meters in a single vectorized step.
         
-        # Calculate mean and std for each metric
-        for metric in ['total_power', 'cooling_power', 'network_power', 'auxiliary_power']:
-            historical_values = [entry[metric] for entry in self.energy_history[-24:]]
-            mean = np.mean(historical_values)
-            std = np.std(historical_values)
+        Args:
+            readings (list): Dicts with ``meter_id``, every power metric and optionally a
+                ``timestamp`` (ISO string or epoch seconds)
             
-            # Check if current value is an anomaly
-            z_score = (power_data[metric] - mean) / std if std > 0 else 0
-            if abs(z_score) > self.anomaly_threshold:
-                anomalies.append({
-                    'metric': metric,
-                    'current_value': power_data[metric],
-                    'historical_mean': mean,
-                    'z_score': z_score,
-                    'severity': 'High' if abs(z_score) > 3 else 'Medium'
-                })
-                
-        return anomalies
+        Returns:
+            dict: Number of meters scored and the detected anomalies, tagged with their meter
+        """
+        try:
+            meter_ids = [reading['meter_id'] for reading in readings]
+            values = np.array([[reading[metric] for metric in POWER_METRICS] for reading in readings],
+                              dtype=np.float64).reshape(len(readings), len(POWER_METRICS))
+        except (KeyError, TypeError):
+            raise ValueError(f"Every reading needs meter_id and {', '.join(POWER_METRICS)}")
+        hours = self._hours_of_week([reading.get('timestamp') for reading in readings])
+        scores = self.anomaly_detector.update(meter_ids, values, hours)
+        return {'meters': len(meter_ids), 'anomalies': self._anomaly_entries(scores, values, meter_ids)}
 
     def get_efficiency_recommendations(self, power_data, pue):
         """
@@ -212,56 +335,134 @@ class EnergyEfficiency:
 
         return recommendations
 
-    def predict_energy_trends(self, days=7):
+    def _hourly_forecast(self):
+        """
+        Hourly forecast for the maximum horizon, from midnight of the latest sample's day.
+        Refit at most once per hour: every metrics call records a sample, so keying on the
+        samples themselves would refit on every call.
+        """
+        latest = self.energy_history[-1]['timestamp'] if self.energy_history else datetime.now().date().isoformat()
+        key = np.datetime64(latest, 'h')
+        cache = self._forecast_cache
+        if cache is not None and cache['key'] == key:
+            return cache['forecast']
+
+        self.forecaster.fit([entry['timestamp'] for entry in self.energy_history],
+                            [entry['total_power'] for entry in self.energy_history])
+        start = np.datetime64(latest, 'D')
+        forecast = self.forecaster.forecast(start, MAX_HORIZON_DAYS * 24)
+        self._forecast_cache = {'key': key, 'forecast': forecast}
+        return forecast
+
+    def predict_energy_trends(self, days=7, include_hourly=False):
         """
         Predict energy consumption trends for specified number of days.
         
         Args:
-            days (int): Number of days to predict
+            days (int): Number of days to predict, at most MAX_HORIZON_DAYS
+            include_hourly (bool): Whether to include the hourly predictions
             
         Returns:
             dict: Energy consumption predictions with confidence intervals
         """
-        predictions = []
-        base_consumption = 800  # Base power consumption in watts
-        
-        # Use more sophisticated prediction with weekly patterns
-        for day in range(days):
-            date = datetime.now() + timedelta(days=day)
-            day_of_week = date.weekday()  # 0-6 (Monday-Sunday)
-            
-            # Weekend factor (lower consumption on weekends)
-            weekend_factor = 0.8 if day_of_week >= 5 else 1.0
-            
-            # Hour of day factor (for first prediction of the day)
-            hour_factor = 0.7 + 0.6 * np.sin(np.pi * date.hour / 12)
-            
-            # Add some randomness and seasonal trends
-            random_factor = np.random.normal(0, 0.05)
-            seasonal_factor = 1.0 + 0.1 * np.sin(2 * np.pi * date.timetuple().tm_yday / 365)
-            
-            # Calculate predicted consumption
-            predicted_mean = base_consumption * weekend_factor * hour_factor * seasonal_factor * (1 + random_factor)
-            
-            # Add confidence interval
-            confidence = 0.1 * predicted_mean  # 10% confidence interval
-            
-            prediction = {
-                'date': date.strftime('%Y-%m-%d'),
-                'predicted_consumption': predicted_mean,
+        if not 1 <= days <= MAX_HORIZON_DAYS:
+            raise ValueError(f"days must be between 1 and {MAX_HORIZON_DAYS}")
+        forecast = self._hourly_forecast()
+        hours = days * 24
+        daily = {name: forecast[name][:hours].reshape(days, 24).mean(axis=1) for name in ('mean', 'lower', 'upper')}
+        dates = forecast['times'][:hours:24].astype('datetime64[D]')
+        weekdays = (dates.astype(np.int64) + 3) % 7  # 1970-01-01 was a Thursday
+
+        predictions = [
+            {
+                'date': str(date),
+                'predicted_consumption': float(daily['mean'][i]),
                 'confidence_interval': {
-                    'lower': predicted_mean - confidence,
-                    'upper': predicted_mean + confidence
+                    'lower': float(daily['lower'][i]),
+                    'upper': float(daily['upper'][i])
                 },
-                'day_type': 'Weekend' if day_of_week >= 5 else 'Weekday'
+                'day_type': 'Weekend' if weekdays[i] >= 5 else 'Weekday'
             }
-            predictions.append(prediction)
-        
-        return {
+            for i, date in enumerate(dates)
+        ]
+        result = {
             'daily_predictions': predictions,
-            'weekly_average': np.mean([p['predicted_consumption'] for p in predictions]),
+            'weekly_average': float(daily['mean'][:7].mean()),
             'trend': 'Increasing' if predictions[-1]['predicted_consumption'] > predictions[0]['predicted_consumption'] else 'Decreasing'
         }
+        if include_hourly:
+            result['hourly_predictions'] = {
+                'times': [str(t) for t in forecast['times'][:hours]],
+                'predicted_consumption': forecast['mean'][:hours].tolist(),
+                'lower': forecast['lower'][:hours].tolist(),
+                'upper': forecast['upper'][:hours].tolist()
+            }
+        return result
+
+    def _scenario_history(self, start=None, end=None):
+        """
+        Scenario engine over the stored history (or the in-memory samples), rebuilt at most
+        once per hour of new data: every metrics call records a sample, so keying on the
+        sample count would rebuild it on every request while a dashboard is open.
+        """
+        if self.meter_store is not None and len(self.meter_store):
+            timestamps, _ = self.meter_store.range()
+            key = ('store', int(timestamps[-1] // 3600), start, end)
+        else:
+            key = ('memory', np.datetime64(self.energy_history[-1]['timestamp'], 'h') if self.energy_history else None)
+        engine = self._scenario_engine
+        if engine is not None and engine[0] == key and engine[1].cooling_efficiency == self.cooling_efficiency:
+            return engine[1]
+
+        if key[0] == 'store':
+            _, values = self.meter_store.range(start, end)
+            columns = [values[metric] for metric in ('total_power', 'cooling_power', 'auxiliary_power')]
+        else:
+            columns = [[entry[metric] for entry in self.energy_history]
+                       for metric in ('total_power', 'cooling_power', 'auxiliary_power')]
+        engine = EfficiencyScenarioEngine(*columns, cooling_efficiency=self.cooling_efficiency)
+        self._scenario_engine = (key, engine)
+        return engine
+
+    def simulate_scenarios(self, peak_thresholds=None, cooling_efficiencies=None, tariffs=None,
+                           start=None, end=None, max_front=100):
+        """
+        What-if savings for every combination of peak threshold, cooling efficiency and tariff
+        over the recorded power history.
+        
+        Args:
+            peak_thresholds (sequence): Thresholds in watts (default: 50-150% of the configured one)
+            cooling_efficiencies (sequence): Target cooling efficiencies (default: current to 0.95)
+            tariffs (sequence): Prices per kWh (default: the configured tariff)
+            start (float): History range start, epoch seconds
+            end (float): History range end, epoch seconds
+            max_front (int): Maximum Pareto-optimal options returned
+            
+        Returns:
+            dict: Savings surfaces indexed [threshold][efficiency][tariff] and the Pareto front
+        """
+        if peak_thresholds is None:
+            peak_thresholds = np.linspace(0.5, 1.5, 21) * self.peak_power_threshold
+        if cooling_efficiencies is None:
+            cooling_efficiencies = np.linspace(self.cooling_efficiency, max(self.cooling_efficiency, 0.95), 11)
+        if tariffs is None:
+            tariffs = [self.energy_cost_per_kwh]
+        engine = self._scenario_history(start, end)
+        result = engine.sweep(peak_thresholds, cooling_efficiencies, tariffs)
+        front = engine.pareto_front(result)
+
+        return {
+            'samples': engine.samples,
+            'peak_power_threshold': result['peak_thresholds'].tolist(),
+            'cooling_efficiency': result['cooling_efficiencies'].tolist(),
+            'tariff': result['tariffs'].tolist(),
+            'baseline_annual_cost': result['baseline_annual_cost'].tolist(),
+            'time_above_threshold': result['time_above_threshold'].tolist(),
+            'savings_surfaces': {name: surface.tolist() for name, surface in result['savings'].items()},
+            'savings_percentage': result['savings_percentage'].tolist(),
+            'pareto_front': front[:max_front],
+            'pareto_front_size': len(front)
+        }
 
     def get_metrics(self):
         """
@@ -271,15 +472,11 @@ class EnergyEfficiency:
             dict: Energy efficiency metrics and recommendations
         """
         power_data = self.collect_power_data()
-        self.energy_history.append(power_data)
-        
-        # Keep last 24 hours of data
-        if len(self.energy_history) > 24:
-            self.energy_history.pop(0)
+        anomalies = self.detect_anomalies(power_data)
+        self.record_power_data(power_data)
 
         pue = self.calculate_pue(power_data)
         dcie = self.calculate_dcie(power_data)
-        anomalies = self.detect_anomalies(power_data)
         
         # Calculate trends if we have enough history
         pue_trend = None
@@ -319,8 +516,7 @@ class EnergyEfficiency:
         # Calculate baseline annual energy cost
         daily_energy_kwh = power_data['total_power'] * 24 / 1000  # Convert watts to kWh
         annual_energy_kwh = daily_energy_kwh * 365
-        energy_cost_per_kwh = 0.12  # Assumed cost per kWh
-        baseline_annual_cost = annual_energy_kwh * energy_cost_per_kwh
+        baseline_annual_cost = annual_energy_kwh * self.energy_cost_per_kwh
         
         # Estimate savings
         cooling_savings = 0
@@ -331,10 +527,10 @@ class EnergyEfficiency:
             cooling_savings = baseline_annual_cost * 0.15  # 15% savings from cooling optimization
             
         if power_data['total_power'] > self.peak_power_threshold:
-            peak_power_savings = baseline_annual_cost * 0.08  # 8% from peak power management
+            peak_power_savings = baseline_annual_cost * PEAK_MANAGEMENT_RATE  # 8% from peak power management
             
-        if power_data['auxiliary_power'] / power_data['total_power'] > 0.3:
-            auxiliary_savings = baseline_annual_cost * 0.10  # 10% from auxiliary optimization
+        if power_data['auxiliary_power'] / power_data['total_power'] > AUXILIARY_SHARE_LIMIT:
+            auxiliary_savings = baseline_annual_cost * AUXILIARY_OPTIMIZATION_RATE  # 10% from auxiliary optimization
             
         # Total potential savings
         total_savings = cooling_savings + peak_power_savings + auxiliary_savings
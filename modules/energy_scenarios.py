@@ -0,0 +1,162 @@
+import numpy as np
+
+HOURS_PER_YEAR = 24 * 365
+
+# Savings rates of the efficiency measures, shared with EnergyEfficiency._calculate_potential_savings
+PEAK_MANAGEMENT_RATE = 0.08  # of the cost incurred while above the peak threshold
+AUXILIARY_OPTIMIZATION_RATE = 0.10  # of the cost incurred while auxiliary load exceeds 30%
+AUXILIARY_SHARE_LIMIT = 0.3
+
+def pareto_mask(gain, cost_a, cost_b):
+    """
+    Options not dominated on (gain up, cost_a down, cost_b down). Of several options
+    with identical objectives only the first is kept.
+
+    Options are visited in decreasing gain, so anything that could dominate an option
+    has been seen before it; a Fenwick tree over the cost_a ranks answers "lowest
+    cost_b seen so far with cost_a at most this" in O(log n).
+
+    Returns:
+        np.ndarray: Boolean mask of shape (n,)
+    """
+    gain, cost_a, cost_b = (np.asarray(a, dtype=np.float64) for a in (gain, cost_a, cost_b))
+    order = np.lexsort((cost_b, cost_a, -gain))
+    ranks = (np.unique(cost_a, return_inverse=True)[1] + 1).tolist()
+    costs = cost_b.tolist()
+    size = max(ranks, default=0)
+    tree = [np.inf] * (size + 1)
+    efficient = np.zeros(gain.shape[0], dtype=bool)
+    for p in order.tolist():
+        i, best = ranks[p], np.inf
+        while i > 0:
+            best = min(best, tree[i])
+            i -= i & -i
+        if best <= costs[p]:
+            continue
+        efficient[p] = True
+        i = ranks[p]
+        while i <= size:
+            tree[i] = min(tree[i], costs[p])
+            i += i & -i
+    return efficient
+
+class EfficiencyScenarioEngine:
+    """
+    What-if savings for grids of peak power thresholds, cooling efficiencies
+    and tariffs over a power history.
+
+    The history is summarized once (sorted total power with suffix sums, mean
+    cooling power, auxiliary-heavy load); every grid cell then costs O(1) or a
+    binary search, so sweeps of thousands of configurations stay interactive.
+    Savings are annualized from the sample-weighted mean power.
+    """
+    def __init__(self, total_power, cooling_power, auxiliary_power, cooling_efficiency):
+        """
+        Summarize a power history.
+
+        Args:
+            total_power (array-like): Total facility power samples in watts
+            cooling_power (array-like): Cooling power samples in watts
+            auxiliary_power (array-like): Auxiliary power samples in watts
+            cooling_efficiency (float): Current cooling system efficiency
+        """
+        total = np.asarray(total_power, dtype=np.float64)
+        cooling = np.asarray(cooling_power, dtype=np.float64)
+        auxiliary = np.asarray(auxiliary_power, dtype=np.float64)
+        valid = ~(np.isnan(total) | np.isnan(cooling) | np.isnan(auxiliary)) & (total > 0)
+        total, cooling, auxiliary = total[valid], cooling[valid], auxiliary[valid]
+        if total.shape[0] == 0:
+            raise ValueError("No power history to evaluate scenarios on")
+
+        self.samples = total.shape[0]
+        self.cooling_efficiency = cooling_efficiency
+        self.sorted_total = np.sort(total)
+        # above_sum[i] = sum of the samples from sorted position i upwards
+        self.above_sum = np.concatenate((np.cumsum(self.sorted_total[::-1])[::-1], [0.0]))
+        self.mean_total = float(total.mean())
+        self.mean_cooling = float(cooling.mean())
+        self.auxiliary_heavy_mean = float(total[auxiliary / total > AUXILIARY_SHARE_LIMIT].sum() / self.samples)
+
+    def sweep(self, peak_thresholds, cooling_efficiencies, tariffs):
+        """
+        Evaluate every combination of the parameter grids.
+
+        Args:
+            peak_thresholds (array-like): Peak power thresholds in watts
+            cooling_efficiencies (array-like): Target cooling efficiencies
+            tariffs (array-like): Energy prices per kWh
+
+        Returns:
+            dict: Axes and annual savings surfaces of shape (thresholds, efficiencies, tariffs),
+                plus the share of time above each threshold (peak management effort)
+        """
+        thresholds = np.asarray(peak_thresholds, dtype=np.float64)
+        efficiencies = np.asarray(cooling_efficiencies, dtype=np.float64)
+        tariffs = np.asarray(tariffs, dtype=np.float64)
+        if min(thresholds.size, efficiencies.size, tariffs.size) == 0:
+            raise ValueError("Every parameter grid needs at least one value")
+        if np.any(efficiencies <= 0) or np.any(tariffs < 0):
+            raise ValueError("Cooling efficiencies must be positive and tariffs non-negative")
+
+        # Mean watts -> annual cost per unit tariff
+        annual_kwh_per_watt = HOURS_PER_YEAR / 1000
+        first_above = np.searchsorted(self.sorted_total, thresholds, side='right')
+        time_above = 1.0 - first_above / self.samples
+        peak_watts = PEAK_MANAGEMENT_RATE * self.above_sum[first_above] / self.samples
+        # A more efficient cooling system draws proportionally less power for the same heat load
+        cooling_watts = self.mean_cooling * np.maximum(1.0 - self.cooling_efficiency / efficiencies, 0.0)
+        auxiliary_watts = AUXILIARY_OPTIMIZATION_RATE * self.auxiliary_heavy_mean
+
+        peak = peak_watts[:, None, None] * annual_kwh_per_watt * tariffs[None, None, :]
+        cooling = cooling_watts[None, :, None] * annual_kwh_per_watt * tariffs[None, None, :]
+        auxiliary = auxiliary_watts * annual_kwh_per_watt * tariffs
+        shape = (thresholds.shape[0], efficiencies.shape[0], tariffs.shape[0])
+        peak, cooling = np.broadcast_to(peak, shape), np.broadcast_to(cooling, shape)
+        total = peak + cooling + auxiliary[None, None, :]
+        baseline = self.mean_total * annual_kwh_per_watt * tariffs
+
+        return {
+            'peak_thresholds': thresholds,
+            'cooling_efficiencies': efficiencies,
+            'tariffs': tariffs,
+            'baseline_annual_cost': baseline,
+            'time_above_threshold': time_above,
+            'savings': {
+                'peak_power_management': peak,
+                'cooling_optimization': cooling,
+                'auxiliary_system_optimization': np.broadcast_to(auxiliary[None, None, :], shape),
+                'total': total
+            },
+            'savings_percentage': np.divide(total * 100, baseline[None, None, :],
+                                            out=np.zeros(shape), where=baseline[None, None, :] > 0)
+        }
+
+    def pareto_front(self, result):
+        """
+        Threshold/efficiency options not dominated on (savings, cooling upgrade, time under
+        peak management). Savings scale linearly with the tariff, so the front is the same
+        for every tariff; it is computed on the first one.
+
+        Returns:
+            list: Options ordered by savings at the first tariff, each with savings per tariff
+        """
+        thresholds, efficiencies = result['peak_thresholds'], result['cooling_efficiencies']
+        t_index, e_index = np.meshgrid(np.arange(thresholds.shape[0]), np.arange(efficiencies.shape[0]), indexing='ij')
+        t_index, e_index = t_index.ravel(), e_index.ravel()
+        savings = result['savings']['total'][t_index, e_index, 0]
+        upgrade = np.maximum(efficiencies[e_index] - self.cooling_efficiency, 0.0)
+        managed = result['time_above_threshold'][t_index]
+
+        efficient = np.flatnonzero(pareto_mask(savings, upgrade, managed))
+        efficient = efficient[np.argsort(-savings[efficient], kind='stable')]
+
+        return [
+            {
+                'peak_power_threshold': float(thresholds[t_index[i]]),
+                'cooling_efficiency': float(efficiencies[e_index[i]]),
+                'time_above_threshold': float(managed[i]),
+                'cooling_efficiency_increase': float(upgrade[i]),
+                'annual_savings': result['savings']['total'][t_index[i], e_index[i]].tolist()
+            }
+            for i in efficient
+        ]
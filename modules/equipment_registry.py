@@ -0,0 +1,116 @@
+import threading
+import time
+import numpy as np
+
+SENSOR_FIELDS = ('temperature', 'vibration', 'power_consumption')
+
+class EquipmentRegistry:
+    """
+    Columnar registry of monitored equipment: IDs, last maintenance time and
+    the latest sensor vector per device, laid out for vectorized scoring.
+    """
+    def __init__(self, initial_capacity=1024):
+        self.equipment_ids = []
+        self._index = {}
+        self.last_maintenance = np.full(initial_capacity, np.nan)  # epoch seconds
+        self.last_updated = np.full(initial_capacity, np.nan)
+        self.sensors = np.full((initial_capacity, len(SENSOR_FIELDS)), np.nan)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.equipment_ids)
+
+    def _grow(self, needed):
+        capacity = self.last_maintenance.shape[0]
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for name in ('last_maintenance', 'last_updated'):
+            grown = np.full(capacity, np.nan)
+            grown[:len(self)] = getattr(self, name)[:len(self)]
+            setattr(self, name, grown)
+        sensors = np.full((capacity, len(SENSOR_FIELDS)), np.nan)
+        sensors[:len(self)] = self.sensors[:len(self)]
+        self.sensors = sensors
+
+    def _indices(self, equipment_ids):
+        new_ids = [i for i in dict.fromkeys(equipment_ids) if i not in self._index]
+        if new_ids:
+            self._grow(len(self) + len(new_ids))
+            now = time.time()
+            for equipment_id in new_ids:
+                index = len(self.equipment_ids)
+                self.equipment_ids.append(equipment_id)
+                self._index[equipment_id] = index
+                self.last_maintenance[index] = now
+        return np.fromiter((self._index[i] for i in equipment_ids), dtype=np.int64, count=len(equipment_ids))
+
+    def upsert(self, records):
+        """
+        Register devices or update their readings.
+
+        Args:
+            records (list): Dicts with ``equipment_id`` and any of the sensor fields and
+                ``last_maintenance`` (epoch seconds)
+
+        Returns:
+            int: Number of records applied
+        """
+        if not records:
+            return 0
+        try:
+            equipment_ids = [record['equipment_id'] for record in records]
+        except (KeyError, TypeError):
+            raise ValueError("Every record must be an object with an equipment_id")
+        # Ids are dictionary keys and come back in the rankings, so only JSON scalars are accepted
+        if not all(isinstance(i, (str, int)) and not isinstance(i, bool) for i in equipment_ids):
+            raise ValueError("equipment_id must be a string or an integer")
+        try:
+            readings = np.array([[record.get(field, np.nan) for field in SENSOR_FIELDS] for record in records],
+                                dtype=np.float64)
+            maintenance = np.array([record.get('last_maintenance', np.nan) for record in records], dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("Sensor readings and last_maintenance must be numeric")
+
+        with self._lock:
+            indices = self._indices(equipment_ids)
+            # Missing fields keep the previous value instead of overwriting it with NaN
+            has_reading = ~np.isnan(readings)
+            current = self.sensors[indices]
+            self.sensors[indices] = np.where(has_reading, readings, current)
+            has_maintenance = ~np.isnan(maintenance)
+            self.last_maintenance[indices[has_maintenance]] = maintenance[has_maintenance]
+            self.last_updated[indices[has_reading.any(axis=1)]] = time.time()
+        return len(records)
+
+    def record_maintenance(self, equipment_id, when=None):
+        with self._lock:
+            index = self._indices([equipment_id])[0]
+            self.last_maintenance[index] = time.time() if when is None else when
+
+    def feature_matrix(self, now=None):
+        """
+        Build the model input for every device with a complete sensor vector.
+
+        Returns:
+            tuple: (device positions, feature matrix with uptime hours appended)
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            count = len(self)
+            sensors = self.sensors[:count].copy()
+            uptime_hours = (now - self.last_maintenance[:count]) / 3600
+        complete = np.flatnonzero(~np.isnan(sensors).any(axis=1))
+        return complete, np.column_stack((sensors[complete], uptime_hours[complete]))
+
+    def describe(self, positions):
+        """Return id, readings and last maintenance for the given device positions."""
+        with self._lock:
+            return [
+                {
+                    'equipment_id': self.equipment_ids[i],
+                    **{field: float(self.sensors[i, j]) for j, field in enumerate(SENSOR_FIELDS)},
+                    'last_maintenance': float(self.last_maintenance[i])
+                }
+                for i in positions
+            ]
@@ -0,0 +1,169 @@
+import threading
+import numpy as np
+
+DEFAULT_WINDOWS = {'5m': 300, '1h': 3600, '24h': 86400}
+
+class RollingFeatureStore:
+    """
+    Per-device rolling mean, variance, slope and EWMA of sensor readings over
+    several time windows.
+
+    Each window is split into a fixed number of time buckets holding running
+    sums (count, Σx, Σx², Σt, Σt², Σtx, with t relative to the bucket start).
+    A sample updates one bucket per window in O(1); a bucket is zeroed when
+    its slot is reused for a newer period, so expiry needs no stored samples
+    and memory per device is constant. Queries combine the buckets of a window.
+    """
+    def __init__(self, features, windows=None, buckets=60, initial_capacity=256):
+        """
+        Initialize the store.
+
+        Args:
+            features (sequence): Names of the values tracked per device
+            windows (dict): Window name -> length in seconds
+            buckets (int): Buckets per window; window edges are accurate to one bucket
+            initial_capacity (int): Devices preallocated before the arrays grow
+        """
+        self.features = tuple(features)
+        self.windows = dict(windows or DEFAULT_WINDOWS)
+        self.buckets = buckets
+        self.bucket_width = np.array([seconds / buckets for seconds in self.windows.values()])
+        self.device_ids = []
+        self._index = {}
+        self._lock = threading.Lock()
+        self._allocate(initial_capacity)
+
+    def _allocate(self, capacity):
+        n_windows, n_features = len(self.windows), len(self.features)
+        arrays = {
+            'bucket_id': np.full((capacity, n_windows, self.buckets), -1, dtype=np.int64),
+            # count, Σdt, Σdt² per bucket
+            'time_sums': np.zeros((capacity, n_windows, self.buckets, 3)),
+            # Σx, Σx², Σdt·x per bucket and feature
+            'value_sums': np.zeros((capacity, n_windows, self.buckets, 3, n_features)),
+            'ewma': np.full((capacity, n_windows, n_features), np.nan),
+            'last_timestamp': np.full(capacity, np.nan)
+        }
+        count = len(self.device_ids)
+        for name, array in arrays.items():
+            if count:
+                array[:count] = getattr(self, name)[:count]
+            setattr(self, name, array)
+
+    def _indices(self, device_ids):
+        for device_id in device_ids:
+            if device_id not in self._index:
+                if len(self.device_ids) == self.last_timestamp.shape[0]:
+                    self._allocate(2 * len(self.device_ids))
+                self._index[device_id] = len(self.device_ids)
+                self.device_ids.append(device_id)
+        return np.fromiter((self._index[d] for d in device_ids), dtype=np.intp, count=len(device_ids))
+
+    def update(self, device_ids, timestamps, values):
+        """
+        Add one reading for each of several devices in a single vectorized step.
+
+        Args:
+            device_ids (sequence): Distinct device identifiers
+            timestamps (array-like): Epoch seconds, shape (n,)
+            values (array-like): Readings, shape (n, len(features))
+        """
+        if len(set(device_ids)) != len(device_ids):
+            raise ValueError("update() takes at most one reading per device; call it once per tick")
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64).reshape(len(device_ids), len(self.features))
+
+        with self._lock:
+            devices = self._indices(device_ids)
+            windows = np.arange(len(self.windows))
+
+            period = np.floor(timestamps[:, None] / self.bucket_width).astype(np.int64)  # (n, W)
+            slot = period % self.buckets
+            d_idx, w_idx = devices[:, None], windows[None, :]
+            stale = self.bucket_id[d_idx, w_idx, slot] != period
+            if stale.any():
+                rows, cols = np.nonzero(stale)
+                target = (devices[rows], cols, slot[rows, cols])
+                self.time_sums[target] = 0.0
+                self.value_sums[target] = 0.0
+                self.bucket_id[target] = period[rows, cols]
+
+            dt = timestamps[:, None] - period * self.bucket_width  # offset within bucket, (n, W)
+            self.time_sums[d_idx, w_idx, slot] += np.stack((np.ones_like(dt), dt, dt * dt), axis=-1)
+            x = np.broadcast_to(values[:, None, :], dt.shape + values.shape[-1:])
+            self.value_sums[d_idx, w_idx, slot] += np.stack((x, x * x, dt[..., None] * x), axis=-2)
+
+            # Time-aware EWMA with one time constant per window
+            elapsed = timestamps - self.last_timestamp[devices]
+            alpha = 1.0 - np.exp(-np.maximum(elapsed, 0)[:, None] / np.array(list(self.windows.values())))
+            previous = self.ewma[devices]
+            first = np.isnan(previous)
+            self.ewma[devices] = np.where(first, x, previous + alpha[..., None] * (x - previous))
+            self.last_timestamp[devices] = timestamps
+
+    def update_one(self, device_id, timestamp, values):
+        self.update([device_id], [timestamp], [values])
+
+    def feature_arrays(self, now=None, device_ids=None):
+        """
+        Rolling statistics for many devices at once.
+
+        Args:
+            now (float): Reference epoch seconds, defaults to each device's latest sample
+            device_ids (sequence): Devices to include, defaults to all
+
+        Returns:
+            dict: 'device_ids' plus 'mean', 'variance', 'slope_per_hour' and 'ewma',
+                each of shape (n_devices, n_windows, n_features)
+        """
+        with self._lock:
+            if device_ids is None:
+                devices = np.arange(len(self.device_ids))
+                device_ids = list(self.device_ids)
+            else:
+                devices = np.fromiter((self._index[d] for d in device_ids), dtype=np.intp, count=len(device_ids))
+            bucket_id = self.bucket_id[devices]
+            time_sums = self.time_sums[devices]
+            value_sums = self.value_sums[devices]
+            ewma = self.ewma[devices].copy()
+            reference = self.last_timestamp[devices] if now is None else np.full(devices.shape[0], float(now))
+
+        width = self.bucket_width[None, :, None]
+        current_period = np.floor(reference[:, None, None] / width).astype(np.int64)
+        valid = (bucket_id >= 0) & (bucket_id > current_period - self.buckets) & (bucket_id <= current_period)
+
+        # Re-express per-bucket sums relative to the reference time before combining them
+        shift = np.where(valid, bucket_id * width - reference[:, None, None], 0.0)
+        n, s_t, s_tt = (np.where(valid, time_sums[..., i], 0.0) for i in range(3))
+        s_x, s_xx, s_tx = (np.where(valid[..., None], value_sums[..., i, :], 0.0) for i in range(3))
+        S_n = n.sum(axis=2)[..., None]
+        S_t = (s_t + n * shift).sum(axis=2)[..., None]
+        S_tt = (s_tt + 2 * shift * s_t + n * shift * shift).sum(axis=2)[..., None]
+        S_x = s_x.sum(axis=2)
+        S_xx = s_xx.sum(axis=2)
+        S_tx = (s_tx + shift[..., None] * s_x).sum(axis=2)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = S_x / S_n
+            variance = np.maximum(S_xx / S_n - mean * mean, 0.0)
+            denominator = S_n * S_tt - S_t * S_t
+            slope = np.where(denominator > 0, (S_n * S_tx - S_t * S_x) / denominator, np.nan) * 3600
+
+        return {'device_ids': device_ids, 'mean': mean, 'variance': variance, 'slope_per_hour': slope, 'ewma': ewma}
+
+    def get_features(self, device_id, now=None):
+        """
+        Rolling statistics of one device as nested dicts (window -> feature -> statistic).
+        """
+        if device_id not in self._index:
+            return None
+        arrays = self.feature_arrays(now=now, device_ids=[device_id])
+        result = {}
+        for w, window in enumerate(self.windows):
+            result[window] = {}
+            for f, feature in enumerate(self.features):
+                result[window][feature] = {
+                    stat: (None if np.isnan(arrays[stat][0, w, f]) else float(arrays[stat][0, w, f]))
+                    for stat in ('mean', 'variance', 'slope_per_hour', 'ewma')
+                }
+        return result
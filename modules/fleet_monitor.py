@@ -0,0 +1,201 @@
+import threading
+import time
+import numpy as np
+import pandas as pd
+from modules.ring_buffer import ColumnarRingBuffer
+
+# Batch field name (as sent by NetworkMonitor.ts) -> stored column
+FLEET_FIELDS = {
+    'bandwidth': 'bandwidth',
+    'latency': 'latency',
+    'powerConsumption': 'power_consumption',
+    'packetLoss': 'packet_loss_rate'
+}
+FLEET_COLUMNS = tuple(FLEET_FIELDS.values())
+
+def _json_values(values):
+    # NaN marks a metric the node never reported; JSON has no NaN, so send null
+    return [None if np.isnan(v) else v for v in values.tolist()]
+
+class FleetMonitor:
+    """
+    Ingests metric batches from many remote nodes into per-node columnar
+    buffers and evaluates alert rules for the whole fleet in one vectorized pass.
+    """
+    def __init__(self, retention_samples=3600, threshold=0.8, latency_threshold=50, stale_after=300):
+        """
+        Initialize the fleet monitor.
+
+        Args:
+            retention_samples (int): Samples retained per node
+            threshold (float): Packet loss rate above which a node raises an alert
+            latency_threshold (float): Latency in ms above which a node raises an alert
+            stale_after (float): Seconds without data after which a node is reported stale
+        """
+        self.retention_samples = retention_samples
+        self.threshold = threshold
+        self.latency_threshold = latency_threshold
+        self.stale_after = stale_after
+        self.buffers = {}
+        self.node_ids = []
+        self._node_index = {}
+        # Latest sample per node, indexed by node position, grown geometrically
+        self._latest = np.full((len(FLEET_COLUMNS), 64), np.nan)
+        self._last_seen = np.full(64, -np.inf)
+        self._lock = threading.Lock()
+
+    def _register_node(self, node_id):
+        index = len(self.node_ids)
+        self.node_ids.append(node_id)
+        self._node_index[node_id] = index
+        self.buffers[node_id] = ColumnarRingBuffer(FLEET_COLUMNS, capacity=self.retention_samples, dtype=np.float64)
+        if index >= self._last_seen.shape[0]:
+            size = self._last_seen.shape[0] * 2
+            latest = np.full((len(FLEET_COLUMNS), size), np.nan)
+            latest[:, :index] = self._latest
+            last_seen = np.full(size, -np.inf)
+            last_seen[:index] = self._last_seen
+            self._latest, self._last_seen = latest, last_seen
+        return index
+
+    @staticmethod
+    def _parse_timestamps(raw):
+        timestamps = np.full(len(raw), time.time())
+        numeric = np.array([isinstance(ts, (int, float)) for ts in raw], dtype=bool)
+        if numeric.any():
+            values = np.array([raw[i] for i in np.flatnonzero(numeric)], dtype=np.float64)
+            # JavaScript Date.getTime() values are milliseconds
+            timestamps[numeric] = np.where(values > 1e11, values / 1000.0, values)
+        textual = np.array([isinstance(ts, str) for ts in raw], dtype=bool)
+        if textual.any():
+            parsed = pd.to_datetime([raw[i] for i in np.flatnonzero(textual)], utc=True, format='ISO8601')
+            timestamps[textual] = parsed.as_unit('ns').asi8 / 1e9
+        return timestamps
+
+    def ingest(self, batch):
+        """
+        Store a batch of node metrics.
+
+        Samples older than the newest one already stored for their node are
+        dropped: each node's buffer must stay in time order for its windows.
+
+        Args:
+            batch (list): Metric dicts with ``nodeId`` (string or integer), ``timestamp``
+                (ISO-8601 or epoch) and any of ``bandwidth``, ``latency``, ``powerConsumption``,
+                ``packetLoss``
+
+        Returns:
+            dict: Number of samples accepted and rejected as out of order, and nodes touched
+        """
+        if not batch:
+            return {'accepted': 0, 'rejected': 0, 'nodes': 0}
+        try:
+            node_ids = [sample['nodeId'] for sample in batch]
+        except (KeyError, TypeError):
+            raise ValueError("Every sample must be an object with a nodeId")
+        if not all(isinstance(node_id, (str, int)) and not isinstance(node_id, bool) for node_id in node_ids):
+            raise ValueError("nodeId must be a string or an integer")
+
+        timestamps = self._parse_timestamps([sample.get('timestamp') for sample in batch])
+        try:
+            values = np.array([[sample.get(field, np.nan) for sample in batch] for field in FLEET_FIELDS],
+                              dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("Metric values must be numeric")
+
+        with self._lock:
+            indices = np.fromiter(
+                (self._node_index[n] if n in self._node_index else self._register_node(n) for n in node_ids),
+                dtype=np.int64, count=len(node_ids))
+
+            # Late samples would land after newer ones and break the buffer's binary-searched windows
+            fresh = timestamps >= self._last_seen[indices]
+            rejected = len(batch) - int(fresh.sum())
+            if rejected == len(batch):
+                return {'accepted': 0, 'rejected': rejected, 'nodes': 0}
+            indices, timestamps, values = indices[fresh], timestamps[fresh], values[:, fresh]
+
+            # Group by node, oldest first within each node
+            order = np.lexsort((timestamps, indices))
+            indices, timestamps, values = indices[order], timestamps[order], values[:, order]
+            starts = np.flatnonzero(np.r_[True, indices[1:] != indices[:-1]])
+            ends = np.r_[starts[1:], indices.shape[0]]
+            for start, end in zip(starts, ends):
+                self.buffers[self.node_ids[indices[start]]].extend(timestamps[start:end], values[:, start:end])
+
+            # Newest sample of each node in this batch is now its newest overall
+            last = ends - 1
+            touched = indices[last]
+            self._latest[:, touched] = values[:, last]
+            self._last_seen[touched] = timestamps[last]
+
+        return {'accepted': len(batch) - rejected, 'rejected': rejected, 'nodes': int(starts.shape[0])}
+
+    def evaluate_alerts(self, now=None):
+        """
+        Apply the packet loss, latency and staleness rules to every node at once.
+
+        Returns:
+            dict: Fleet-wide status with per-node alerts for nodes that raised any
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            count = len(self.node_ids)
+            latest = self._latest[:, :count].copy()
+            last_seen = self._last_seen[:count].copy()
+            node_ids = list(self.node_ids)
+
+        column = {name: latest[i] for i, name in enumerate(FLEET_COLUMNS)}
+        # NaN comparisons are False, so nodes that never reported a metric don't alert on it
+        rules = {
+            'High packet loss detected': column['packet_loss_rate'] > self.threshold,
+            'High network latency detected': column['latency'] > self.latency_threshold,
+            'Node stopped reporting': (now - last_seen) > self.stale_after
+        }
+        masks = np.vstack(list(rules.values())) if count else np.zeros((len(rules), 0), dtype=bool)
+        alerting = np.flatnonzero(masks.any(axis=0))
+        messages = list(rules.keys())
+
+        node_alerts = [
+            {
+                'nodeId': node_ids[i],
+                'alerts': [messages[r] for r in np.flatnonzero(masks[:, i])],
+                'latency': _json_values(column['latency'][i:i + 1])[0],
+                'packet_loss_rate': _json_values(column['packet_loss_rate'][i:i + 1])[0]
+            }
+            for i in alerting
+        ]
+
+        return {
+            'status': 'normal' if alerting.shape[0] == 0 else 'warning',
+            'total_nodes': count,
+            'nodes_with_alerts': int(alerting.shape[0]),
+            'alert_counts': {message: int(mask.sum()) for message, mask in rules.items()},
+            'fleet_metrics': {
+                'mean_latency': float(np.nanmean(column['latency'])) if np.isfinite(column['latency']).any() else None,
+                'total_bandwidth': float(np.nansum(column['bandwidth'])),
+                'total_power_consumption': float(np.nansum(column['power_consumption']))
+            },
+            'alerts': node_alerts
+        }
+
+    def get_node_history(self, node_id, seconds=None, samples=None):
+        """
+        Return the retained samples of one node.
+
+        Args:
+            node_id (str): Node identifier
+            seconds (float): Window length in seconds
+            samples (int): Window length in samples
+
+        Returns:
+            dict: Timestamps and one list per stored column
+        """
+        buffer = self.buffers[node_id]
+        with self._lock:
+            timestamps, values = buffer.window(samples=samples, seconds=seconds)
+            return {
+                'nodeId': node_id,
+                'timestamps': timestamps.tolist(),
+                **{name: _json_values(values[i]) for i, name in enumerate(FLEET_COLUMNS)}
+            }
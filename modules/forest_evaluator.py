@@ -0,0 +1,223 @@
+import time
+import numpy as np
+
+class FlatForest:
+    """
+    A fitted RandomForestClassifier or RandomForestRegressor flattened into contiguous NumPy arrays
+    (feature, threshold, children, leaf probability) and evaluated for a whole
+    batch of rows at once, without sklearn's per-call validation and dispatch.
+
+    When the forest is small enough, prefix tables of leaf bitmasks per feature
+    are also built (the QuickScorer formulation): a row's exit leaf in every tree
+    then follows from one searchsorted per feature and a few bitwise ANDs, which
+    beats walking the trees node by node.
+    """
+    def __init__(self, forest, class_index=1, max_table_bytes=256 * 1024 * 1024, chunk_rows=256):
+        """
+        Flatten a fitted forest.
+
+        Args:
+            forest: Fitted sklearn RandomForestClassifier or RandomForestRegressor (single output)
+            class_index (int): Column of predict_proba to reproduce; ignored for regressors
+            max_table_bytes (int): Memory budget for the bitmask tables; larger forests
+                are evaluated by tree traversal only
+            chunk_rows (int): Rows evaluated together with the bitmask tables, sized to stay in cache
+        """
+        if getattr(forest, 'n_outputs_', 1) != 1:
+            raise ValueError("FlatForest only supports single-output forests")
+
+        is_classifier = hasattr(forest, 'classes_')
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        node_counts = np.array([tree.node_count for tree in trees])
+        offsets = np.concatenate(([0], np.cumsum(node_counts)[:-1]))
+
+        features, thresholds, children, leaf_values, leaves = [], [], [], [], []
+        for tree, offset in zip(trees, offsets):
+            is_leaf = tree.children_left == -1
+            # Children are stored interleaved (left, right) so the next node is children[2 * node + went_right]
+            child = np.column_stack((tree.children_left, tree.children_right)) + offset
+            # Leaves point at themselves, so rows that finished early stay put
+            self_index = np.arange(tree.node_count) + offset
+            child[is_leaf] = self_index[is_leaf, None]
+            value = tree.value[:, 0, :]
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            children.append(child.ravel())
+            if is_classifier:
+                normalizer = value.sum(axis=1)
+                normalizer[normalizer == 0] = 1.0
+                leaf_values.append(value[:, class_index] / normalizer)
+            else:
+                leaf_values.append(value[:, 0])
+            leaves.append(is_leaf)
+
+        self.n_trees = len(trees)
+        self.n_features = forest.n_features_in_
+        self.chunk_rows = chunk_rows
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds)
+        self.children = np.concatenate(children).astype(np.intp)
+        self.leaf_value = np.concatenate(leaf_values)
+        self.is_leaf = np.concatenate(leaves)
+        self.roots = offsets.astype(np.intp)
+
+        self.words = (max(tree.n_leaves for tree in trees) + 63) // 64
+        internal_nodes = int(node_counts.sum() - sum(tree.n_leaves for tree in trees))
+        table_bytes = (internal_nodes + self.n_features) * self.n_trees * self.words * 8
+        self.uses_bitmask_tables = table_bytes <= max_table_bytes
+        if self.uses_bitmask_tables:
+            self._build_bitmask_tables(trees, offsets)
+
+    def _build_bitmask_tables(self, trees, offsets):
+        leaf_slots = self.words * 64
+        self.leaf_table = np.zeros((self.n_trees, leaf_slots))
+        node_tree, node_masks, node_features, node_thresholds = [], [], [], []
+
+        for t, (tree, offset) in enumerate(zip(trees, offsets)):
+            left, right = tree.children_left, tree.children_right
+            # Leaves numbered left to right; every node covers a contiguous range [first, last) of them
+            first = np.zeros(tree.node_count, dtype=np.intp)
+            last = np.zeros(tree.node_count, dtype=np.intp)
+            rank = 0
+            stack = [(0, False)]
+            while stack:
+                node, children_done = stack.pop()
+                if left[node] == -1:
+                    self.leaf_table[t, rank] = self.leaf_value[offset + node]
+                    first[node], last[node] = rank, rank + 1
+                    rank += 1
+                elif children_done:
+                    first[node], last[node] = first[left[node]], last[right[node]]
+                else:
+                    stack.extend(((node, True), (right[node], False), (left[node], False)))
+
+            internal = np.flatnonzero(left != -1)
+            # Going right at a node rules out every leaf of its left subtree
+            slots = np.arange(leaf_slots)
+            keep = ((slots < first[left[internal], None]) | (slots >= last[left[internal], None]))
+            node_masks.append(np.packbits(keep, axis=1, bitorder='little').view('<u8'))
+            node_tree.append(np.full(internal.shape[0], t))
+            node_features.append(tree.feature[internal])
+            node_thresholds.append(tree.threshold[internal])
+
+        node_tree = np.concatenate(node_tree)
+        node_masks = np.concatenate(node_masks)
+        node_features = np.concatenate(node_features)
+        node_thresholds = np.concatenate(node_thresholds)
+
+        # tables[f][j] = AND of the masks of the j lowest-threshold nodes testing feature f, per tree
+        self.sorted_thresholds, self.tables = [], []
+        for f in range(self.n_features):
+            selected = np.flatnonzero(node_features == f)
+            selected = selected[np.argsort(node_thresholds[selected], kind='stable')]
+            table = np.full((selected.shape[0] + 1, self.n_trees, self.words), np.iinfo(np.uint64).max, dtype=np.uint64)
+            table[np.arange(1, selected.shape[0] + 1), node_tree[selected]] = node_masks[selected]
+            self.tables.append(np.bitwise_and.accumulate(table, axis=0))
+            self.sorted_thresholds.append(node_thresholds[selected])
+        self._leaf_base = np.arange(self.n_trees) * leaf_slots
+
+    def _predict_bitmask(self, X):
+        # A row goes right at every node whose threshold is below its value: a prefix of the sorted list
+        prefixes = [np.searchsorted(self.sorted_thresholds[f], X[:, f], side='left') for f in range(self.n_features)]
+        flat_leaf_table = self.leaf_table.ravel()
+        probabilities = np.empty(X.shape[0])
+        for start in range(0, X.shape[0], self.chunk_rows):
+            stop = start + self.chunk_rows
+            remaining = np.take(self.tables[0], prefixes[0][start:stop], axis=0)
+            for f in range(1, self.n_features):
+                remaining &= np.take(self.tables[f], prefixes[f][start:stop], axis=0)
+
+            # The exit leaf is the lowest leaf still set
+            word_index = self.words - 1
+            word = remaining[..., word_index]
+            for w in range(self.words - 2, -1, -1):
+                occupied = remaining[..., w] != 0
+                word = np.where(occupied, remaining[..., w], word)
+                word_index = np.where(occupied, w, word_index)
+            lowest_bit = word & (~word + np.uint64(1))
+            leaf = word_index * 64 + np.log2(lowest_bit.astype(np.float64)).astype(np.intp)
+            probabilities[start:stop] = flat_leaf_table[leaf + self._leaf_base].mean(axis=1)
+        return probabilities
+
+    def _predict_traversal(self, X):
+        n_rows = X.shape[0]
+
+        # One slot per (row, tree); X is indexed flat by row * n_features + feature
+        nodes = np.tile(self.roots, n_rows)
+        row_base = np.repeat(np.arange(n_rows) * X.shape[1], self.n_trees)
+        flat_X = X.ravel()
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        while active.shape[0]:
+            current = nodes[active]
+            went_right = flat_X[row_base[active] + self.feature[current]] > self.threshold[current]
+            following = self.children[2 * current + went_right]
+            nodes[active] = following
+            # Only keep walking the (row, tree) pairs that have not reached a leaf
+            active = active[~self.is_leaf[following]]
+
+        return self.leaf_value[nodes].reshape(n_rows, self.n_trees).mean(axis=1)
+
+    def predict_proba(self, X):
+        """
+        Probability of the configured class for every row; for regressors, the prediction.
+
+        Args:
+            X (array-like): Feature matrix, shape (n_rows, n_features)
+
+        Returns:
+            np.ndarray: Probabilities, shape (n_rows,)
+        """
+        # sklearn evaluates trees on float32 inputs against float64 thresholds; do the same
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.uses_bitmask_tables:
+            return self._predict_bitmask(X)
+        return self._predict_traversal(X)
+
+def benchmark(n_estimators=100, batch_rows=10000, repeats=20, seed=0):
+    """
+    Compare FlatForest with sklearn's predict_proba on single rows and a batch.
+
+    Returns:
+        dict: Mean seconds per call for sklearn and both FlatForest strategies, speedups and max absolute difference
+    """
+    from sklearn.ensemble import RandomForestClassifier
+
+    rng = np.random.default_rng(seed)
+    X = rng.random((1000, 4))
+    y = (X[:, 0] * 0.3 + X[:, 1] * 0.3 + X[:, 2] * 0.2 + X[:, 3] * 0.2 > 0.6).astype(int)
+    forest = RandomForestClassifier(n_estimators=n_estimators, random_state=seed).fit(X, y)
+    flat = FlatForest(forest)
+    traversal = FlatForest(forest, max_table_bytes=0)
+
+    def timed(func, data, count):
+        start = time.perf_counter()
+        for _ in range(count):
+            result = func(data)
+        return (time.perf_counter() - start) / count, result
+
+    single = rng.random((1, 4))
+    batch = rng.random((batch_rows, 4))
+    results = {}
+    for name, data, count in (('single_row', single, repeats * 10), ('batch', batch, repeats)):
+        sklearn_time, expected = timed(lambda d: forest.predict_proba(d)[:, 1], data, count)
+        flat_time, actual = timed(flat.predict_proba, data, count)
+        traversal_time, walked = timed(traversal.predict_proba, data, count)
+        results[name] = {
+            'rows': data.shape[0],
+            'sklearn_seconds': sklearn_time,
+            'flat_forest_seconds': flat_time,
+            'traversal_seconds': traversal_time,
+            'speedup': sklearn_time / flat_time,
+            'max_abs_difference': float(max(np.abs(expected - actual).max(), np.abs(expected - walked).max()))
+        }
+    return results
+
+if __name__ == '__main__':
+    for name, result in benchmark().items():
+        print(f"{name:>10}: sklearn {result['sklearn_seconds'] * 1000:.3f} ms, "
+              f"flat {result['flat_forest_seconds'] * 1000:.3f} ms, "
+              f"traversal only {result['traversal_seconds'] * 1000:.3f} ms, "
+              f"speedup {result['speedup']:.1f}x, max diff {result['max_abs_difference']:.2e}")
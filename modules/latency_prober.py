@@ -0,0 +1,200 @@
+import asyncio
+import socket
+import threading
+import time
+import numpy as np
+from modules.ring_buffer import ColumnarRingBuffer
+
+class _UdpEchoProtocol(asyncio.DatagramProtocol):
+    def __init__(self, reply):
+        self.reply = reply
+
+    def datagram_received(self, data, addr):
+        if not self.reply.done():
+            self.reply.set_result(data)
+
+    def error_received(self, exc):
+        # ICMP port unreachable and friends surface here; count them as loss
+        if not self.reply.done():
+            self.reply.set_exception(exc)
+
+class LatencyProber:
+    """
+    Probes a list of TCP/UDP targets concurrently with asyncio and keeps
+    rolling latency percentiles and loss per target.
+    """
+    def __init__(self, targets=None, timeout=1.0, max_concurrency=512, window=100, interval=10.0):
+        """
+        Initialize the prober.
+
+        Args:
+            targets (list): Target dicts with ``host``, ``port``, optional ``protocol``
+                ('tcp' or 'udp') and ``timeout``, or "host:port[/protocol]" strings
+            timeout (float): Default per-target timeout in seconds
+            max_concurrency (int): Maximum probes in flight at once. A round takes at most
+                ceil(len(targets) / max_concurrency) times the slowest timeout
+            window (int): Probes retained per target for the rolling statistics
+            interval (float): Seconds between rounds when running in the background
+        """
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.window = window
+        self.interval = interval
+        self.targets = []
+        self.results = {}
+        self.last_round = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._worker = None
+        self.set_targets(targets or [])
+
+    @staticmethod
+    def parse_targets(spec):
+        """
+        Parse a comma-separated "host:port[/protocol]" list, e.g. "10.0.0.1:443,dns.local:7/udp".
+        """
+        targets = []
+        for item in filter(None, (part.strip() for part in spec.split(','))):
+            address, _, protocol = item.partition('/')
+            host, _, port = address.rpartition(':')
+            targets.append({'host': host, 'port': int(port), 'protocol': protocol or 'tcp'})
+        return targets
+
+    def set_targets(self, targets):
+        normalized = []
+        for target in targets:
+            if isinstance(target, str):
+                target = self.parse_targets(target)[0]
+            target = {
+                'host': target['host'],
+                'port': int(target['port']),
+                'protocol': target.get('protocol', 'tcp').lower(),
+                'timeout': float(target.get('timeout', self.timeout))
+            }
+            if target['protocol'] not in ('tcp', 'udp'):
+                raise ValueError(f"Unsupported probe protocol: {target['protocol']}")
+            target['key'] = f"{target['host']}:{target['port']}/{target['protocol']}"
+            normalized.append(target)
+
+        with self._lock:
+            self.targets = normalized
+            self.results = {
+                target['key']: self.results.get(target['key']) or
+                ColumnarRingBuffer(('latency_ms',), capacity=self.window, dtype=np.float64)
+                for target in normalized
+            }
+
+    @staticmethod
+    async def _resolve(target, socket_type):
+        # Resolved before the clock starts, so name lookups are not counted as latency
+        infos = await asyncio.get_running_loop().getaddrinfo(target['host'], target['port'], type=socket_type)
+        family, _, _, _, address = infos[0]
+        return family, address
+
+    async def _probe_tcp(self, target):
+        family, address = await self._resolve(target, socket.SOCK_STREAM)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            start = time.perf_counter()
+            await asyncio.get_running_loop().sock_connect(sock, address)
+            return (time.perf_counter() - start) * 1000
+        finally:
+            sock.close()
+
+    async def _probe_udp(self, target):
+        family, address = await self._resolve(target, socket.SOCK_DGRAM)
+        loop = asyncio.get_running_loop()
+        reply = loop.create_future()
+        transport, _ = await loop.create_datagram_endpoint(
+            lambda: _UdpEchoProtocol(reply), remote_addr=address, family=family)
+        try:
+            start = time.perf_counter()
+            transport.sendto(b'probe')
+            await reply
+            return (time.perf_counter() - start) * 1000
+        finally:
+            transport.close()
+
+    async def _probe(self, target, semaphore):
+        async with semaphore:
+            try:
+                # The timeout covers name resolution as well as the probe itself
+                probe = self._probe_udp(target) if target['protocol'] == 'udp' else self._probe_tcp(target)
+                return await asyncio.wait_for(probe, target['timeout'])
+            except (OSError, asyncio.TimeoutError):
+                return None
+
+    async def probe_round(self):
+        """
+        Probe every target once, concurrently, and record the results.
+
+        Returns:
+            dict: Latency in ms per target key, None for lost probes
+        """
+        with self._lock:
+            targets = list(self.targets)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        latencies = await asyncio.gather(*(self._probe(target, semaphore) for target in targets))
+
+        now = time.time()
+        round_results = {}
+        with self._lock:
+            for target, latency in zip(targets, latencies):
+                buffer = self.results.get(target['key'])
+                if buffer is not None:
+                    buffer.append(now, (np.nan if latency is None else latency,))
+                round_results[target['key']] = latency
+            self.last_round = now
+        return round_results
+
+    def run_round(self):
+        return asyncio.run(self.probe_round())
+
+    def get_statistics(self):
+        """
+        Rolling latency percentiles and loss per target.
+
+        Returns:
+            dict: Per-target p50/p95/p99 latency in ms, loss rate and probe count
+        """
+        statistics = {}
+        with self._lock:
+            for key, buffer in self.results.items():
+                latencies = buffer.column('latency_ms')
+                if latencies.shape[0] == 0:
+                    continue
+                answered = latencies[~np.isnan(latencies)]
+                p50, p95, p99 = np.percentile(answered, [50, 95, 99]) if answered.shape[0] else (None,) * 3
+                statistics[key] = {
+                    'p50': None if p50 is None else float(p50),
+                    'p95': None if p95 is None else float(p95),
+                    'p99': None if p99 is None else float(p99),
+                    'loss_rate': 1 - answered.shape[0] / latencies.shape[0],
+                    'probes': int(latencies.shape[0])
+                }
+        return statistics
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            try:
+                self.run_round()
+            except Exception:
+                # Keep probing; a failed round only leaves a gap in the history
+                pass
+            self._stop_event.wait(max(self.interval - (time.monotonic() - started), 0))
+
+    def start(self):
+        with self._lock:
+            if not self.targets or (self._worker and self._worker.is_alive()):
+                return
+            self._stop_event.clear()
+            self._worker = threading.Thread(target=self._run, name='LatencyProber', daemon=True)
+            self._worker.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._worker:
+            self._worker.join(timeout=self.interval + self.timeout)
+            self._worker = None
@@ -0,0 +1,208 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import numpy as np
+
+class MeterStore:
+    """
+    Append-only columnar time series on disk, one memory-mapped file per
+    column, for months of per-second meter readings.
+
+    Only the pages a query touches are read: range lookups binary-search the
+    timestamp column and return views into the mapped files, and downsampling
+    reduces a range to a fixed number of points for plotting.
+    """
+    def __init__(self, directory, columns, initial_capacity=86400, dtype=np.float32, flush_interval=5.0):
+        """
+        Open or create a store.
+
+        Args:
+            directory (str): Directory holding the column files and metadata
+            columns (sequence): Value column names
+            initial_capacity (int): Rows allocated when the store is created; files double when full
+            dtype: Value dtype on disk (timestamps are always float64 epoch seconds)
+            flush_interval (float): Seconds between metadata writes; flush() forces one
+        """
+        self.directory = directory
+        self.columns = tuple(columns)
+        self.dtype = np.dtype(dtype)
+        self.flush_interval = flush_interval
+        self._meta_path = os.path.join(directory, 'meta.json')
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path) as f:
+                meta = json.load(f)
+            if tuple(meta['columns']) != self.columns or meta['dtype'] != self.dtype.str:
+                raise ValueError(f"Store at {directory} has columns {meta['columns']} ({meta['dtype']})")
+            self.length, capacity = meta['length'], meta['capacity']
+        else:
+            self.length, capacity = 0, initial_capacity
+        self._map(capacity)
+
+    def _path(self, name):
+        return os.path.join(self.directory, f"{name}.bin")
+
+    def _map(self, capacity):
+        files = {'timestamp': np.dtype(np.float64), **{column: self.dtype for column in self.columns}}
+        arrays = {}
+        for name, dtype in files.items():
+            path = self._path(name)
+            size = capacity * dtype.itemsize
+            with open(path, 'ab') as f:
+                if f.tell() < size:
+                    f.truncate(size)
+            arrays[name] = np.memmap(path, dtype=dtype, mode='r+', shape=(capacity,))
+        self.capacity = capacity
+        self.timestamps = arrays.pop('timestamp')
+        self.values = arrays
+
+    def __len__(self):
+        return self.length
+
+    def append(self, timestamps, values):
+        """
+        Append readings in time order.
+
+        Args:
+            timestamps (array-like): Epoch seconds, non-decreasing and not older than the last row
+            values (dict): Column -> array-like of the same length
+
+        Returns:
+            int: Rows appended
+        """
+        timestamps = np.atleast_1d(np.asarray(timestamps, dtype=np.float64))
+        n = timestamps.shape[0]
+        if n == 0:
+            return 0
+        if np.any(np.diff(timestamps) < 0):
+            raise ValueError("Timestamps must be in increasing order")
+        with self._lock:
+            if self.length and timestamps[0] < self.timestamps[self.length - 1]:
+                raise ValueError("Readings must not be older than the latest stored row")
+            if self.length + n > self.capacity:
+                self._flush_arrays()
+                self._map(max(2 * self.capacity, self.length + n))
+            end = self.length + n
+            self.timestamps[self.length:end] = timestamps
+            for column in self.columns:
+                self.values[column][self.length:end] = np.atleast_1d(np.asarray(values.get(column, np.nan)))
+            self.length = end
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self._write_meta()
+        return n
+
+    def _flush_arrays(self):
+        self.timestamps.flush()
+        for array in self.values.values():
+            array.flush()
+
+    def _write_meta(self):
+        meta = {'columns': list(self.columns), 'dtype': self.dtype.str,
+                'length': self.length, 'capacity': self.capacity}
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.meta-', suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(meta, f)
+        os.replace(temp_path, self._meta_path)
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        """Write buffered pages and the row count to disk."""
+        with self._lock:
+            self._flush_arrays()
+            self._write_meta()
+
+    def range(self, start=None, end=None):
+        """
+        Rows with start <= timestamp < end, as zero-copy views of the mapped files.
+
+        Returns:
+            tuple: (timestamps, dict of column -> values)
+        """
+        with self._lock:
+            timestamps = self.timestamps[:self.length]
+            values = {column: array[:self.length] for column, array in self.values.items()}
+        first = 0 if start is None else int(np.searchsorted(timestamps, start, side='left'))
+        last = timestamps.shape[0] if end is None else int(np.searchsorted(timestamps, end, side='left'))
+        return timestamps[first:last], {column: array[first:last] for column, array in values.items()}
+
+    def downsample(self, start=None, end=None, points=1000, method='minmax', columns=None):
+        """
+        Reduce a range to at most ``points`` points per column for plotting.
+
+        Args:
+            start (float): Range start, epoch seconds
+            end (float): Range end (exclusive), epoch seconds
+            points (int): Maximum points per column
+            method (str): 'minmax' (min and max of each bucket) or 'lttb'
+                (Largest-Triangle-Three-Buckets)
+            columns (sequence): Columns to include, defaults to all
+
+        Returns:
+            dict: Column -> {'timestamps': ndarray, 'values': ndarray}
+        """
+        if method not in ('minmax', 'lttb'):
+            raise ValueError("method must be 'minmax' or 'lttb'")
+        columns = self.columns if columns is None else tuple(columns)
+        unknown = [column for column in columns if column not in self.columns]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)}")
+        points = max(int(points), 3)
+        timestamps, values = self.range(start, end)
+        reducer = _minmax if method == 'minmax' else _lttb
+        result = {}
+        for column in columns:
+            if timestamps.shape[0] <= points:
+                result[column] = {'timestamps': np.array(timestamps), 'values': np.array(values[column])}
+            else:
+                positions = reducer(timestamps, values[column], points)
+                result[column] = {'timestamps': timestamps[positions], 'values': values[column][positions]}
+        return result
+
+def _minmax(timestamps, values, points):
+    """
+    Positions of the first and last samples plus the minimum and maximum of each of
+    (points - 2) // 2 buckets in between, in time order: at most ``points`` positions.
+    """
+    n = values.shape[0]
+    # The endpoints keep the plotted range intact and come out of the same budget
+    buckets = (points - 2) // 2
+    positions = [np.array([0, n - 1])]
+    if buckets:
+        interior = values[1:n - 1]
+        size = -(-interior.shape[0] // buckets)  # ceil division
+        full = interior.shape[0] // size
+        body = interior[:full * size].reshape(full, size)
+        offsets = 1 + np.arange(full) * size
+        positions += [offsets + body.argmin(axis=1), offsets + body.argmax(axis=1)]
+        if full * size < interior.shape[0]:
+            # Only possible with fewer than ``buckets`` full buckets, so the tail stays in budget
+            tail = interior[full * size:]
+            positions.append(np.array([1 + full * size + tail.argmin(), 1 + full * size + tail.argmax()]))
+    return np.unique(np.concatenate(positions))
+
+def _lttb(timestamps, values, points):
+    """Positions selected by Largest-Triangle-Three-Buckets."""
+    n = values.shape[0]
+    # Work on the mapped arrays bucket by bucket instead of converting the whole range
+    x, y = timestamps, values
+    # First and last points are always kept; the rest are split into points - 2 buckets
+    edges = np.linspace(1, n - 1, points - 1).astype(np.intp)
+    positions = np.empty(points, dtype=np.intp)
+    positions[0], positions[-1] = 0, n - 1
+    selected = 0
+    for b in range(points - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # Average of the next bucket (or the last point) is the third triangle vertex
+        next_lo, next_hi = hi, (edges[b + 2] if b + 2 < points - 1 else n)
+        next_x, next_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean(dtype=np.float64)
+        bucket_x, bucket_y = x[lo:hi], y[lo:hi].astype(np.float64)
+        area = np.abs((x[selected] - next_x) * (bucket_y - float(y[selected])) -
+                      (x[selected] - bucket_x) * (next_y - float(y[selected])))
+        selected = lo + int(area.argmax())
+        positions[b + 1] = selected
+    return positions
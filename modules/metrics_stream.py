@@ -0,0 +1,162 @@
+import json
+import threading
+import time
+import numpy as np
+
+def _to_json(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _changed_fields(previous, current):
+    """
+    Nested dict of the fields in ``current`` that differ from ``previous``.
+    Removed keys are reported as None; lists are compared and sent whole.
+    """
+    if not isinstance(previous, dict) or not isinstance(current, dict):
+        return current
+    changes = {}
+    for key, value in current.items():
+        if key not in previous:
+            changes[key] = value
+        elif isinstance(value, dict) and isinstance(previous[key], dict):
+            nested = _changed_fields(previous[key], value)
+            if nested:
+                changes[key] = nested
+        elif value != previous[key]:
+            changes[key] = value
+    for key in previous.keys() - current.keys():
+        changes[key] = None
+    return changes
+
+class MetricsBroadcaster:
+    """
+    Computes dashboard metrics once per tick on a background thread and fans
+    the encoded Server-Sent Events out to every connected client, so the cost
+    of a tick does not grow with the number of viewers.
+    """
+    def __init__(self, sources, interval=1.0, keepalive=15.0):
+        """
+        Initialize the broadcaster.
+
+        Args:
+            sources (dict): Stream section name -> callable returning that section's payload
+            interval (float): Seconds between ticks
+            keepalive (float): Seconds of silence after which a comment line is sent to keep proxies open
+        """
+        self.sources = sources
+        self.interval = interval
+        self.keepalive = keepalive
+        self.subscribers = 0
+        self._snapshot = {}
+        self._sequence = 0
+        self._ticks = 0
+        self._delta_message = None
+        self._snapshot_message = None
+        self._snapshot_sequence = -1
+        self._condition = threading.Condition()
+        self._worker = None
+
+    def _collect(self):
+        snapshot = {}
+        for name, source in self.sources.items():
+            try:
+                # Round-trip through JSON once so diffs compare plain Python values
+                snapshot[name] = json.loads(json.dumps(source(), default=_to_json))
+            except Exception:
+                # A failing source keeps its last published value; the others still update
+                if name in self._snapshot:
+                    snapshot[name] = self._snapshot[name]
+        return snapshot
+
+    @staticmethod
+    def _encode(event, sequence, payload):
+        data = json.dumps(payload, separators=(',', ':'))
+        return f"id: {sequence}\nevent: {event}\ndata: {data}\n\n".encode()
+
+    def tick(self):
+        """Compute one payload and publish the changed fields to all subscribers."""
+        snapshot = self._collect()
+        changes = _changed_fields(self._snapshot, snapshot)
+        with self._condition:
+            self._snapshot = snapshot
+            self._ticks += 1
+            if not changes:
+                # Still wake a client waiting for the first tick after a restart
+                self._condition.notify_all()
+                return
+            self._sequence += 1
+            self._delta_message = self._encode('update', self._sequence, changes)
+            self._condition.notify_all()
+
+    def _snapshot_event(self):
+        # Full snapshots are only encoded when a client joins or falls behind, at most once per tick
+        with self._condition:
+            if self._snapshot_sequence != self._sequence:
+                self._snapshot_message = self._encode('snapshot', self._sequence, self._snapshot)
+                self._snapshot_sequence = self._sequence
+            return self._sequence, self._snapshot_message
+
+    def _discard_snapshot(self):
+        # Called with the condition held: nothing collected so far may be served as current
+        self._snapshot = {}
+        self._snapshot_message = None
+        self._snapshot_sequence = -1
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while True:
+            with self._condition:
+                if self.subscribers == 0:
+                    self._discard_snapshot()
+                    self._worker = None
+                    return
+            try:
+                self.tick()
+            except Exception:
+                # Keep ticking, but a failed tick leaves no snapshot to hand out as fresh
+                with self._condition:
+                    self._discard_snapshot()
+                    self._ticks += 1
+                    self._condition.notify_all()
+            next_tick += self.interval
+            time.sleep(max(next_tick - time.monotonic(), 0))
+
+    def stream(self):
+        """
+        Generator of Server-Sent Event chunks for one client: a full snapshot
+        first, then only changed fields for each new tick.
+        """
+        with self._condition:
+            self.subscribers += 1
+            if self._worker is None:
+                # Nothing was collected while no client was connected, so the held snapshot is
+                # stale: drop it and let the restarted ticker rebuild it before it is served
+                self._discard_snapshot()
+                stale = self._ticks
+                self._worker = threading.Thread(target=self._run, name='MetricsBroadcaster', daemon=True)
+                self._worker.start()
+                self._condition.wait_for(lambda: self._ticks > stale, timeout=self.keepalive)
+            elif self._sequence == 0:
+                self._condition.wait_for(lambda: self._sequence > 0, timeout=self.keepalive)
+        try:
+            sequence, message = self._snapshot_event()
+            yield message
+            while True:
+                with self._condition:
+                    published = self._condition.wait_for(lambda: self._sequence > sequence, timeout=self.keepalive)
+                    latest, delta = self._sequence, self._delta_message
+                if not published:
+                    yield b": keepalive\n\n"
+                elif latest == sequence + 1:
+                    sequence = latest
+                    yield delta
+                else:
+                    # Missed ticks while this client was slow; resynchronize with a full snapshot
+                    sequence, message = self._snapshot_event()
+                    yield message
+        finally:
+            with self._condition:
+                self.subscribers -= 1
@@ -0,0 +1,91 @@
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+import joblib
+import sklearn
+
+class ModelStore:
+    """
+    Persists fitted models together with a hash of the feature schema they
+    were trained on, so stale artifacts are ignored instead of mis-scoring.
+    """
+    def __init__(self, directory, name):
+        """
+        Initialize the store.
+
+        Args:
+            directory (str): Directory holding the artifacts
+            name (str): Artifact name, one file per name
+        """
+        self.directory = directory
+        self.name = name
+        self.path = os.path.join(directory, f"{name}.joblib")
+
+    @staticmethod
+    def schema_hash(features, model_class, params, version):
+        """
+        Hash of everything that makes an artifact incompatible when it changes.
+
+        Args:
+            features (sequence): Ordered feature names
+            model_class (str): Estimator class name
+            params (dict): Estimator hyperparameters
+            version (int): Manually bumped model version
+
+        Returns:
+            str: Hex digest identifying the schema
+        """
+        schema = {
+            'features': list(features),
+            'model_class': model_class,
+            'params': params,
+            'version': version,
+            'sklearn_version': sklearn.__version__
+        }
+        encoded = json.dumps(schema, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()[:16]
+
+    def save(self, model, schema_hash, metadata=None):
+        """
+        Write the artifact atomically: readers see either the old or the new file.
+
+        Returns:
+            dict: The stored artifact metadata
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        artifact = {
+            'schema_hash': schema_hash,
+            'trained_at': datetime.now().isoformat(),
+            'metadata': metadata or {},
+            'model': model
+        }
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=f".{self.name}-", suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                joblib.dump(artifact, f)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return {k: v for k, v in artifact.items() if k != 'model'}
+
+    def load(self, schema_hash):
+        """
+        Load the artifact if it exists and matches the expected schema.
+
+        Returns:
+            dict: Artifact with 'model', 'schema_hash', 'trained_at' and 'metadata', or None
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            artifact = joblib.load(self.path)
+        except Exception:
+            # Corrupt or unreadable artifacts are treated as missing and get retrained
+            return None
+        if not isinstance(artifact, dict) or artifact.get('schema_hash') != schema_hash:
+            return None
+        return artifact
@@ -1,20 +1,67 @@
 import numpy as np
-from sklearn.cluster import KMeans
 from datetime import datetime
+from modules.node_placement import NodePlacement
+from modules.coverage_engine import CoverageEngine
+
+COVERAGE_OPTIONS = ('cell_size', 'shape', 'dtype', 'tile_size', 'frequency_mhz', 'receiver_height',
+                    'max_range_m', 'sample_spacing', 'sensitivity_dbm')
 
 class NetworkDesigner:
-    def __init__(self):
+    def __init__(self, population_data_path=None):
         self.terrain_data = {}
         self.population_density = {}
         self.existing_infrastructure = {}
+        self.population_data_path = population_data_path
+        self.node_placement = None
+
+    def place_nodes(self, lat, lon, households=None, tiers=None):
+        # Cluster household coordinates into access, distribution and backbone sites
+        placement = NodePlacement(tiers=tiers)
+        placement.add(lat, lon, households)
+        self.node_placement = placement.place()
+        return self.node_placement
+
+    def _place_configured_population(self):
+        # CSV input is only read from the server-configured population file
+        placement = NodePlacement()
+        placement.load_csv(self.population_data_path)
+        self.node_placement = placement.place()
+        return self.node_placement
 
     def analyze_terrain(self, satellite_data):
+        satellite_data = satellite_data or {}
+        if satellite_data.get('dem_path') and satellite_data.get('towers'):
+            # Path loss and line of sight of the candidate towers over the elevation raster
+            engine = CoverageEngine(satellite_data['dem_path'],
+                                    **{key: satellite_data[key] for key in COVERAGE_OPTIONS if key in satellite_data})
+            coverage = engine.run(satellite_data['towers'], output_dir=satellite_data.get('output_dir'),
+                                  max_workers=satellite_data.get('max_workers'))
+            terrain_features = {
+                'elevation': coverage['mean_elevation'],  # meters
+                'slope': coverage['mean_slope_degrees'],  # degrees
+                'vegetation_density': np.random.normal(0.4, 0.1),
+                'water_bodies': bool(np.random.choice([True, False], p=[0.2, 0.8]))
+            }
+            coverage_impact = {
+                # Share of the path loss caused by terrain obstruction
+                'signal_attenuation': coverage['mean_diffraction_loss_db'] / coverage['mean_path_loss_db']
+                if coverage['mean_path_loss_db'] else 0.0,
+                'line_of_sight_probability': coverage['line_of_sight_fraction'],
+                'weather_vulnerability': np.random.normal(0.4, 0.1)
+            }
+            return {
+                'terrain_features': terrain_features,
+                'coverage_impact': coverage_impact,
+                'buildability_score': np.random.normal(0.7, 0.1),
+                'coverage_simulation': coverage
+            }
+
         # Simulate terrain analysis from satellite data
         terrain_features = {
             'elevation': np.random.normal(500, 100),  # meters
             'slope': np.random.normal(15, 5),  # degrees
             'vegetation_density': np.random.normal(0.4, 0.1),
-            'water_bodies': np.random.choice([True, False], p=[0.2, 0.8])
+            'water_bodies': bool(np.random.choice([True, False], p=[0.2, 0.8]))
         }
 
         coverage_impact = {
@@ -50,7 +97,27 @@ class NetworkDesigner:
             'service_priority_score': np.random.normal(0.8, 0.1)
         }
 
-    def design_network_architecture(self, terrain_analysis, demographic_analysis):
+    def design_network_architecture(self, terrain_analysis, demographic_analysis, placement=None):
+        if placement is not None:
+            tiers = placement['tiers']
+            node_placement = {
+                'backbone_nodes': tiers['backbone']['sites'],
+                'distribution_nodes': tiers['distribution']['sites'],
+                'access_points': tiers['access']['units'],
+                'coverage_radius': tiers['access']['radius_km']  # km
+            }
+            infrastructure_requirements = {
+                # Access sites link wirelessly; distribution sites reach their backbone node over fiber
+                'fiber_length': tiers['distribution']['uplink_km'],  # km
+                'towers_required': tiers['access']['sites'],
+                'power_systems': sum(tier['sites'] for tier in tiers.values())
+            }
+            return {
+                'node_placement': node_placement,
+                'infrastructure_requirements': infrastructure_requirements,
+                'estimated_coverage': tiers['access']['coverage']
+            }
+
         # Generate optimal network design
         node_placement = {
             'backbone_nodes': np.random.randint(3, 7),
@@ -94,7 +161,12 @@ class NetworkDesigner:
     def get_design_plan(self, satellite_data=None, population_data=None):
         terrain_analysis = self.analyze_terrain(satellite_data)
         demographic_analysis = self.analyze_demographics(population_data)
-        network_design = self.design_network_architecture(terrain_analysis, demographic_analysis)
+        if population_data and 'lat' in population_data and 'lon' in population_data:
+            self.place_nodes(population_data['lat'], population_data['lon'],
+                             population_data.get('households'), population_data.get('tiers'))
+        elif self.node_placement is None and self.population_data_path:
+            self._place_configured_population()
+        network_design = self.design_network_architecture(terrain_analysis, demographic_analysis, self.node_placement)
         infrastructure_optimization = self.optimize_infrastructure(network_design)
 
         # Generate actionable recommendations
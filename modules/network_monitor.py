@@ -1,58 +1,181 @@
 import psutil
+import threading
 import time
 import numpy as np
 from datetime import datetime
+from modules.ring_buffer import ColumnarRingBuffer
+from modules.latency_prober import LatencyProber
+
+COUNTER_FIELDS = ('bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv',
+                  'errin', 'errout', 'dropin', 'dropout')
 
 class NetworkMonitor:
-    def __init__(self):
-        self.history = []
+    def __init__(self, sample_interval=1.0, retention_seconds=24 * 3600, retention_samples=None,
+                 probe_targets=None, probe_interval=10.0, probe_timeout=1.0):
+        self.sample_interval = sample_interval  # seconds between background samples
+        self.retention_seconds = retention_seconds
+        self.retention_samples = retention_samples
+        self.history = self._new_history()  # fleet-wide totals across all interfaces
+        self.interface_history = {}
         self.threshold = 0.8  # 80% threshold for alerts
+        self.latency_prober = LatencyProber(probe_targets, timeout=probe_timeout, interval=probe_interval)
+        self._latest_status = None
+        self._sampler = None
+        self._sampler_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def _new_history(self):
+        return ColumnarRingBuffer(COUNTER_FIELDS, capacity=self.retention_samples,
+                                  retention_seconds=self.retention_seconds,
+                                  sample_interval=self.sample_interval)
 
     def collect_metrics(self):
-        net_io = psutil.net_io_counters()
+        now = time.time()
+        per_nic = psutil.net_io_counters(pernic=True)
+        interfaces = {
+            name: {field: getattr(counters, field) for field in COUNTER_FIELDS}
+            for name, counters in per_nic.items()
+        }
+        totals = {field: sum(nic[field] for nic in interfaces.values()) for field in COUNTER_FIELDS}
         return {
-            'bytes_sent': net_io.bytes_sent,
-            'bytes_recv': net_io.bytes_recv,
-            'packets_sent': net_io.packets_sent,
-            'packets_recv': net_io.packets_recv,
-            'timestamp': datetime.now().isoformat()
+            **totals,
+            'interfaces': interfaces,
+            'timestamp': datetime.fromtimestamp(now).isoformat(),
+            'epoch': now
         }
 
-    def analyze_traffic(self):
-        if len(self.history) < 2:
+    def record_metrics(self, metrics):
+        self.history.append(metrics['epoch'], metrics)
+        for name, counters in metrics['interfaces'].items():
+            if name not in self.interface_history:
+                self.interface_history[name] = self._new_history()
+            self.interface_history[name].append(metrics['epoch'], counters)
+
+    def _latest_rates(self, buffer):
+        if len(buffer) < 2:
+            return None
+        timestamps, values = buffer.latest(2)
+        time_diff = timestamps[1] - timestamps[0]
+        if time_diff <= 0:
             return None
+        # Counters can reset (interface down/up, driver reload); treat negative deltas as zero
+        deltas = np.maximum(values[:, 1] - values[:, 0], 0) / time_diff
+        return {f'{field}_per_sec': float(delta) for field, delta in zip(COUNTER_FIELDS, deltas)}
+
+    def traffic_window(self, seconds=None, samples=None, interface=None):
+        """
+        Per-second counter rates over a window of the retained history.
 
-        current = self.history[-1]
-        previous = self.history[-2]
-        time_diff = (datetime.fromisoformat(current['timestamp']) - 
-                    datetime.fromisoformat(previous['timestamp'])).total_seconds()
+        Args:
+            seconds (float): Window length in seconds
+            samples (int): Window length in samples
+            interface (str): Interface name, or None for totals across all interfaces
 
+        Returns:
+            dict: Sample end timestamps and one rate array per counter
+        """
+        buffer = self.history if interface is None else self.interface_history[interface]
+        timestamps, values = buffer.window(samples=samples, seconds=seconds)
+        if timestamps.shape[0] < 2:
+            return {'timestamps': timestamps, 'rates': {}}
+        time_diff = np.diff(timestamps)
+        rates = np.maximum(np.diff(values, axis=1), 0) / np.where(time_diff > 0, time_diff, np.nan)
         return {
-            'bandwidth_usage': (current['bytes_recv'] - previous['bytes_recv']) / time_diff,
-            'packet_loss_rate': 1 - (current['packets_recv'] / current['packets_sent']),
-            'network_latency': np.random.normal(20, 5)  # Simulated latency in ms
+            'timestamps': timestamps[1:],
+            'rates': {f'{field}_per_sec': rates[i] for i, field in enumerate(COUNTER_FIELDS)}
         }
 
-    def get_status(self):
+    def analyze_traffic(self, metrics):
+        rates = self._latest_rates(self.history)
+        if rates is None:
+            return None
+
+        packets = rates['packets_sent_per_sec'] + rates['packets_recv_per_sec']
+        lost = (rates['dropin_per_sec'] + rates['dropout_per_sec'] +
+                rates['errin_per_sec'] + rates['errout_per_sec'])
+
+        interface_rates = {}
+        for name in metrics['interfaces']:
+            interface_rate = self._latest_rates(self.interface_history[name])
+            if interface_rate is not None:
+                interface_rates[name] = interface_rate
+
+        # Median of the per-target rolling p50 latencies; None until a probe target answers
+        latency_probes = self.latency_prober.get_statistics()
+        medians = [stats['p50'] for stats in latency_probes.values() if stats['p50'] is not None]
+
+        return {
+            'bandwidth_usage': rates['bytes_recv_per_sec'],
+            'packet_loss_rate': lost / packets if packets > 0 else 0.0,
+            'network_latency': float(np.median(medians)) if medians else None,
+            'latency_probes': latency_probes,
+            'rates': rates,
+            'interface_rates': interface_rates
+        }
+
+    def sample(self):
+        """Take one sample, compute rates against the previous one and publish the snapshot."""
         metrics = self.collect_metrics()
-        self.history.append(metrics)
-        if len(self.history) > 100:  # Keep last 100 records
-            self.history.pop(0)
+        self.record_metrics(metrics)
 
-        analysis = self.analyze_traffic()
+        analysis = self.analyze_traffic(metrics)
+        public_metrics = {k: v for k, v in metrics.items() if k != 'epoch'}
         if not analysis:
-            return {'status': 'initializing', 'metrics': metrics}
+            self._latest_status = {'status': 'initializing', 'metrics': public_metrics}
+            return self._latest_status
 
         # Add alerts based on thresholds
         alerts = []
         if analysis['packet_loss_rate'] > self.threshold:
             alerts.append('High packet loss detected')
-        if analysis['network_latency'] > 50:  # 50ms threshold
+        if analysis['network_latency'] is not None and analysis['network_latency'] > 50:  # 50ms threshold
             alerts.append('High network latency detected')
 
-        return {
+        # Swap in the new snapshot with a single reference assignment so readers never see a partial update
+        self._latest_status = {
             'status': 'normal' if not alerts else 'warning',
-            'metrics': metrics,
+            'metrics': public_metrics,
             'analysis': analysis,
-            'alerts': alerts
-        }
\ No newline at end of file
+            'alerts': alerts,
+            'sample_interval': self.sample_interval
+        }
+        return self._latest_status
+
+    def _run_sampler(self):
+        next_tick = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                self.sample()
+            except Exception:
+                # Keep the collector alive; the next tick retries
+                pass
+            # Schedule against a fixed cadence so slow samples don't accumulate drift
+            next_tick += self.sample_interval
+            delay = next_tick - time.monotonic()
+            if delay < 0:
+                next_tick = time.monotonic()
+                delay = 0
+            self._stop_event.wait(delay)
+
+    def start(self):
+        self.latency_prober.start()
+        with self._sampler_lock:
+            if self._sampler and self._sampler.is_alive():
+                return
+            self._stop_event.clear()
+            self._sampler = threading.Thread(target=self._run_sampler, name='NetworkMonitorSampler', daemon=True)
+            self._sampler.start()
+
+    def stop(self):
+        self.latency_prober.stop()
+        self._stop_event.set()
+        if self._sampler:
+            self._sampler.join(timeout=self.sample_interval * 2)
+            self._sampler = None
+
+    def get_status(self):
+        self.start()
+        status = self._latest_status
+        if status is None:
+            return {'status': 'initializing', 'metrics': None}
+        return status
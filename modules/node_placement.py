@@ -0,0 +1,191 @@
+import math
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+
+EARTH_RADIUS_KM = 6371.0
+TIERS = ('access', 'distribution', 'backbone')
+# Coverage radius and households one unit of equipment serves, per tier
+DEFAULT_TIERS = {
+    'access': {'radius_km': 2.0, 'capacity': 250},
+    'distribution': {'radius_km': 10.0, 'capacity': 5000},
+    'backbone': {'radius_km': 50.0, 'capacity': 100000}
+}
+_CELL_OFFSET = 1 << 30
+
+def _cell_keys(x, y, size):
+    # One int64 per grid cell of the given side length (km)
+    ix = np.floor(x / size).astype(np.int64) + _CELL_OFFSET
+    iy = np.floor(y / size).astype(np.int64) + _CELL_OFFSET
+    return (ix << 32) | iy
+
+class NodePlacement:
+    """
+    Places access, distribution and backbone sites over household coordinates.
+
+    Input is streamed in chunks and reduced to weighted centroids on a fine
+    grid (a quarter of the access radius by default), so memory grows with the
+    populated area rather than the number of households. Each tier is then
+    clustered tile by tile with MiniBatchKMeans: a tile spans ``tile_cells``
+    coverage cells per side, and its k is the larger of the coverage cells it
+    occupies (squares inscribed in the coverage circle) and the households it
+    holds divided by the tier capacity. Tiles keep every clustering problem
+    small, so runtime grows linearly with the populated area. Each tier
+    clusters the sites of the tier below, weighted by the households they serve.
+    """
+    def __init__(self, tiers=None, cell_fraction=0.25, tile_cells=8, random_state=0):
+        """
+        Initialize an empty placement.
+
+        Args:
+            tiers (dict): Tier -> {'radius_km', 'capacity'} overriding DEFAULT_TIERS
+            cell_fraction (float): Aggregation grid side as a share of the access radius
+            tile_cells (int): Coverage cells per tile side
+            random_state (int): Seed for the clustering
+        """
+        tiers = tiers or {}
+        if not isinstance(tiers, dict) or not all(isinstance(settings, dict) for settings in tiers.values()):
+            raise ValueError("tiers must map tier names to {'radius_km', 'capacity'} objects")
+        unknown = [tier for tier in tiers if tier not in TIERS]
+        if unknown:
+            raise ValueError(f"Unknown tiers: {', '.join(map(str, unknown))}")
+        self.tiers = {tier: dict(DEFAULT_TIERS[tier], **tiers.get(tier, {})) for tier in TIERS}
+        for tier, settings in self.tiers.items():
+            for name in ('radius_km', 'capacity'):
+                value = settings[name]
+                if isinstance(value, bool) or not isinstance(value, (int, float)) \
+                        or not math.isfinite(value) or value <= 0:
+                    raise ValueError(f"{tier} radius_km and capacity must be positive numbers")
+        self.cell_size = self.tiers['access']['radius_km'] * cell_fraction
+        self.tile_cells = tile_cells
+        self.random_state = random_state
+        self.reference_latitude = None
+        self.points = 0
+        self._keys = np.empty(0, dtype=np.int64)
+        self._sums = np.empty((0, 3))  # weighted x, weighted y, households per cell
+
+    def _project(self, lat, lon):
+        # Equirectangular projection around the reference latitude, in km
+        scale = math.radians(1) * EARTH_RADIUS_KM
+        return lon * scale * math.cos(math.radians(self.reference_latitude)), lat * scale
+
+    def _unproject(self, x, y):
+        scale = math.radians(1) * EARTH_RADIUS_KM
+        return y / scale, x / (scale * math.cos(math.radians(self.reference_latitude)))
+
+    def add(self, lat, lon, households=None):
+        """
+        Add a chunk of coordinates.
+
+        Args:
+            lat (array-like): Latitudes in degrees
+            lon (array-like): Longitudes in degrees
+            households (array-like): Households per point, defaults to one
+
+        Returns:
+            int: Points added (rows with missing or out-of-range values are skipped)
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        weight = np.ones_like(lat) if households is None else np.asarray(households, dtype=np.float64)
+        if not lat.shape == lon.shape == weight.shape:
+            raise ValueError("lat, lon and households must have the same length")
+        valid = (np.abs(lat) <= 90) & (np.abs(lon) <= 180) & (weight > 0)
+        lat, lon, weight = lat[valid], lon[valid], weight[valid]
+        if lat.shape[0] == 0:
+            return 0
+        if self.reference_latitude is None:
+            self.reference_latitude = float(np.mean(lat))
+        x, y = self._project(lat, lon)
+
+        # Reduce the chunk to its cells, then merge with the running aggregates
+        keys, inverse = np.unique(_cell_keys(x, y, self.cell_size), return_inverse=True)
+        sums = np.column_stack([np.bincount(inverse, values, minlength=keys.shape[0])
+                                for values in (x * weight, y * weight, weight)])
+        self._keys, inverse = np.unique(np.concatenate((self._keys, keys)), return_inverse=True)
+        sums = np.concatenate((self._sums, sums))
+        self._sums = np.column_stack([np.bincount(inverse, sums[:, i], minlength=self._keys.shape[0]) for i in range(3)])
+        self.points += lat.shape[0]
+        return int(lat.shape[0])
+
+    def load_csv(self, path, lat_column='lat', lon_column='lon', households_column=None, chunk_rows=1000000):
+        """Stream coordinates from a CSV in chunks."""
+        columns = [lat_column, lon_column] + ([households_column] if households_column else [])
+        added = 0
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=chunk_rows):
+            added += self.add(chunk[lat_column].to_numpy(), chunk[lon_column].to_numpy(),
+                              chunk[households_column].to_numpy() if households_column else None)
+        return added
+
+    def _cluster_tier(self, x, y, weight, radius, capacity):
+        """Weighted sites for one tier and the site each input point is assigned to."""
+        coverage_cell = radius * math.sqrt(2)
+        cells = _cell_keys(x, y, coverage_cell)
+        tiles = _cell_keys(x, y, coverage_cell * self.tile_cells)
+        order = np.lexsort((cells, tiles))
+        boundaries = np.flatnonzero(np.diff(tiles[order])) + 1
+        site_x, site_y, labels = [], [], np.empty(x.shape[0], dtype=np.intp)
+        offset = 0
+        for members in np.split(order, boundaries):
+            # Members are sorted by coverage cell; each cell's weighted centroid seeds one site
+            starts = np.concatenate(([0], np.flatnonzero(np.diff(cells[members])) + 1))
+            k = min(max(starts.shape[0], math.ceil(weight[members].sum() / capacity)), members.shape[0])
+            points = np.column_stack((x[members], y[members]))
+            if k == members.shape[0]:
+                centers, tile_labels = points, np.arange(k)
+            else:
+                if k == starts.shape[0]:
+                    cell_weight = np.add.reduceat(weight[members], starts)
+                    init = np.add.reduceat(points * weight[members, None], starts) / cell_weight[:, None]
+                else:
+                    init = 'k-means++'
+                model = MiniBatchKMeans(n_clusters=k, init=init, batch_size=1024, n_init=1, max_iter=10,
+                                        random_state=self.random_state)
+                model.fit(points, sample_weight=weight[members])
+                centers, tile_labels = model.cluster_centers_, model.labels_
+            site_x.append(centers[:, 0])
+            site_y.append(centers[:, 1])
+            labels[members] = offset + tile_labels
+            offset += k
+        site_x, site_y = np.concatenate(site_x), np.concatenate(site_y)
+
+        # Clusters that ended up empty are dropped
+        load = np.bincount(labels, weight, minlength=offset)
+        used = load > 0
+        renumber = np.cumsum(used) - 1
+        return site_x[used], site_y[used], load[used], renumber[labels]
+
+    def place(self):
+        """
+        Place the sites of every tier.
+
+        Returns:
+            dict: Totals and per-tier summaries, plus per-tier site arrays (lat, lon,
+                households served, equipment units, parent site in the tier above)
+        """
+        if not self._keys.shape[0]:
+            raise ValueError("No household coordinates loaded")
+        weight = self._sums[:, 2]
+        x, y = self._sums[:, 0] / weight, self._sums[:, 1] / weight
+        summary = {'points': self.points, 'households': float(weight.sum()), 'grid_cells': int(weight.shape[0]),
+                   'reference_latitude': self.reference_latitude, 'tiers': {}}
+        sites = {}
+        previous = None
+        for tier in TIERS:
+            radius, capacity = self.tiers[tier]['radius_km'], self.tiers[tier]['capacity']
+            site_x, site_y, load, labels = self._cluster_tier(x, y, weight, radius, capacity)
+            distance = np.hypot(x - site_x[labels], y - site_y[labels])
+            if previous is not None:
+                sites[previous]['parent'] = labels
+                summary['tiers'][previous]['uplink_km'] = float(distance.sum())
+            lat, lon = self._unproject(site_x, site_y)
+            units = np.ceil(load / capacity).astype(np.int64)
+            sites[tier] = {'lat': lat, 'lon': lon, 'households': load, 'units': units}
+            summary['tiers'][tier] = {'sites': int(load.shape[0]), 'units': int(units.sum()),
+                                      'radius_km': radius, 'capacity': capacity,
+                                      'coverage': float(weight[distance <= radius].sum() / weight.sum())}
+            x, y, weight, previous = site_x, site_y, load, tier
+        sites[previous]['parent'] = np.full(x.shape[0], -1)
+        summary['tiers'][previous]['uplink_km'] = 0.0
+        summary['sites'] = sites
+        return summary
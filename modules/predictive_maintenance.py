@@ -1,57 +1,348 @@
+import os
+import time
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from datetime import datetime, timedelta
+from modules.model_store import ModelStore
+from modules.equipment_registry import EquipmentRegistry, SENSOR_FIELDS
+from modules.forest_evaluator import FlatForest
+from modules.ring_buffer import ColumnarRingBuffer
+from modules.drift_detector import PSIDriftDetector
+from modules.feature_pipeline import RollingFeatureStore
+
+FEATURES = ('temperature', 'vibration', 'power_consumption', 'uptime_hours')
+# Uptime grows monotonically between maintenance visits, so only sensor readings are checked for drift
+DRIFT_FEATURES = slice(0, 3)
+MODEL_VERSION = 3  # Bump when training data, labelling or artifact metadata changes
+DEFAULT_MODEL_DIR = os.environ.get('MODEL_DIR', os.path.join(os.path.dirname(os.path.dirname(__file__)), 'artifacts'))
+
+def _fit_forest(params, X, y):
+    # Runs in a worker process; kept at module level so it can be pickled
+    return RandomForestClassifier(**params).fit(X, y)
+
+def label_readings(X):
+    """
+    Heuristic failure labels for unlabelled sensor windows: the training rule
+    applied to readings min-max scaled within the window.
+    """
+    low, high = X.min(axis=0), X.max(axis=0)
+    scaled = (X - low) / np.where(high > low, high - low, 1.0)
+    return (scaled[:, 0] * 0.3 + scaled[:, 1] * 0.3 + scaled[:, 2] * 0.2 + scaled[:, 3] * 0.2 > 0.6).astype(int)
 
 class PredictiveMaintenance:
-    def __init__(self):
-        self.model = RandomForestClassifier(n_estimators=100)
+    def __init__(self, model_dir=DEFAULT_MODEL_DIR, n_estimators=100, window_size=1000,
+                 drift_threshold=0.25, drift_min_samples=200, retrain_cooldown=300):
+        self.n_estimators = n_estimators
         self.last_maintenance = datetime.now()
-        self.equipment_data = []
+        # Sliding window of recent sensor readings, used for drift detection and retraining
+        self.equipment_data = ColumnarRingBuffer(FEATURES, capacity=window_size, dtype=np.float64)
+        self.window_size = window_size
+        self.drift_threshold = drift_threshold  # PSI above 0.25 is conventionally a significant shift
+        self.drift_min_samples = drift_min_samples
+        self.retrain_cooldown = retrain_cooldown  # Minimum seconds between drift-triggered retrains
+        self.drift_detector = None
+        self.retraining_metrics = {
+            'retrain_count': 0,
+            'last_retrain_seconds': None,
+            'total_retrain_seconds': 0.0,
+            'last_retrain_at': None,
+            'last_drift_score': None,
+            'drift_threshold': drift_threshold,
+            'retrain_in_progress': False
+        }
+        self._window_lock = threading.Lock()
+        self._retrain_executor = None
+        self._last_retrain_started = float('-inf')
+        self.equipment_registry = EquipmentRegistry()
+        self.feature_store = RollingFeatureStore(SENSOR_FIELDS)
+        self.device_id = 'local'  # Feature store key for the readings from collect_equipment_data
+        self.logger = self._setup_logger()
+        self.model_store = ModelStore(model_dir, 'predictive_maintenance')
+        self.schema_hash = ModelStore.schema_hash(FEATURES, 'RandomForestClassifier',
+                                                  self._build_model().get_params(), MODEL_VERSION)
+        self.model = None
+        self.model_info = None
+        self.forest_evaluator = None
+        self._retrain_thread = None
+        self._retrain_lock = threading.Lock()
+        self._load_or_train()
+
+    def _setup_logger(self):
+        """Set up logging for the PredictiveMaintenance module."""
+        logger = logging.getLogger("PredictiveMaintenance")
+        logger.setLevel(logging.INFO)
+        if not logger.handlers:
+            handler = logging.StreamHandler()
+            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+        return logger
+
+    def _build_model(self):
+        return RandomForestClassifier(n_estimators=self.n_estimators)
+
+    def _load_or_train(self):
+        # Fit at startup when no compatible artifact exists so no request ever pays for training
+        artifact = self.model_store.load(self.schema_hash)
+        if artifact is not None:
+            reference = artifact['metadata']['drift_reference']
+            if reference is not None:
+                self.drift_detector = PSIDriftDetector.from_state(reference, window=self.window_size)
+            self._swap_model(artifact['model'], {k: v for k, v in artifact.items() if k != 'model'})
+            self.logger.info(f"Loaded model artifact trained at {artifact['trained_at']}")
+            return
+        self.logger.info("No compatible model artifact found, training at startup")
+        X, y = self._synthetic_training_data()
+        self._publish_model(self.train_model(X, y))
+
+    def _swap_model(self, model, info):
+        # Flatten before publishing; readers take one reference each, so they see the old or the new model
+        evaluator = FlatForest(model)
+        self.forest_evaluator, self.model, self.model_info = evaluator, model, info
+
+    def _publish_model(self, model, training_data=None):
+        # Observed training data becomes the reference distribution for drift detection;
+        # synthetic data is on another scale than live readings, so it keeps the current one
+        with self._window_lock:
+            if training_data is not None:
+                self.drift_detector = PSIDriftDetector(training_data[:, DRIFT_FEATURES], window=self.window_size)
+            detector = self.drift_detector
+        info = self.model_store.save(model, self.schema_hash, {
+            'features': list(FEATURES),
+            'drift_reference': detector.state() if detector is not None else None
+        })
+        self._swap_model(model, info)
+
+    def _window_training_data(self):
+        # Called with the window lock held; None until the window can train a model
+        if len(self.equipment_data) < self.drift_min_samples:
+            return None
+        _, values = self.equipment_data.window()
+        X = values.T.copy()
+        y = label_readings(X)
+        if np.unique(y).shape[0] < 2:
+            return None
+        return X, y
+
+    def _retrain(self):
+        try:
+            with self._window_lock:
+                window = self._window_training_data()
+            if window is None:
+                X, y = self._synthetic_training_data()
+                self._publish_model(self.train_model(X, y))
+            else:
+                X, y = window
+                self._publish_model(self.train_model(X, y), X)
+            self.logger.info("Background retraining finished, new model swapped in")
+        except Exception:
+            self.logger.exception("Background retraining failed, keeping current model")
+
+    def retrain_async(self):
+        """
+        Retrain in a background thread and swap the model in when done. Trains on the
+        observed window once it holds enough readings, on synthetic data before that.
+
+        Returns:
+            bool: False if a retraining run is already in progress
+        """
+        with self._retrain_lock:
+            if self._retrain_thread and self._retrain_thread.is_alive() or self.retraining_metrics['retrain_in_progress']:
+                return False
+            self._retrain_thread = threading.Thread(target=self._retrain, name='MaintenanceRetrain', daemon=True)
+            self._retrain_thread.start()
+            return True
+
+    def _claim_drift_retrain(self):
+        # Called with the window lock held; returns the window to train on, or None
+        if self.retraining_metrics['retrain_in_progress'] or (self._retrain_thread and self._retrain_thread.is_alive()):
+            return None
+        if time.monotonic() - self._last_retrain_started < self.retrain_cooldown:
+            return None
+        window = self._window_training_data()
+        if window is None:
+            self.logger.info("Drift detected but the window has a single class, skipping retraining")
+            return None
+        self._last_retrain_started = time.monotonic()
+        self.retraining_metrics['retrain_in_progress'] = True
+        self.logger.info(f"Drift score {self.retraining_metrics['last_drift_score']:.3f} exceeds "
+                         f"{self.drift_threshold}, retraining on {window[0].shape[0]} samples in a worker process")
+        return window
+
+    def _submit_retrain(self, X, y):
+        # Called without the window lock: a future that is already done runs its callback
+        # inline, and publishing the model takes the lock
+        started = time.perf_counter()
+        try:
+            if self._retrain_executor is None:
+                # Spawned rather than forked: the server process has live threads
+                self._retrain_executor = ProcessPoolExecutor(max_workers=1,
+                                                             mp_context=multiprocessing.get_context('spawn'))
+            future = self._retrain_executor.submit(_fit_forest, self._build_model().get_params(), X, y)
+        except BrokenProcessPool:
+            self.logger.exception("Retraining worker pool is broken, keeping current model")
+            self._retrain_executor = None
+            self.retraining_metrics['retrain_in_progress'] = False
+            return
+        future.add_done_callback(lambda future: self._on_retrain_done(future, X, started))
+
+    def _on_retrain_done(self, future, X, started):
+        duration = time.perf_counter() - started
+        metrics = self.retraining_metrics
+        try:
+            self._publish_model(future.result(), X)
+            metrics['retrain_count'] += 1
+            metrics['last_retrain_seconds'] = duration
+            metrics['total_retrain_seconds'] += duration
+            metrics['last_retrain_at'] = datetime.now().isoformat()
+            self.logger.info(f"Drift retraining finished in {duration:.2f}s, new model swapped in")
+        except BrokenProcessPool:
+            self.logger.exception("Retraining worker died, keeping current model")
+            self._retrain_executor = None
+        except Exception:
+            self.logger.exception("Drift retraining failed, keeping current model")
+        finally:
+            metrics['retrain_in_progress'] = False
+
+    def observe(self, data):
+        """
+        Add one sensor reading to the sliding window and retrain in the background on drift.
+
+        Args:
+            data (dict): Reading with one value per feature
+        """
+        row = [data[feature] for feature in FEATURES]
+        now = time.time()
+        self.feature_store.update_one(self.device_id, now, [data[field] for field in SENSOR_FIELDS])
+        with self._window_lock:
+            self.equipment_data.append(now, row)
+            if self.drift_detector is None:
+                # Until a model is trained on observed data, the first full window is the reference
+                if len(self.equipment_data) == self.window_size:
+                    _, values = self.equipment_data.window()
+                    self.drift_detector = PSIDriftDetector(values.T[:, DRIFT_FEATURES], window=self.window_size)
+                return
+            self.drift_detector.update(row[DRIFT_FEATURES])
+            if self.drift_detector.size < self.drift_min_samples:
+                return
+            drift = float(self.drift_detector.scores().max())
+            self.retraining_metrics['last_drift_score'] = drift
+            window = self._claim_drift_retrain() if drift > self.drift_threshold else None
+        if window is not None:
+            self._submit_retrain(*window)
+
+    def update_equipment(self, records):
+        """
+        Update the equipment registry and the rolling features of every device with a full reading.
+
+        Args:
+            records (list): Dicts with ``equipment_id`` and sensor fields
+
+        Returns:
+            int: Number of records applied
+        """
+        updated = self.equipment_registry.upsert(records)
+        # One reading per device per update; later records for the same device win
+        complete = {record['equipment_id']: record for record in records
+                    if all(record.get(field) is not None for field in SENSOR_FIELDS)}
+        if complete:
+            self.feature_store.update(list(complete), np.full(len(complete), time.time()),
+                                      [[record[field] for field in SENSOR_FIELDS] for record in complete.values()])
+        return updated
 
     def collect_equipment_data(self):
         # Simulate equipment sensor data
-        return {
+        data = {
             'temperature': np.random.normal(45, 5),  # Normal operating temp around 45°C
             'vibration': np.random.normal(0.5, 0.1),  # Normal vibration level
             'power_consumption': np.random.normal(100, 10),  # Power usage in watts
             'uptime_hours': (datetime.now() - self.last_maintenance).total_seconds() / 3600
         }
+        self.observe(data)
+        return data
 
-    def train_model(self):
+    def _synthetic_training_data(self):
         # Simulate historical data for training
         X = np.random.rand(1000, 4)  # Features: temp, vibration, power, uptime
         y = (X[:, 0] * 0.3 + X[:, 1] * 0.3 + X[:, 2] * 0.2 + X[:, 3] * 0.2 > 0.6).astype(int)
-        self.model.fit(X, y)
+        return X, y
+
+    def train_model(self, X=None, y=None):
+        if X is None:
+            X, y = self._synthetic_training_data()
+        model = self._build_model()
+        model.fit(X, y)
+        return model
 
     def predict_failure_probability(self, data):
-        features = np.array([[data['temperature'],
-                            data['vibration'],
-                            data['power_consumption'],
-                            data['uptime_hours']]])
-        return self.model.predict_proba(features)[0][1]
+        features = np.array([[data[feature] for feature in FEATURES]])
+        return float(self.forest_evaluator.predict_proba(features)[0])
 
     def get_predictions(self):
-        if not self.model.n_features_in_:
-            self.train_model()
-
         current_data = self.collect_equipment_data()
         failure_prob = self.predict_failure_probability(current_data)
 
-        # Calculate estimated time to failure
+        return {
+            'current_status': current_data,
+            'failure_probability': failure_prob,
+            'estimated_time_to_failure': self.estimate_time_to_failure(failure_prob),
+            'recommended_actions': self.get_recommended_actions(failure_prob),
+            'rolling_features': self.feature_store.get_features(self.device_id),
+            'model_info': self.model_info,
+            'model_metrics': {**self.retraining_metrics, 'window_samples': len(self.equipment_data)}
+        }
+
+    def estimate_time_to_failure(self, failure_prob):
         if failure_prob > 0.7:
-            time_to_failure = "Less than 24 hours"
+            return "Less than 24 hours"
         elif failure_prob > 0.5:
-            time_to_failure = "1-3 days"
+            return "1-3 days"
         elif failure_prob > 0.3:
-            time_to_failure = "3-7 days"
+            return "3-7 days"
+        else:
+            return "More than 7 days"
+
+    def rank_equipment(self, limit=100):
+        """
+        Score every registered device in one vectorized pass and rank by failure probability.
+
+        Args:
+            limit (int): Number of highest-risk devices to return
+
+        Returns:
+            dict: Ranked devices and a fleet-wide risk summary
+        """
+        positions, features = self.equipment_registry.feature_matrix()
+        if positions.shape[0] == 0:
+            probabilities = np.empty(0)
         else:
-            time_to_failure = "More than 7 days"
+            probabilities = self.forest_evaluator.predict_proba(features)
+
+        # Only the top `limit` devices need a full sort
+        limit = max(0, min(int(limit), probabilities.shape[0]))
+        top = np.argpartition(-probabilities, limit - 1)[:limit] if limit else np.empty(0, dtype=np.int64)
+        top = top[np.argsort(-probabilities[top], kind='stable')]
+
+        ranked = self.equipment_registry.describe(positions[top])
+        for device, probability in zip(ranked, probabilities[top]):
+            device['failure_probability'] = float(probability)
+            device['estimated_time_to_failure'] = self.estimate_time_to_failure(probability)
 
         return {
-            'current_status': current_data,
-            'failure_probability': failure_prob,
-            'estimated_time_to_failure': time_to_failure,
-            'recommended_actions': self.get_recommended_actions(failure_prob)
+            'total_devices': len(self.equipment_registry),
+            'scored_devices': int(positions.shape[0]),
+            'risk_summary': {
+                'critical': int((probabilities > 0.7).sum()),
+                'high': int(((probabilities > 0.5) & (probabilities <= 0.7)).sum()),
+                'medium': int(((probabilities > 0.3) & (probabilities <= 0.5)).sum()),
+                'low': int((probabilities <= 0.3).sum())
+            },
+            'ranked_equipment': ranked
         }
 
     def get_recommended_actions(self, failure_prob):
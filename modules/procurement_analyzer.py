@@ -1,33 +1,83 @@
+import os
 import numpy as np
 from datetime import datetime
 from sklearn.ensemble import RandomForestRegressor
+from modules.vendor_index import VendorIndex, VENDOR_METRICS
+from modules.rollout_simulator import RolloutSimulator
+from modules.regulation_index import RegulationIndex
+from modules.procurement_pool import ProcurementPool
 
-class ProcurementAnalyzer:
-    def __init__(self):
-        self.vendor_model = RandomForestRegressor(n_estimators=100)
-        self.policy_database = {}
-        self.vendor_database = {}
-        self.contract_history = []
+RISK_FACTORS = [
+    'Licensing requirements',
+    'Environmental regulations',
+    'Infrastructure sharing mandates',
+    'Service quality standards'
+]
+DEFAULT_REGULATION_INDEX_PATH = os.environ.get('REGULATION_INDEX_PATH', os.path.join(
+    os.path.dirname(os.path.dirname(__file__)), 'artifacts', 'regulation_index.joblib'))
 
-    def analyze_local_regulations(self, region_data):
-        # Simulate regulation analysis
-        compliance_score = np.random.normal(0.75, 0.1)
-        risk_factors = [
-            'Licensing requirements',
-            'Environmental regulations',
-            'Infrastructure sharing mandates',
-            'Service quality standards'
-        ]
-        
-        return {
-            'compliance_score': min(1.0, max(0.0, compliance_score)),
-            'key_regulations': risk_factors,
-            'risk_assessment': {
-                factor: np.random.normal(0.5, 0.2) for factor in risk_factors
+RECOMMENDATIONS = [
+    {
+        'category': 'Policy Compliance',
+        'action': 'Update licensing documentation',
+        'priority': 'High'
+    },
+    {
+        'category': 'Vendor Selection',
+        'action': 'Initiate technical capability assessment',
+        'priority': 'Medium'
+    },
+    {
+        'category': 'Contract Management',
+        'action': 'Renegotiate SLA terms',
+        'priority': 'High'
+    }
+]
+
+# The analyses below only need the regulation index, so batch workers call them
+# without building a ProcurementAnalyzer
+
+def analyze_regulations(policy_database, region_data):
+    region_data = region_data or {}
+    risk_factors = region_data.get('risk_factors') or RISK_FACTORS
+    if region_data.get('region'):
+        # Rank the region's indexed regulations against each risk factor
+        matches = {
+            factor: policy_database.search(factor, regions=region_data['region'],
+                                           categories=region_data.get('categories'), k=5)
+            for factor in risk_factors
+        }
+        if any(matches.values()):
+            top_scores = {factor: hits[0]['score'] if hits else 0.0 for factor, hits in matches.items()}
+            strongest = max(top_scores.values())
+            hits = sorted((hit for factor_hits in matches.values() for hit in factor_hits),
+                          key=lambda hit: -hit['score'])
+            return {
+                # No compliance records are indexed yet, so the score is still simulated
+                'compliance_score': min(1.0, max(0.0, np.random.normal(0.75, 0.1))),
+                'key_regulations': list(dict.fromkeys(hit['title'] for hit in hits)),
+                # Relative weight of the region's regulation on each factor
+                'risk_assessment': {factor: score / strongest for factor, score in top_scores.items()},
+                'regulation_matches': matches
             }
+
+    # Simulate regulation analysis
+    compliance_score = np.random.normal(0.75, 0.1)
+    
+    return {
+        'compliance_score': min(1.0, max(0.0, compliance_score)),
+        'key_regulations': risk_factors,
+        'risk_assessment': {
+            factor: np.random.normal(0.5, 0.2) for factor in risk_factors
         }
+    }
 
-    def evaluate_vendor(self, vendor_data):
+def evaluate_vendor_metrics(vendor_data, evaluation_metrics=None):
+    vendor_data = vendor_data or {}
+    # Prefer the indexed record (only its known metrics), then metrics supplied by the caller
+    if not evaluation_metrics and all(metric in vendor_data for metric in VENDOR_METRICS):
+        evaluation_metrics = {metric: float(vendor_data[metric]) for metric in VENDOR_METRICS}
+    if not evaluation_metrics:
         # Simulate vendor evaluation metrics
         evaluation_metrics = {
             'technical_capability': np.random.normal(0.8, 0.1),
@@ -35,93 +85,165 @@ class ProcurementAnalyzer:
             'past_performance': np.random.normal(0.75, 0.12),
             'support_quality': np.random.normal(0.8, 0.1)
         }
-        
-        overall_score = sum(evaluation_metrics.values()) / len(evaluation_metrics)
-        
-        return {
-            'vendor_metrics': evaluation_metrics,
-            'overall_score': overall_score,
-            'recommendation': 'Recommended' if overall_score > 0.7 else 'Need Further Review'
-        }
+    
+    overall_score = sum(evaluation_metrics.values()) / len(evaluation_metrics)
+    
+    return {
+        'vendor_metrics': evaluation_metrics,
+        'overall_score': overall_score,
+        'recommendation': 'Recommended' if overall_score > 0.7 else 'Need Further Review'
+    }
 
-    def optimize_contract_terms(self, contract_data):
-        # Analyze and optimize contract terms
-        standard_terms = {
-            'duration': '36 months',
-            'sla_uptime': '99.9%',
-            'response_time': '4 hours',
-            'penalty_clauses': 'Standard',
-            'scalability_options': 'Included'
-        }
-        
-        optimization_suggestions = [
-            {
-                'term': 'Contract Duration',
-                'current': standard_terms['duration'],
-                'suggested': '48 months',
-                'impact': 'Cost reduction of 15%'
-            },
-            {
-                'term': 'SLA Requirements',
-                'current': standard_terms['sla_uptime'],
-                'suggested': '99.95%',
-                'impact': 'Improved service reliability'
-            }
-        ]
-        
-        return {
-            'standard_terms': standard_terms,
-            'optimization_suggestions': optimization_suggestions,
-            'estimated_savings': np.random.normal(20, 5)  # Percentage
+def optimize_contract_terms(contract_data):
+    # Analyze and optimize contract terms
+    standard_terms = {
+        'duration': '36 months',
+        'sla_uptime': '99.9%',
+        'response_time': '4 hours',
+        'penalty_clauses': 'Standard',
+        'scalability_options': 'Included'
+    }
+    
+    optimization_suggestions = [
+        {
+            'term': 'Contract Duration',
+            'current': standard_terms['duration'],
+            'suggested': '48 months',
+            'impact': 'Cost reduction of 15%'
+        },
+        {
+            'term': 'SLA Requirements',
+            'current': standard_terms['sla_uptime'],
+            'suggested': '99.95%',
+            'impact': 'Improved service reliability'
         }
+    ]
+    
+    return {
+        'standard_terms': standard_terms,
+        'optimization_suggestions': optimization_suggestions,
+        'estimated_savings': np.random.normal(20, 5)  # Percentage
+    }
 
-    def forecast_rollout_impact(self, project_data):
-        # Predict rollout timeline and impact
+def forecast_rollout(project_data):
+    # Predict rollout timeline and impact
+    project_data = project_data or {}
+    if project_data.get('tasks'):
+        # Monte Carlo critical-path analysis over the task dependency graph
+        schedule = RolloutSimulator(project_data['tasks']).simulate(
+            simulations=project_data.get('simulations', 10000), seed=project_data.get('seed'))
+        timeline_factors = {
+            'p10_completion': schedule['portfolio_completion']['p10_days'],  # days
+            'p50_completion': schedule['portfolio_completion']['p50_days'],  # days
+            'p90_completion': schedule['portfolio_completion']['p90_days']  # days
+        }
+        total_duration = schedule['portfolio_completion']['p50_days']
+    else:
+        schedule = None
         timeline_factors = {
             'procurement_phase': np.random.normal(60, 10),  # days
             'implementation_phase': np.random.normal(90, 15),  # days
             'testing_phase': np.random.normal(30, 5)  # days
         }
-        
-        impact_metrics = {
-            'coverage_increase': np.random.normal(40, 10),  # percentage
-            'service_quality_improvement': np.random.normal(35, 8),  # percentage
-            'cost_efficiency_gain': np.random.normal(25, 5)  # percentage
-        }
-        
-        return {
-            'estimated_timeline': timeline_factors,
-            'total_duration': sum(timeline_factors.values()),
-            'impact_assessment': impact_metrics,
-            'sustainability_score': np.random.normal(0.8, 0.1)
-        }
+        total_duration = sum(timeline_factors.values())
+    
+    impact_metrics = {
+        'coverage_increase': np.random.normal(40, 10),  # percentage
+        'service_quality_improvement': np.random.normal(35, 8),  # percentage
+        'cost_efficiency_gain': np.random.normal(25, 5)  # percentage
+    }
+    
+    forecast = {
+        'estimated_timeline': timeline_factors,
+        'total_duration': total_duration,
+        'impact_assessment': impact_metrics,
+        'sustainability_score': np.random.normal(0.8, 0.1)
+    }
+    if schedule is not None:
+        forecast['schedule_simulation'] = schedule
+    return forecast
+
+def procurement_analysis(policy_database, region_data=None, vendor_data=None, contract_data=None, project_data=None):
+    return {
+        'regulation_analysis': analyze_regulations(policy_database, region_data),
+        'vendor_evaluation': evaluate_vendor_metrics(vendor_data),
+        'contract_optimization': optimize_contract_terms(contract_data),
+        'rollout_forecast': forecast_rollout(project_data),
+        # Generate overall recommendations
+        'recommendations': RECOMMENDATIONS
+    }
+
+class ProcurementAnalyzer:
+    def __init__(self, vendor_database_path=None, regulation_corpus_path=None,
+                 regulation_index_path=DEFAULT_REGULATION_INDEX_PATH, batch_workers=None):
+        self.vendor_model = RandomForestRegressor(n_estimators=100)
+        self.policy_database = RegulationIndex(regulation_index_path)
+        self.vendor_database = VendorIndex()
+        self.contract_history = []
+        # Batch workers read the persisted regulation index; vendor metrics are resolved before dispatch
+        self.batch_pool = ProcurementPool(regulation_index_path, max_workers=batch_workers)
+        if vendor_database_path:
+            self.vendor_database.load_csv(vendor_database_path)
+        if regulation_corpus_path:
+            # Only new, modified or deleted files are reindexed
+            changes = self.policy_database.sync(regulation_corpus_path)
+            if changes['added'] or changes['updated'] or changes['removed']:
+                self.policy_database.save()
+
+    def add_regulations(self, documents):
+        added = self.policy_database.add_documents(documents)
+        # Bursts of additions are written to disk once
+        self.policy_database.schedule_save()
+        return {'indexed': added, 'documents': len(self.policy_database)}
+
+    def search_regulations(self, query, region=None, category=None, k=10):
+        return self.policy_database.search(query, regions=region, categories=category, k=k)
+
+    def analyze_local_regulations(self, region_data):
+        return analyze_regulations(self.policy_database, region_data)
+
+    def evaluate_vendor(self, vendor_data):
+        vendor_id = vendor_data.get('vendor_id') if isinstance(vendor_data, dict) else None
+        return evaluate_vendor_metrics(vendor_data, self.vendor_database.get(vendor_id))
+
+    def rank_vendors(self, weights=None, k=10, region=None, category=None, certifications=None):
+        # Ranked shortlist from the vendor index; filters accept one value or a list
+        ranking = self.vendor_database.top_k(weights=weights, k=k, regions=region,
+                                             categories=category, certifications=certifications)
+        for vendor in ranking['vendors']:
+            vendor['recommendation'] = 'Recommended' if vendor['score'] > 0.7 else 'Need Further Review'
+        return ranking
+
+    def optimize_contract_terms(self, contract_data):
+        return optimize_contract_terms(contract_data)
+
+    def simulate_rollout(self, tasks, simulations=10000, seed=None, top_tasks=20):
+        # Monte Carlo critical-path analysis over a task dependency graph
+        return RolloutSimulator(tasks).simulate(simulations=simulations, seed=seed, top_tasks=top_tasks)
+
+    def forecast_rollout_impact(self, project_data):
+        return forecast_rollout(project_data)
+
+    def analyze_batch(self, items):
+        # Generator of JSON lines, one per item, in completion order
+        # Workers read the index file, so documents added since the last save are written first
+        self.policy_database.save_pending()
+
+        def resolved():
+            for item in items:
+                vendor_data = item.get('vendor_data')
+                metrics = self.vendor_database.get(vendor_data.get('vendor_id')) if isinstance(vendor_data, dict) else None
+                if metrics is not None:
+                    item = {**item, 'vendor_data': {**vendor_data, **metrics}}
+                yield item
+        return self.batch_pool.analyze(resolved())
 
     def get_analysis(self, region_data=None, vendor_data=None, contract_data=None, project_data=None):
-        analysis_results = {
+        return {
             'regulation_analysis': self.analyze_local_regulations(region_data),
             'vendor_evaluation': self.evaluate_vendor(vendor_data),
             'contract_optimization': self.optimize_contract_terms(contract_data),
-            'rollout_forecast': self.forecast_rollout_impact(project_data)
+            'rollout_forecast': self.forecast_rollout_impact(project_data),
+            # Generate overall recommendations
+            'recommendations': RECOMMENDATIONS
         }
-        
-        # Generate overall recommendations
-        recommendations = [
-            {
-                'category': 'Policy Compliance',
-                'action': 'Update licensing documentation',
-                'priority': 'High'
-            },
-            {
-                'category': 'Vendor Selection',
-                'action': 'Initiate technical capability assessment',
-                'priority': 'Medium'
-            },
-            {
-                'category': 'Contract Management',
-                'action': 'Renegotiate SLA terms',
-                'priority': 'High'
-            }
-        ]
-        
-        analysis_results['recommendations'] = recommendations
-        return analysis_results
\ No newline at end of file
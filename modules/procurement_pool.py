@@ -0,0 +1,137 @@
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from modules.metrics_stream import _to_json
+
+BATCH_FIELDS = ('region_data', 'vendor_data', 'contract_data', 'project_data')
+
+_worker_index = None
+_worker_index_path = None
+_worker_index_version = None
+_worker_analysis = None
+
+def _index_version(path):
+    # Saves replace the file atomically, so a new mtime means a complete new index
+    try:
+        return os.stat(path).st_mtime_ns if path else None
+    except FileNotFoundError:
+        return None
+
+def _init_worker(regulation_index_path):
+    # Runs once per worker process: only the persisted regulation index is opened
+    global _worker_index_path, _worker_analysis
+    from modules.procurement_analyzer import procurement_analysis
+    _worker_index_path = regulation_index_path
+    _worker_analysis = procurement_analysis
+    _load_index()
+
+def _load_index():
+    global _worker_index, _worker_index_version
+    from modules.regulation_index import RegulationIndex
+    _worker_index_version = _index_version(_worker_index_path)
+    _worker_index = RegulationIndex(_worker_index_path)
+
+def _analyze_chunk(chunk):
+    # Pick up regulations saved by the server since this worker last loaded the index
+    if _index_version(_worker_index_path) != _worker_index_version:
+        _load_index()
+    # Results are serialized in the worker so the server process only forwards lines
+    lines = []
+    for index, item in chunk:
+        try:
+            result = {'index': index, **_worker_analysis(_worker_index, **item)}
+        except Exception as e:
+            result = {'index': index, 'error': str(e)}
+        lines.append(json.dumps(result, default=_to_json, separators=(',', ':')))
+    return lines
+
+class ProcurementPool:
+    """
+    Process pool for batches of independent procurement analyses.
+
+    Items are sent to the workers in chunks and results come back per chunk
+    in completion order. At most ``max_in_flight`` chunks are submitted at a
+    time and more are only submitted as the consumer reads results, so a slow
+    client throttles the batch instead of results piling up in memory.
+    """
+    def __init__(self, regulation_index_path=None, max_workers=None, chunk_size=16, max_in_flight=None):
+        """
+        Initialize the pool; worker processes start with the first batch.
+
+        Args:
+            regulation_index_path (str): Persisted regulation index the workers open
+            max_workers (int): Worker processes, defaults to the CPU count
+            chunk_size (int): Items per task sent to a worker
+            max_in_flight (int): Chunks submitted but not yet read, defaults to twice the workers
+        """
+        self.regulation_index_path = regulation_index_path
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self.max_in_flight = max_in_flight or 2 * self.max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Spawned rather than forked: the server process has live threads,
+                # and each worker gets its own fresh random state
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context('spawn'),
+                                                     initializer=_init_worker, initargs=(self.regulation_index_path,))
+            return self._executor
+
+    def analyze(self, items):
+        """
+        Analyze items in the worker processes.
+
+        Args:
+            items (iterable): Dicts with any of BATCH_FIELDS
+
+        Yields:
+            str: One JSON document per item, with its position in ``index``, in completion order
+        """
+        executor = self._get_executor()
+        chunks = self._chunks(items)
+        pending = set()
+        try:
+            for chunk in islice(chunks, self.max_in_flight):
+                pending.add(executor.submit(_analyze_chunk, chunk))
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for line in future.result():
+                        yield line
+                    # Refill only after the consumer has taken this chunk's results
+                    for chunk in islice(chunks, 1):
+                        pending.add(executor.submit(_analyze_chunk, chunk))
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            raise
+        finally:
+            # Consumer went away or a worker failed: drop what has not started
+            for future in pending:
+                future.cancel()
+
+    def _chunks(self, items):
+        chunk = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                raise ValueError(f"Batch item {index} is not an object")
+            chunk.append((index, {field: item.get(field) for field in BATCH_FIELDS}))
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
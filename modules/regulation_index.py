@@ -0,0 +1,335 @@
+import atexit
+import logging
+import math
+import os
+import re
+import tempfile
+import threading
+import uuid
+from array import array
+import joblib
+import numpy as np
+
+DOCUMENT_EXTENSIONS = ('.txt', '.md')
+GENERAL_CATEGORY = 'general'
+INDEX_VERSION = 1
+# Seconds a run of changes is collected before the index file is rewritten
+SAVE_DELAY = 2.0
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'in', 'is', 'it', 'of', 'on',
+    'or', 'shall', 'that', 'the', 'this', 'to', 'with'
+))
+
+def tokenize(text):
+    """Lowercased alphanumeric tokens without stopwords."""
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+class RegulationIndex:
+    """
+    Incremental inverted index with BM25 ranking over regulation documents.
+
+    Each term keeps compact postings (document numbers and term frequencies in
+    typed arrays that only grow at the end), so adding a document touches only
+    its own terms. Replaced or deleted documents are tombstoned and dropped
+    from the postings once they make up a quarter of the index. Region and
+    category are integer codes per document, so filters are array masks over
+    the candidate set instead of document scans.
+    """
+    def __init__(self, path=None, k1=1.5, b=0.75):
+        """
+        Open an index, loading it from ``path`` when the file exists.
+
+        Args:
+            path (str): Persisted index file; None keeps the index in memory only
+            k1 (float): BM25 term frequency saturation
+            b (float): BM25 document length normalization
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.logger = logging.getLogger("ProcurementAnalyzer")
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._save_timer = None
+        self._reset()
+        if path and os.path.exists(path):
+            self._load()
+
+    def _reset(self):
+        self.doc_ids = []
+        self.titles = []
+        self._number = {}  # doc_id -> document number
+        self._sources = {}  # corpus file doc_id -> (mtime, size)
+        self.vocabulary = {'region': {}, 'category': {}}
+        self.region = array('I')
+        self.category = array('I')
+        self.length = array('I')
+        self.live = array('b')
+        self.live_count = 0
+        self.live_length = 0
+        self.postings = {}  # term -> (document numbers, term frequencies)
+
+    def __len__(self):
+        return self.live_count
+
+    def _load(self):
+        try:
+            state = joblib.load(self.path)
+        except Exception as e:
+            # Unreadable indexes are rebuilt from the corpus
+            self.logger.error(f"Could not load regulation index {self.path}: {str(e)}")
+            return
+        if not isinstance(state, dict) or state.get('version') != INDEX_VERSION:
+            return
+        for name in ('doc_ids', 'titles', '_number', '_sources', 'vocabulary', 'region', 'category',
+                     'length', 'live', 'live_count', 'live_length', 'postings'):
+            setattr(self, name, state[name])
+
+    def save(self):
+        """Write the index atomically to its path."""
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            state = {name: getattr(self, name) for name in (
+                'doc_ids', 'titles', '_number', '_sources', 'vocabulary', 'region', 'category',
+                'length', 'live', 'live_count', 'live_length', 'postings')}
+            state['version'] = INDEX_VERSION
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.regulations-', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    joblib.dump(state, f)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+
+    def schedule_save(self, delay=SAVE_DELAY):
+        """
+        Save ``delay`` seconds after the first unsaved change, so a burst of
+        updates rewrites the index file once instead of once per update.
+        """
+        if not self.path:
+            return
+        with self._save_lock:
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(delay, self._scheduled_save)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+                # A daemon timer dies with the process, pending changes are written on exit instead
+                atexit.register(self.save_pending)
+
+    def _scheduled_save(self):
+        with self._save_lock:
+            if self._save_timer is None:
+                return  # save_pending() got there first
+            self._save_timer = None
+        atexit.unregister(self.save_pending)
+        self.save()
+
+    def save_pending(self):
+        """Write a scheduled save now, if one is waiting."""
+        with self._save_lock:
+            timer, self._save_timer = self._save_timer, None
+        if timer is not None:
+            timer.cancel()
+            atexit.unregister(self.save_pending)
+            self.save()
+
+    def _code(self, attribute, value):
+        vocabulary = self.vocabulary[attribute]
+        if value not in vocabulary:
+            vocabulary[value] = len(vocabulary)
+        return vocabulary[value]
+
+    def _remove(self, doc_id):
+        number = self._number.pop(doc_id, None)
+        if number is not None and self.live[number]:
+            self.live[number] = 0
+            self.live_count -= 1
+            self.live_length -= self.length[number]
+
+    def _add(self, doc_id, text, region, category, title):
+        self._remove(doc_id)
+        terms = {}
+        for token in tokenize(text):
+            terms[token] = terms.get(token, 0) + 1
+        number = len(self.doc_ids)
+        self._number[doc_id] = number
+        self.doc_ids.append(doc_id)
+        self.titles.append(title)
+        self.region.append(self._code('region', region))
+        self.category.append(self._code('category', category))
+        length = sum(terms.values())
+        self.length.append(length)
+        self.live.append(1)
+        self.live_count += 1
+        self.live_length += length
+        for term, frequency in terms.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = (array('I'), array('I'))
+            posting[0].append(number)
+            posting[1].append(frequency)
+
+    def add_documents(self, documents):
+        """
+        Index documents, replacing earlier versions with the same ``doc_id``.
+
+        Args:
+            documents (list): Dicts with ``text``, ``region`` and optionally ``category``,
+                ``doc_id`` and ``title`` (defaults to the first line of the text)
+
+        Returns:
+            int: Documents indexed
+        """
+        with self._lock:
+            for document in documents:
+                if not isinstance(document, dict) or not isinstance(document.get('text'), str) \
+                        or not document.get('region'):
+                    raise ValueError("Every document needs text and a region")
+            for document in documents:
+                text = document['text']
+                doc_id = str(document.get('doc_id') or f"doc-{uuid.uuid4().hex[:12]}")
+                title = document.get('title') or text.strip().split('\n', 1)[0][:200]
+                self._add(doc_id, text, str(document['region']),
+                          str(document.get('category') or GENERAL_CATEGORY), title)
+            self._compact_if_needed()
+        return len(documents)
+
+    def sync(self, directory):
+        """
+        Bring the index in line with a corpus laid out as ``<region>/<category>/<file>``
+        (files directly under a region get the general category). Only new or modified
+        files are read; files that disappeared are removed.
+
+        Returns:
+            dict: Counts of added, updated, removed and unchanged documents
+        """
+        counts = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+        seen = set()
+        with self._lock:
+            for root, _, files in os.walk(directory):
+                parts = os.path.relpath(root, directory).split(os.sep)
+                if parts == ['.']:
+                    continue  # regions are the top-level directories
+                region = parts[0]
+                category = parts[1] if len(parts) > 1 else GENERAL_CATEGORY
+                for name in files:
+                    if not name.lower().endswith(DOCUMENT_EXTENSIONS):
+                        continue
+                    path = os.path.join(root, name)
+                    doc_id = os.path.relpath(path, directory).replace(os.sep, '/')
+                    seen.add(doc_id)
+                    stat = os.stat(path)
+                    signature = (stat.st_mtime_ns, stat.st_size)
+                    previous = self._sources.get(doc_id)
+                    if previous == signature and doc_id in self._number:
+                        counts['unchanged'] += 1
+                        continue
+                    with open(path, encoding='utf-8', errors='ignore') as f:
+                        text = f.read()
+                    title = text.strip().split('\n', 1)[0].lstrip('# ')[:200] or name
+                    self._add(doc_id, text, region, category, title)
+                    self._sources[doc_id] = signature
+                    counts['updated' if previous else 'added'] += 1
+            for doc_id in [doc_id for doc_id in self._sources if doc_id not in seen]:
+                del self._sources[doc_id]
+                self._remove(doc_id)
+                counts['removed'] += 1
+            self._compact_if_needed()
+        self.logger.info(f"Synced regulation index with {directory}: {counts}")
+        return counts
+
+    def _compact_if_needed(self):
+        # Drop tombstoned documents once they are a quarter of the index
+        if len(self.doc_ids) - self.live_count <= len(self.doc_ids) // 4:
+            return
+        live = np.frombuffer(self.live, dtype=np.int8).astype(bool)
+        renumber = np.cumsum(live) - 1
+        keep = np.flatnonzero(live)
+        self.doc_ids = [self.doc_ids[i] for i in keep]
+        self.titles = [self.titles[i] for i in keep]
+        self._number = {doc_id: i for i, doc_id in enumerate(self.doc_ids)}
+        for name in ('region', 'category', 'length'):
+            setattr(self, name, array('I', np.asarray(getattr(self, name), dtype=np.uint32)[keep].tobytes()))
+        self.live = array('b', bytes([1]) * keep.shape[0])
+        postings = {}
+        for term, (numbers, frequencies) in self.postings.items():
+            numbers = np.asarray(numbers, dtype=np.uint32)
+            alive = live[numbers]
+            if alive.any():
+                postings[term] = (array('I', renumber[numbers[alive]].astype(np.uint32).tobytes()),
+                                  array('I', np.asarray(frequencies, dtype=np.uint32)[alive].tobytes()))
+        self.postings = postings
+
+    def search(self, query, regions=None, categories=None, k=10):
+        """
+        Rank documents against a query with BM25.
+
+        Args:
+            query (str): Free-text query
+            regions (str or list): Restrict to these regions
+            categories (str or list): Restrict to these categories
+            k (int): Results returned
+
+        Returns:
+            list: Dicts with doc_id, title, region, category and score, best first
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            if not self.live_count or not terms:
+                return []
+            n = len(self.doc_ids)
+            # Copies, so the typed arrays stay free to grow while results are used
+            length = np.asarray(self.length, dtype=np.float64)
+            live = np.asarray(self.live, dtype=bool)
+            allowed = live.copy()
+            for attribute, values in (('region', regions), ('category', categories)):
+                if values is None:
+                    continue
+                values = [values] if isinstance(values, str) else values
+                codes = [self.vocabulary[attribute][v] for v in values if v in self.vocabulary[attribute]]
+                allowed &= np.isin(np.asarray(getattr(self, attribute), dtype=np.int64), codes)
+            average_length = self.live_length / self.live_count or 1.0
+            scores = np.zeros(n)
+            for term in terms:
+                posting = self.postings.get(term)
+                if posting is None:
+                    continue
+                numbers = np.asarray(posting[0], dtype=np.intp)
+                frequencies = np.asarray(posting[1], dtype=np.float64)
+                # Document frequency over live documents only, tombstones would skew the idf
+                frequency = int(live[numbers].sum())
+                if frequency == 0:
+                    continue
+                idf = math.log(1 + (self.live_count - frequency + 0.5) / (frequency + 0.5))
+                norm = self.k1 * (1 - self.b + self.b * length[numbers] / average_length)
+                scores[numbers] += idf * frequencies * (self.k1 + 1) / (frequencies + norm)
+            scores[~allowed] = 0.0
+            matches = np.flatnonzero(scores > 0)
+            if k < matches.shape[0]:
+                matches = matches[np.argpartition(-scores[matches], k)[:k]]
+            matches = matches[np.argsort(-scores[matches], kind='stable')]
+            region_names = list(self.vocabulary['region'])
+            category_names = list(self.vocabulary['category'])
+            return [
+                {
+                    'doc_id': self.doc_ids[i],
+                    'title': self.titles[i],
+                    'region': region_names[self.region[i]],
+                    'category': category_names[self.category[i]],
+                    'score': float(scores[i])
+                }
+                for i in matches.tolist()
+            ]
+
+    def regions(self):
+        """Live document count per region."""
+        with self._lock:
+            live = np.asarray(self.live, dtype=bool)
+            counts = np.bincount(np.asarray(self.region, dtype=np.int64)[live], minlength=len(self.vocabulary['region']))
+            return {name: int(counts[code]) for name, code in self.vocabulary['region'].items() if counts[code]}
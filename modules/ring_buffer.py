@@ -0,0 +1,125 @@
+import math
+import numpy as np
+
+class ColumnarRingBuffer:
+    """
+    Fixed-capacity, NumPy-backed ring buffer storing one column per counter
+    alongside epoch-float timestamps.
+
+    Every sample is written twice (at ``i`` and ``i + capacity``), so the most
+    recent ``n`` samples are always one contiguous slice and window reads are
+    zero-copy views.
+    """
+    def __init__(self, columns, capacity=None, retention_seconds=None, sample_interval=1.0, dtype=np.int64):
+        """
+        Initialize the ring buffer with a retention given in samples or seconds.
+
+        Args:
+            columns (iterable): Column names, one per stored counter
+            capacity (int): Retention in samples
+            retention_seconds (float): Retention in seconds, used when capacity is not given
+            sample_interval (float): Expected seconds between samples, used with retention_seconds
+            dtype: NumPy dtype of the value columns
+        """
+        if capacity is None:
+            if retention_seconds is None:
+                raise ValueError("Either capacity or retention_seconds must be provided")
+            capacity = math.ceil(retention_seconds / sample_interval)
+        if capacity < 1:
+            raise ValueError("Ring buffer capacity must be at least 1")
+
+        self.columns = tuple(columns)
+        self._column_index = {name: i for i, name in enumerate(self.columns)}
+        self.capacity = int(capacity)
+        self.retention_seconds = retention_seconds
+        self.timestamps = np.zeros(2 * self.capacity, dtype=np.float64)
+        self.values = np.zeros((len(self.columns), 2 * self.capacity), dtype=dtype)
+        self._head = 0  # next write position in [0, capacity)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        return self.timestamps.nbytes + self.values.nbytes
+
+    def append(self, timestamp, values):
+        """
+        Append one sample in O(1).
+
+        Args:
+            timestamp (float): Epoch seconds
+            values (dict or sequence): Counter values keyed by column name or in column order
+        """
+        if isinstance(values, dict):
+            values = [values[name] for name in self.columns]
+        head = self._head
+        mirror = head + self.capacity
+        self.timestamps[head] = self.timestamps[mirror] = timestamp
+        self.values[:, head] = self.values[:, mirror] = values
+        self._head = (head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def extend(self, timestamps, values):
+        """
+        Append a batch of samples.
+
+        Args:
+            timestamps (array-like): Epoch seconds, shape (n,)
+            values (array-like): Counter values, shape (len(columns), n)
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values).reshape(len(self.columns), -1)
+        n = timestamps.shape[0]
+        if n == 0:
+            return
+        if n > self.capacity:
+            timestamps = timestamps[-self.capacity:]
+            values = values[:, -self.capacity:]
+            n = self.capacity
+
+        positions = (self._head + np.arange(n)) % self.capacity
+        self.timestamps[positions] = timestamps
+        self.timestamps[positions + self.capacity] = timestamps
+        self.values[:, positions] = values
+        self.values[:, positions + self.capacity] = values
+        self._head = (self._head + n) % self.capacity
+        self._size = min(self._size + n, self.capacity)
+
+    def _bounds(self, n):
+        end = self._head + self.capacity
+        return end - n, end
+
+    def window(self, samples=None, seconds=None):
+        """
+        Return zero-copy views over the most recent samples.
+
+        Args:
+            samples (int): Number of most recent samples to include
+            seconds (float): Only include samples newer than the latest timestamp minus this many seconds
+
+        Returns:
+            tuple: (timestamps, values) views; values has shape (len(columns), n)
+        """
+        n = self._size if samples is None else min(int(samples), self._size)
+        start, end = self._bounds(n)
+        if seconds is not None and n:
+            cutoff = self.timestamps[end - 1] - seconds
+            start += int(np.searchsorted(self.timestamps[start:end], cutoff, side='left'))
+        return self.timestamps[start:end], self.values[:, start:end]
+
+    def column(self, name, samples=None, seconds=None):
+        """Return a zero-copy view of one column over the requested window."""
+        _, values = self.window(samples=samples, seconds=seconds)
+        return values[self._column_index[name]]
+
+    def latest(self, count=1):
+        """
+        Return the newest ``count`` samples as (timestamps, values) views, oldest first.
+        """
+        return self.window(samples=count)
+
+    def clear(self):
+        self._head = 0
+        self._size = 0
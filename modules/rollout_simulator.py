@@ -0,0 +1,213 @@
+import numpy as np
+from datetime import date, timedelta
+
+# Upper bound on simulations per request; each one samples every task
+MAX_SIMULATIONS = 100000
+
+class RolloutSimulator:
+    """
+    Monte Carlo critical-path analysis for portfolios of rollout projects.
+
+    Tasks form a dependency graph (possibly across projects). The graph is
+    split into topological levels once; each simulation batch then samples
+    all task durations as one (tasks, simulations) array and propagates finish
+    times level by level with elementwise maxima over the incoming edges, so
+    the Python loop runs over levels, not over tasks or simulations.
+    Tasks sharing a vendor get a common, per-simulation delay factor.
+    """
+    def __init__(self, tasks, default_std_ratio=0.15, vendor_sigma=0.1):
+        """
+        Build the graph.
+
+        Args:
+            tasks (list): Dicts with ``task_id`` and ``duration`` (mean days) and optionally
+                ``duration_std``, ``project``, ``vendor`` and ``depends_on`` (list of task ids)
+            default_std_ratio (float): Duration standard deviation as a share of the mean when
+                ``duration_std`` is missing
+            vendor_sigma (float): Log-scale standard deviation of the shared vendor delay factor
+        """
+        if not isinstance(tasks, list) or not tasks:
+            raise ValueError("At least one task is required")
+        if not all(isinstance(task, dict) for task in tasks):
+            raise ValueError("Every task must be an object")
+        try:
+            self.task_ids = [task['task_id'] for task in tasks]
+            self.mean = np.array([float(task['duration']) for task in tasks])
+            # A missing or null duration_std falls back to the default ratio
+            self.std = np.array([float(default_std_ratio * mean if task.get('duration_std') is None
+                                       else task['duration_std']) for task, mean in zip(tasks, self.mean)])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("Every task needs a task_id and a numeric duration and duration_std")
+        # Ids are dictionary keys and come back in the results, so only JSON scalars are accepted
+        if not all(isinstance(task_id, (str, int)) for task_id in self.task_ids):
+            raise ValueError("task_id must be a string or an integer")
+        if len(set(self.task_ids)) != len(self.task_ids):
+            raise ValueError("Duplicate task_id values")
+        index = {task_id: i for i, task_id in enumerate(self.task_ids)}
+        if not (np.all(np.isfinite(self.mean)) and np.all(np.isfinite(self.std))):
+            raise ValueError("Durations and their standard deviations must be finite")
+        if np.any(self.mean < 0) or np.any(self.std < 0):
+            raise ValueError("Durations and their standard deviations must be non-negative")
+        self.mean, self.std = self.mean.astype(np.float32), self.std.astype(np.float32)
+        self.vendor_sigma = vendor_sigma
+
+        self.projects, self.project_of = np.unique([str(task.get('project', 'default')) for task in tasks],
+                                                   return_inverse=True)
+        vendors = [task.get('vendor') for task in tasks]
+        vendor_names = sorted({str(v) for v in vendors if v is not None})
+        vendor_index = {name: i for i, name in enumerate(vendor_names)}
+        # -1: no vendor, no shared delay
+        self.vendor_of = np.array([vendor_index[str(v)] if v is not None else -1 for v in vendors])
+        self.n_vendors = len(vendor_names)
+
+        src, dst = [], []
+        for i, task in enumerate(tasks):
+            dependencies = task.get('depends_on') or []
+            if not isinstance(dependencies, list):
+                raise ValueError(f"depends_on of task {task['task_id']} must be a list of task ids")
+            for dependency in dependencies:
+                if not isinstance(dependency, (str, int)) or dependency not in index:
+                    raise ValueError(f"Task {task['task_id']} depends on unknown task {dependency}")
+                src.append(index[dependency])
+                dst.append(i)
+        self.src = np.array(src, dtype=np.intp)
+        self.dst = np.array(dst, dtype=np.intp)
+        self.level = self._levels()
+        self._prepare_level_edges()
+
+    def _levels(self):
+        """Longest-path depth of every task (Kahn's algorithm, one frontier at a time)."""
+        n = len(self.task_ids)
+        indegree = np.bincount(self.dst, minlength=n)
+        order = np.argsort(self.src, kind='stable')
+        out_offsets = np.searchsorted(self.src[order], np.arange(n + 1))
+        level = np.zeros(n, dtype=np.intp)
+        frontier = np.flatnonzero(indegree == 0)
+        visited = 0
+        depth = 0
+        while frontier.shape[0]:
+            level[frontier] = depth
+            visited += frontier.shape[0]
+            edges = np.concatenate([order[out_offsets[t]:out_offsets[t + 1]] for t in frontier])
+            targets = self.dst[edges]
+            np.subtract.at(indegree, targets, 1)
+            frontier = np.unique(targets[indegree[targets] == 0])
+            depth += 1
+        if visited != n:
+            raise ValueError("Task dependencies contain a cycle")
+        return level
+
+    def _prepare_level_edges(self):
+        # Edges into each level split into "slots" so that no task repeats within a slot:
+        # slot k of the forward pass holds the k-th predecessor of every target, slot k of
+        # the backward pass the k-th successor of every source. Each slot is then one
+        # gather and one elementwise maximum (or OR) over whole simulation rows.
+        def slots(edges, key):
+            edges = edges[np.argsort(key[edges], kind='stable')]
+            group_start = np.searchsorted(key[edges], key[edges], side='left')
+            rank = np.arange(edges.shape[0]) - group_start
+            return [edges[rank == k] for k in range(int(rank.max()) + 1)]
+
+        edge_level = self.level[self.dst]
+        self.levels = []
+        for depth in range(1, int(self.level.max()) + 1):
+            edges = np.flatnonzero(edge_level == depth)
+            self.levels.append({
+                'targets': np.unique(self.dst[edges]),
+                'forward': [(self.src[e], self.dst[e]) for e in slots(edges, self.dst)],
+                'backward': [(self.src[e], self.dst[e]) for e in slots(edges, self.src)]
+            })
+
+        # A project ends with one of its tasks that has no successor in the same project
+        has_successor = np.zeros(len(self.task_ids), dtype=bool)
+        has_successor[self.src[self.project_of[self.src] == self.project_of[self.dst]]] = True
+        sinks = np.flatnonzero(~has_successor)
+        self.project_sinks = sinks[np.argsort(self.project_of[sinks], kind='stable')]
+        self.project_sink_starts = np.searchsorted(self.project_of[self.project_sinks], np.arange(len(self.projects)))
+
+    def _simulate_batch(self, rng, simulations):
+        # Task-major (tasks, simulations) arrays: every gather below copies whole contiguous rows
+        n = len(self.task_ids)
+        # float32 halves the memory traffic; day resolution needs nowhere near float64
+        durations = rng.standard_normal((n, simulations), dtype=np.float32)
+        durations *= self.std[:, None]
+        durations += self.mean[:, None]
+        np.maximum(durations, 0.0, out=durations)
+        if self.n_vendors:
+            factors = np.exp(self.vendor_sigma * rng.standard_normal((self.n_vendors, simulations), dtype=np.float32))
+            has_vendor = self.vendor_of >= 0
+            durations[has_vendor] *= factors[self.vendor_of[has_vendor]]
+
+        # Tasks without predecessors start at day 0
+        start = np.zeros((n, simulations), dtype=np.float32)
+        finish = durations
+        for level in self.levels:
+            for sources, targets in level['forward']:
+                start[targets] = np.maximum(start[targets], finish[sources])
+            finish[level['targets']] += start[level['targets']]
+
+        # Each project's critical path ends at its latest-finishing task
+        project_finish = np.maximum.reduceat(finish[self.project_sinks], self.project_sink_starts, axis=0)
+        critical = np.zeros((n, simulations), dtype=bool)
+        critical[self.project_sinks] = finish[self.project_sinks] == project_finish[self.project_of[self.project_sinks]]
+
+        # Walk back along binding edges (predecessor finish == task start), deepest level first
+        for level in reversed(self.levels):
+            for sources, targets in level['backward']:
+                critical[sources] |= critical[targets] & (finish[sources] == start[targets])
+        return project_finish.T, critical
+
+    def simulate(self, simulations=10000, seed=None, start_date=None, top_tasks=20, max_cells=5_000_000):
+        """
+        Run the Monte Carlo analysis.
+
+        Args:
+            simulations (int): Number of simulated rollouts, 1 to MAX_SIMULATIONS
+            seed (int): Seed for reproducible results
+            start_date (date): Portfolio start, defaults to today
+            top_tasks (int): Number of most-often-critical tasks reported
+            max_cells (int): Simulations x tasks evaluated per batch, bounding memory
+
+        Returns:
+            dict: Completion percentiles per project and for the portfolio, and the tasks most
+                often on a critical path
+        """
+        if isinstance(simulations, bool) or not isinstance(simulations, (int, np.integer)) \
+                or not 1 <= simulations <= MAX_SIMULATIONS:
+            raise ValueError(f"simulations must be an integer between 1 and {MAX_SIMULATIONS}")
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, (int, np.integer)) or seed < 0):
+            raise ValueError("seed must be a non-negative integer")
+        rng = np.random.default_rng(seed)
+        start_date = start_date or date.today()
+        batch = max(1, max_cells // len(self.task_ids))
+        finishes, critical_counts = [], np.zeros(len(self.task_ids), dtype=np.int64)
+        for offset in range(0, simulations, batch):
+            project_finish, critical = self._simulate_batch(rng, min(batch, simulations - offset))
+            finishes.append(project_finish)
+            critical_counts += critical.sum(axis=1)
+        project_finish = np.concatenate(finishes).astype(np.float64)
+        portfolio_finish = project_finish.max(axis=1)
+
+        def summary(days):
+            p10, p50, p90 = np.percentile(days, [10, 50, 90])
+            return {
+                'mean_days': float(days.mean()),
+                'p10_days': float(p10), 'p50_days': float(p50), 'p90_days': float(p90),
+                'p50_date': (start_date + timedelta(days=float(p50))).isoformat(),
+                'p90_date': (start_date + timedelta(days=float(p90))).isoformat()
+            }
+
+        frequency = critical_counts / simulations
+        top = np.argsort(-frequency, kind='stable')[:top_tasks]
+        return {
+            'simulations': simulations,
+            'tasks': len(self.task_ids),
+            'levels': len(self.levels) + 1,
+            'portfolio_completion': summary(portfolio_finish),
+            'project_completion': {str(name): summary(project_finish[:, p]) for p, name in enumerate(self.projects)},
+            'critical_tasks': [
+                {'task_id': self.task_ids[t], 'project': str(self.projects[self.project_of[t]]),
+                 'critical_frequency': float(frequency[t])}
+                for t in top if frequency[t] > 0
+            ]
+        }
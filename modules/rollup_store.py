@@ -0,0 +1,155 @@
+import threading
+import numpy as np
+from datetime import date, datetime
+
+# Granularity -> number of periods retained
+DEFAULT_RETENTION = {'daily': 90, 'weekly': 104, 'monthly': 36}
+
+def _period_index(granularity, when):
+    ordinal = when.toordinal()
+    if granularity == 'daily':
+        return ordinal
+    if granularity == 'weekly':
+        return (ordinal - 1) // 7  # date.fromordinal(1) is a Monday
+    if granularity == 'monthly':
+        return when.year * 12 + when.month - 1
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+def _period_label(granularity, index):
+    if granularity == 'daily':
+        return date.fromordinal(index).strftime('%Y-%m-%d')
+    if granularity == 'weekly':
+        year, week, _ = date.fromordinal(index * 7 + 1).isocalendar()
+        return f"{year}-W{week:02d}"
+    return f"{index // 12}-{index % 12 + 1:02d}"
+
+class RollupStore:
+    """
+    Fixed-size time rollups of a value stream (count, sum, min, max, sum of
+    squares per period and granularity), updated in O(1) per append so memory
+    stays constant however long the process runs.
+    """
+    def __init__(self, retention=None):
+        """
+        Initialize the store.
+
+        Args:
+            retention (dict): Granularity ('daily', 'weekly', 'monthly') -> periods kept
+        """
+        self.retention = dict(retention or DEFAULT_RETENTION)
+        self.version = 0  # Increments on every append; usable as a cache key
+        self._rollups = {}
+        self._lock = threading.Lock()
+        for granularity, size in self.retention.items():
+            self._rollups[granularity] = {
+                'period': np.full(size, -1, dtype=np.int64),
+                'count': np.zeros(size, dtype=np.int64),
+                'sum': np.zeros(size),
+                'min': np.full(size, np.inf),
+                'max': np.full(size, -np.inf),
+                'sum_squares': np.zeros(size)
+            }
+
+    def append(self, value, when=None):
+        """
+        Add one observation to every granularity.
+
+        Args:
+            value (float): Observed value
+            when (datetime): Observation time, defaults to now
+        """
+        when = when or datetime.now()
+        with self._lock:
+            for granularity, rollup in self._rollups.items():
+                period = _period_index(granularity, when)
+                slot = period % self.retention[granularity]
+                if rollup['period'][slot] != period:
+                    if rollup['period'][slot] > period:
+                        continue  # Older than anything retained at this granularity
+                    rollup['period'][slot] = period
+                    rollup['count'][slot] = 0
+                    rollup['sum'][slot] = 0.0
+                    rollup['min'][slot] = np.inf
+                    rollup['max'][slot] = -np.inf
+                    rollup['sum_squares'][slot] = 0.0
+                rollup['count'][slot] += 1
+                rollup['sum'][slot] += value
+                rollup['min'][slot] = min(rollup['min'][slot], value)
+                rollup['max'][slot] = max(rollup['max'][slot], value)
+                rollup['sum_squares'][slot] += value * value
+            self.version += 1
+
+    def series(self, granularity='daily', include_current=True, now=None):
+        """
+        Retained periods of one granularity in chronological order.
+
+        Args:
+            granularity (str): Rollup granularity
+            include_current (bool): Whether to include the period that is still in progress
+            now (datetime): Reference time for the current period
+
+        Returns:
+            dict: Arrays 'period', 'count', 'mean', 'min', 'max', 'variance' and a list of 'labels'
+        """
+        with self._lock:
+            rollup = {name: array.copy() for name, array in self._rollups[granularity].items()}
+        valid = rollup['period'] >= 0
+        if not include_current:
+            valid &= rollup['period'] < _period_index(granularity, now or datetime.now())
+        order = np.flatnonzero(valid)[np.argsort(rollup['period'][valid])]
+        count = rollup['count'][order]
+        mean = rollup['sum'][order] / count
+        return {
+            'period': rollup['period'][order],
+            'labels': [_period_label(granularity, int(p)) for p in rollup['period'][order]],
+            'count': count,
+            'mean': mean,
+            'min': rollup['min'][order],
+            'max': rollup['max'][order],
+            'variance': np.maximum(rollup['sum_squares'][order] / count - mean * mean, 0.0)
+        }
+
+    def trend(self, granularity=None):
+        """
+        Percentage change from the oldest to the newest retained period mean.
+
+        Args:
+            granularity (str): Rollup granularity; defaults to the coarsest one with two periods
+
+        Returns:
+            float: Percentage change, or None with fewer than two periods
+        """
+        candidates = [granularity] if granularity else list(reversed(self.retention))
+        for name in candidates:
+            series = self.series(name)
+            if series['mean'].shape[0] >= 2 and series['mean'][0] != 0:
+                return float((series['mean'][-1] - series['mean'][0]) / series['mean'][0] * 100)
+        return None
+
+    def summary(self):
+        """
+        Totals over every retained period, per granularity.
+
+        Returns:
+            dict: Periods, count, mean, min, max and standard deviation per granularity
+        """
+        with self._lock:
+            rollups = {g: {name: a.copy() for name, a in r.items()} for g, r in self._rollups.items()}
+        result = {}
+        for granularity, rollup in rollups.items():
+            valid = rollup['period'] >= 0
+            count = int(rollup['count'][valid].sum())
+            if count == 0:
+                result[granularity] = None
+                continue
+            mean = rollup['sum'][valid].sum() / count
+            variance = max(rollup['sum_squares'][valid].sum() / count - mean * mean, 0.0)
+            result[granularity] = {
+                'periods': int(valid.sum()),
+                'count': count,
+                'mean': float(mean),
+                'min': float(rollup['min'][valid].min()),
+                'max': float(rollup['max'][valid].max()),
+                'std': float(np.sqrt(variance))
+            }
+        return result
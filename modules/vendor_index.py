@@ -0,0 +1,230 @@
+import threading
+import numpy as np
+import pandas as pd
+
+VENDOR_METRICS = ('technical_capability', 'cost_efficiency', 'past_performance', 'support_quality')
+MAX_CERTIFICATIONS = 64
+
+class VendorIndex:
+    """
+    Columnar vendor table with per-attribute indexes for ranked shortlists.
+
+    Metrics are one float array per row, region and category are integer codes
+    with a CSR-style index (rows grouped by code, rebuilt lazily after writes),
+    and certifications are a 64-bit mask per row, so filters are index lookups
+    plus bitwise checks and scoring is one matrix-vector product over the subset.
+    """
+    def __init__(self, initial_capacity=1024):
+        self.vendor_ids = []
+        self.names = []
+        self._row = {}
+        self.vocabulary = {'region': {}, 'category': {}, 'certification': {}}
+        self.metrics = np.full((initial_capacity, len(VENDOR_METRICS)), np.nan)
+        self.region = np.zeros(initial_capacity, dtype=np.int32)
+        self.category = np.zeros(initial_capacity, dtype=np.int32)
+        self.certifications = np.zeros(initial_capacity, dtype=np.uint64)
+        self._postings = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.vendor_ids)
+
+    def _grow(self, needed):
+        capacity = self.metrics.shape[0]
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity)
+        count = len(self)
+        for name in ('metrics', 'region', 'category', 'certifications'):
+            array = getattr(self, name)
+            grown = np.full((capacity,) + array.shape[1:], np.nan) if name == 'metrics' else np.zeros(capacity, dtype=array.dtype)
+            grown[:count] = array[:count]
+            setattr(self, name, grown)
+
+    def _code(self, attribute, value):
+        vocabulary = self.vocabulary[attribute]
+        if value not in vocabulary:
+            if attribute == 'certification' and len(vocabulary) == MAX_CERTIFICATIONS:
+                raise ValueError(f"At most {MAX_CERTIFICATIONS} distinct certifications are supported")
+            vocabulary[value] = len(vocabulary)
+        return vocabulary[value]
+
+    def add(self, records):
+        """
+        Insert or update vendors.
+
+        Args:
+            records (list): Dicts with ``vendor_id``, ``region``, ``category``, the metrics in
+                VENDOR_METRICS (0-1, higher is better) and optionally ``name`` and
+                ``certifications`` (list, or a string separated by ';')
+
+        Returns:
+            int: Records applied
+        """
+        if not records:
+            return 0
+        try:
+            frame = pd.DataFrame.from_records(records)
+            ids = frame['vendor_id'].tolist()
+            regions, categories = frame['region'].astype(str).tolist(), frame['category'].astype(str).tolist()
+        except (KeyError, TypeError):
+            raise ValueError("Every vendor needs vendor_id, region and category")
+        # Ids are dictionary keys and come back in the results, so only JSON scalars are accepted
+        if not all(isinstance(vendor_id, (str, int)) and not isinstance(vendor_id, bool) for vendor_id in ids):
+            raise ValueError("vendor_id must be a string or an integer")
+        missing = [metric for metric in VENDOR_METRICS if metric not in frame.columns]
+        if missing:
+            raise ValueError(f"Missing vendor metrics: {', '.join(missing)}")
+        try:
+            metrics = frame[list(VENDOR_METRICS)].to_numpy(dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("Vendor metrics must be numeric")
+        # Vendors without a name (missing CSV cells are NaN) are listed under their id
+        names = frame['name'].where(frame['name'].notna(), frame['vendor_id']).tolist() if 'name' in frame.columns else ids
+        certifications = []
+        for value in (frame['certifications'].tolist() if 'certifications' in frame.columns else [None] * len(ids)):
+            if isinstance(value, str):
+                value = [part.strip() for part in value.split(';') if part.strip()]
+            elif not isinstance(value, (list, tuple)):
+                value = []
+            if not all(isinstance(certification, str) for certification in value):
+                raise ValueError("Certifications must be strings")
+            certifications.append(value)
+
+        with self._lock:
+            # Checked before any row is written, so a rejected batch leaves the table untouched
+            known = self.vocabulary['certification']
+            unseen = {certification for value in certifications for certification in value if certification not in known}
+            if len(known) + len(unseen) > MAX_CERTIFICATIONS:
+                raise ValueError(f"At most {MAX_CERTIFICATIONS} distinct certifications are supported")
+            new_ids = [vendor_id for vendor_id in dict.fromkeys(ids) if vendor_id not in self._row]
+            self._grow(len(self) + len(new_ids))
+            for vendor_id in new_ids:
+                self._row[vendor_id] = len(self.vendor_ids)
+                self.vendor_ids.append(vendor_id)
+                self.names.append(None)
+            rows = np.fromiter((self._row[vendor_id] for vendor_id in ids), dtype=np.intp, count=len(ids))
+            self.metrics[rows] = metrics
+            self.region[rows] = [self._code('region', value) for value in regions]
+            self.category[rows] = [self._code('category', value) for value in categories]
+            masks = []
+            for value in certifications:
+                mask = 0
+                for certification in value:
+                    mask |= 1 << self._code('certification', certification)
+                masks.append(mask)
+            self.certifications[rows] = np.array(masks, dtype=np.uint64)
+            for row, name in zip(rows.tolist(), names):
+                self.names[row] = name
+            self._postings = {}
+        return len(ids)
+
+    def load_csv(self, path, chunk_rows=100000):
+        """Load vendors from a CSV with the columns accepted by add()."""
+        added = 0
+        for chunk in pd.read_csv(path, chunksize=chunk_rows):
+            added += self.add(chunk.to_dict('records'))
+        return added
+
+    def _posting(self, attribute, codes):
+        """Rows whose attribute has any of the codes, from the lazily built CSR index."""
+        index = self._postings.get(attribute)
+        if index is None:
+            column = getattr(self, attribute)[:len(self)]
+            order = np.argsort(column, kind='stable')
+            offsets = np.searchsorted(column[order], np.arange(len(self.vocabulary[attribute]) + 1))
+            index = self._postings[attribute] = (order, offsets)
+        order, offsets = index
+        return np.sort(np.concatenate([order[offsets[c]:offsets[c + 1]] for c in codes]))
+
+    def filter(self, regions=None, categories=None, certifications=None):
+        """
+        Rows matching any of the regions, any of the categories and all of the certifications.
+
+        Returns:
+            np.ndarray: Row positions (unknown values match nothing)
+        """
+        with self._lock:
+            candidates = None
+            for attribute, values in (('region', regions), ('category', categories)):
+                if values is None:
+                    continue
+                values = [values] if isinstance(values, str) else values
+                # Repeated values would repeat rows and break the unique intersection below
+                codes = np.unique([self.vocabulary[attribute][v] for v in values if v in self.vocabulary[attribute]])
+                rows = self._posting(attribute, codes) if codes.shape[0] else np.empty(0, dtype=np.intp)
+                candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+            if candidates is None:
+                candidates = np.arange(len(self))
+            if certifications:
+                certifications = [certifications] if isinstance(certifications, str) else certifications
+                if any(c not in self.vocabulary['certification'] for c in certifications):
+                    return np.empty(0, dtype=np.intp)
+                required = np.uint64(sum(1 << self.vocabulary['certification'][c] for c in set(certifications)))
+                candidates = candidates[(self.certifications[candidates] & required) == required]
+            return candidates
+
+    def top_k(self, weights=None, k=10, regions=None, categories=None, certifications=None):
+        """
+        Highest weighted scores among the filtered vendors.
+
+        Args:
+            weights (dict): Metric -> weight (normalized to sum to 1); defaults to equal weights
+            k (int): Shortlist length
+            regions, categories, certifications: Filters as in filter()
+
+        Returns:
+            dict: Candidates considered and the ranked shortlist
+        """
+        weights = weights or {metric: 1.0 for metric in VENDOR_METRICS}
+        unknown = [metric for metric in weights if metric not in VENDOR_METRICS]
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+        try:
+            vector = np.array([float(weights.get(metric, 0.0)) for metric in VENDOR_METRICS])
+        except (TypeError, ValueError):
+            raise ValueError("Weights must be numeric")
+        if not np.all(np.isfinite(vector)) or np.any(vector < 0) or vector.sum() <= 0:
+            raise ValueError("Weights must be finite, non-negative and not all zero")
+        vector /= vector.sum()
+        if isinstance(k, bool) or not isinstance(k, (int, np.integer)) or k < 1:
+            raise ValueError("k must be a positive integer")
+
+        candidates = self.filter(regions, categories, certifications)
+        with self._lock:
+            scores = np.nan_to_num(self.metrics[candidates], nan=0.0) @ vector
+            if k < candidates.shape[0]:
+                best = np.argpartition(-scores, k)[:k]
+            else:
+                best = np.arange(candidates.shape[0])
+            best = best[np.argsort(-scores[best], kind='stable')]
+            region_names = list(self.vocabulary['region'])
+            category_names = list(self.vocabulary['category'])
+            shortlist = [
+                {
+                    'vendor_id': self.vendor_ids[row],
+                    'name': self.names[row],
+                    'region': region_names[self.region[row]],
+                    'category': category_names[self.category[row]],
+                    'score': float(scores[i]),
+                    'vendor_metrics': _metrics_dict(self.metrics[row], drop_missing=False)
+                }
+                for i, row in zip(best.tolist(), candidates[best].tolist())
+            ]
+        return {'candidates': int(candidates.shape[0]), 'weights': dict(zip(VENDOR_METRICS, vector.tolist())),
+                'vendors': shortlist}
+
+    def get(self, vendor_id):
+        """Stored metrics of one vendor, or None."""
+        with self._lock:
+            row = self._row.get(vendor_id)
+            if row is None:
+                return None
+            return _metrics_dict(self.metrics[row])
+
+def _metrics_dict(values, drop_missing=True):
+    """Metric -> value; unknown (NaN) metrics are left out or, with drop_missing=False, None."""
+    metrics = dict(zip(VENDOR_METRICS, values.tolist()))
+    if drop_missing:
+        return {metric: value for metric, value in metrics.items() if not np.isnan(value)}
+    return {metric: None if np.isnan(value) else value for metric, value in metrics.items()}
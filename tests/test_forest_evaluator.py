@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from modules.forest_evaluator import FlatForest
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 5)).astype(np.float32)
+    y = X[:, 0] * 2 - X[:, 1] * X[:, 2] + np.sin(X[:, 3]) + rng.normal(scale=0.1, size=600)
+    X_test = rng.normal(size=(2000, 5)).astype(np.float32)
+    # Rows exactly on split thresholds exercise the <= comparison
+    X_test[:50] = X[:50]
+    return X, y, X_test
+
+@pytest.mark.parametrize('max_table_bytes', [256 * 1024 * 1024, 0], ids=['quickscorer', 'traversal'])
+def test_regressor_matches_sklearn(data, max_table_bytes):
+    X, y, X_test = data
+    forest = RandomForestRegressor(n_estimators=30, max_depth=10, random_state=0).fit(X, y)
+    flat = FlatForest(forest, max_table_bytes=max_table_bytes)
+    assert flat.uses_bitmask_tables == bool(max_table_bytes)
+    np.testing.assert_allclose(flat.predict_proba(X_test), forest.predict(X_test), rtol=0, atol=1e-9)
+
+@pytest.mark.parametrize('max_table_bytes', [256 * 1024 * 1024, 0], ids=['quickscorer', 'traversal'])
+def test_classifier_matches_sklearn(data, max_table_bytes):
+    X, y, X_test = data
+    forest = RandomForestClassifier(n_estimators=30, random_state=0).fit(X, y > np.median(y))
+    flat = FlatForest(forest, max_table_bytes=max_table_bytes)
+    assert flat.uses_bitmask_tables == bool(max_table_bytes)
+    np.testing.assert_allclose(flat.predict_proba(X_test), forest.predict_proba(X_test)[:, 1], rtol=0, atol=1e-9)
+
+def test_single_row(data):
+    X, y, X_test = data
+    forest = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    flat = FlatForest(forest)
+    np.testing.assert_allclose(flat.predict_proba(X_test[0]), forest.predict(X_test[:1]), rtol=0, atol=1e-9)
@@ -0,0 +1,100 @@
+import asyncio
+import socket
+import socketserver
+import threading
+import time
+import pytest
+from modules.latency_prober import LatencyProber
+
+class _TcpEchoHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        data = self.request.recv(1024)
+        if data:
+            self.request.sendall(data)
+
+class _UdpEchoHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        data, sock = self.request
+        sock.sendto(data, self.client_address)
+
+def _serve(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+@pytest.fixture
+def tcp_echo():
+    server = _serve(socketserver.ThreadingTCPServer(('127.0.0.1', 0), _TcpEchoHandler))
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def udp_echo():
+    server = _serve(socketserver.UDPServer(('127.0.0.1', 0), _UdpEchoHandler))
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def udp_silent():
+    # Bound but never read, so probes get no reply and no ICMP error
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(('127.0.0.1', 0))
+    yield sock.getsockname()[1]
+    sock.close()
+
+def test_tcp_and_udp_latency_against_local_echo_servers(tcp_echo, udp_echo):
+    prober = LatencyProber([f"127.0.0.1:{tcp_echo}", f"127.0.0.1:{udp_echo}/udp"], timeout=1.0)
+    for _ in range(5):
+        round_results = prober.run_round()
+        for latency in round_results.values():
+            assert latency is not None
+            assert 0 < latency < 1000
+
+    statistics = prober.get_statistics()
+    for key in (f"127.0.0.1:{tcp_echo}/tcp", f"127.0.0.1:{udp_echo}/udp"):
+        assert statistics[key]['probes'] == 5
+        assert statistics[key]['loss_rate'] == 0
+        assert statistics[key]['p50'] <= statistics[key]['p95'] <= statistics[key]['p99']
+
+def test_udp_probe_without_reply_times_out(udp_silent):
+    prober = LatencyProber([{'host': '127.0.0.1', 'port': udp_silent, 'protocol': 'udp', 'timeout': 0.2}])
+    started = time.perf_counter()
+    assert prober.run_round() == {f"127.0.0.1:{udp_silent}/udp": None}
+    assert time.perf_counter() - started < 1.0
+
+    statistics = prober.get_statistics()[f"127.0.0.1:{udp_silent}/udp"]
+    assert statistics['loss_rate'] == 1
+    assert statistics['p50'] is None
+
+def test_refused_tcp_connection_counts_as_loss():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    prober = LatencyProber([f"127.0.0.1:{port}"], timeout=0.5)
+    assert prober.run_round() == {f"127.0.0.1:{port}/tcp": None}
+    assert prober.get_statistics()[f"127.0.0.1:{port}/tcp"]['loss_rate'] == 1
+
+def _slow_resolver(monkeypatch, delay):
+    original = asyncio.BaseEventLoop.getaddrinfo
+
+    async def getaddrinfo(self, host, port, **kwargs):
+        await asyncio.sleep(delay)
+        return await original(self, '127.0.0.1', port, **kwargs)
+    monkeypatch.setattr(asyncio.BaseEventLoop, 'getaddrinfo', getaddrinfo)
+
+def test_tcp_latency_excludes_name_resolution(tcp_echo, monkeypatch):
+    _slow_resolver(monkeypatch, 0.3)
+    prober = LatencyProber([f"echo.test:{tcp_echo}"], timeout=2.0)
+    latency = prober.run_round()[f"echo.test:{tcp_echo}/tcp"]
+    assert latency is not None
+    assert latency < 300
+
+def test_timeout_covers_name_resolution(tcp_echo, monkeypatch):
+    _slow_resolver(monkeypatch, 1.0)
+    prober = LatencyProber([f"echo.test:{tcp_echo}"], timeout=0.2)
+    started = time.perf_counter()
+    assert prober.run_round() == {f"echo.test:{tcp_echo}/tcp": None}
+    assert time.perf_counter() - started < 0.9
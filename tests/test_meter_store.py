@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+from modules.meter_store import MeterStore
+
+@pytest.fixture
+def store(tmp_path):
+    store = MeterStore(str(tmp_path / 'meters'), ['power'], initial_capacity=16)
+    rng = np.random.default_rng(0)
+    timestamps = np.arange(5000, dtype=np.float64)
+    store.append(timestamps, {'power': rng.normal(size=5000)})
+    return store
+
+@pytest.mark.parametrize('method', ['minmax', 'lttb'])
+@pytest.mark.parametrize('points', [3, 4, 5, 7, 100, 999, 4999])
+def test_downsample_stays_within_budget_and_keeps_endpoints(store, method, points):
+    series = store.downsample(points=points, method=method)['power']
+    assert len(series['timestamps']) <= points
+    assert series['timestamps'][0] == 0 and series['timestamps'][-1] == 4999
+    assert np.all(np.diff(series['timestamps']) > 0)
+
+def test_minmax_keeps_extremes(store):
+    values = store.range()[1]['power']
+    series = store.downsample(points=10, method='minmax')['power']
+    assert values.min() in series['values'] and values.max() in series['values']
@@ -0,0 +1,59 @@
+import json
+import time
+from modules.metrics_stream import MetricsBroadcaster
+
+def _event(message):
+    fields = dict(line.split(': ', 1) for line in message.decode().strip().split('\n'))
+    return fields['event'], json.loads(fields['data'])
+
+def _wait_for_idle(broadcaster, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while broadcaster._worker is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert broadcaster._worker is None
+
+def test_snapshot_then_changed_fields():
+    readings = iter(range(100))
+    broadcaster = MetricsBroadcaster({'counter': lambda: {'value': next(readings), 'unit': 'n'}}, interval=0.01)
+    stream = broadcaster.stream()
+    event, payload = _event(next(stream))
+    assert event == 'snapshot'
+    assert payload['counter']['unit'] == 'n'
+    event, payload = _event(next(stream))
+    assert event == 'update'
+    assert payload == {'counter': {'value': payload['counter']['value']}}
+    stream.close()
+
+def test_client_after_ticker_restart_gets_fresh_snapshot():
+    value = {'current': 1}
+    broadcaster = MetricsBroadcaster({'counter': lambda: dict(value)}, interval=0.01)
+    stream = broadcaster.stream()
+    assert _event(next(stream)) == ('snapshot', {'counter': {'current': 1}})
+    stream.close()
+    _wait_for_idle(broadcaster)
+
+    # Changed while nobody was connected, so the ticker was not running to see it
+    value['current'] = 2
+    stream = broadcaster.stream()
+    assert _event(next(stream)) == ('snapshot', {'counter': {'current': 2}})
+    stream.close()
+
+def test_failing_sources_after_restart_do_not_replay_stale_snapshot():
+    state = {'fail': False}
+
+    def source():
+        if state['fail']:
+            raise RuntimeError("source down")
+        return {'current': 1}
+    broadcaster = MetricsBroadcaster({'counter': source}, interval=0.01, keepalive=2.0)
+    stream = broadcaster.stream()
+    assert _event(next(stream)) == ('snapshot', {'counter': {'current': 1}})
+    stream.close()
+    _wait_for_idle(broadcaster)
+
+    state['fail'] = True
+    started = time.monotonic()
+    stream = broadcaster.stream()
+    assert _event(next(stream)) == ('snapshot', {})
+    assert time.monotonic() - started < 1.0
+    stream.close()